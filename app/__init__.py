@@ -1,9 +1,12 @@
 import os
-from flask import Flask, Blueprint
+from flask import Flask
 from .models import db  # utilise l'instance unique définie dans models.py
 from pathlib import Path
-import pkgutil, importlib
 from .services_init import init_services
+from .routes import register_blueprints
+# les modules des fonctionnalités sont importés dans create_app, au moment de leur
+# init_app ; ceux qui dépendent d'une option (STATIC_EXPORT_DIR, SESSION_BACKEND)
+# ne le sont que si elle est activée
 
 def create_app(config: dict | None = None):
     app = Flask(__name__, instance_relative_config=False)
@@ -24,35 +27,79 @@ def create_app(config: dict | None = None):
     # initialise l'extension avec l'app
     db.init_app(app)
 
-    # ensure services container exists
-    app.extensions.setdefault("services", {})
-
-    # try to populate services from app.services:
-    try:
-        svc_mod = importlib.import_module("app.services")
-        # prefer an init_services(app) if provided
-        if hasattr(svc_mod, "init_services"):
-            svc_mod.init_services(app)
-        # otherwise call create_services() and store returned dict
-        elif hasattr(svc_mod, "create_services"):
-            created = svc_mod.create_services()
-            if isinstance(created, dict):
-                app.extensions["services"].update(created)
-    except Exception:
-        # ne pas planter l'app si services manquent — routes gèreront l'erreur plus tard
-        pass
-
-    # auto-enregistrer blueprints présents dans app.routes.*
-    try:
-        import app.routes as routes_pkg
-        for finder, name, ispkg in pkgutil.iter_modules(routes_pkg.__path__):
-            mod = importlib.import_module(f"app.routes." + name)
-            for obj in vars(mod).values():
-                if isinstance(obj, Blueprint):
-                    app.register_blueprint(obj)
-    except Exception:
-        pass
+    # product.version + trigger : vérification du schéma (revalidation des paniers, ETag)
+    from . import product_versions
+    product_versions.init_app(app)
 
+    # journal des produits modifiés pour l'export statique (STATIC_EXPORT_DIR)
+    if app.config.get("STATIC_EXPORT_DIR") or os.environ.get("STATIC_EXPORT_DIR"):
+        from . import static_export
+        static_export.init_app(app)
+
+    # limitation des tentatives de connexion (LOGIN_THROTTLE_* dans la config)
+    from .login_throttle import LoginThrottle
+    app.extensions["login_throttle"] = LoginThrottle.from_config(app.config)
+
+    # sessions côté serveur si SESSION_BACKEND = "sqlite" / "filesystem"
+    if app.config.get("SESSION_BACKEND", "cookie") != "cookie":
+        from . import session_store
+        session_store.init_app(app)
+
+    # cache applicatif (CACHE_BACKEND = memory / sqlite / mmap) avec invalidation par étiquettes
+    from . import cache
+    cache.init_app(app)
+
+    # utilisateur courant (current_user) avec cache LRU du processus
+    from . import user_loader
+    user_loader.init_app(app)
+
+    # Cache-Control par blueprint, Surrogate-Key et purge du proxy (CACHE_PURGE_URL)
+    from . import proxy_cache
+    proxy_cache.init_app(app)
+
+    # compte / panier / messages servis à part sur les pages partagées (personal_slot)
+    from . import fragments
+    fragments.init_app(app)
+
+    # ressources statiques empreintées et précompressées (static_url dans les templates)
+    from . import assets
+    assets.init_app(app)
+
+    # variantes redimensionnées des photos (responsive_img dans les templates, /img/...)
+    from . import images
+    images.init_app(app)
+
+    # templates sans indentation, réponses gzip / brotli (COMPRESSION, COMPRESS_MIN_SIZE)
+    from . import compression
+    compression.init_app(app)
+
+    # bytecode Jinja sur disque (TEMPLATE_CACHE_DIR), temps de rendu (TEMPLATE_PROFILING)
+    from . import templating
+    templating.init_app(app)
+
+    # vues async exécutées sur la boucle d'événements partagée du processus
+    from . import aio
+    aio.init_app(app)
+
+    # services construits au premier accès (app.extensions["services"])
     init_services(app)
 
+    # blueprints du registre explicite app/routes/__init__.py
+    register_blueprints(app)
+
+    # catalogue partagé entre workers (prix / stock) si SHARED_CATALOGUE_PATH
+    from . import shared_catalogue
+    shared_catalogue.init_app(app)
+
+    # PRELOAD : catalogue et structures partagées construits dans le maître, puis gc.freeze()
+    from . import preload
+    preload.init_app(app)
+
+    # X-Forwarded-For / -Proto pris en compte seulement derrière TRUSTED_PROXIES proxys
+    # déclarés (sinon un client pourrait choisir son IP pour la limitation de connexion)
+    trusted = int(app.config.get("TRUSTED_PROXIES") or os.environ.get("TRUSTED_PROXIES") or 0)
+    if trusted:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted, x_proto=trusted)
+
     return app
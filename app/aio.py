@@ -0,0 +1,115 @@
+"""
+Vues asynchrones sur une boucle d'événements partagée par processus.
+
+Flask accepte les vues `async def` et les convertit avec app.async_to_sync (par
+défaut asgiref : une boucle neuve à chaque requête, et une dépendance en plus).
+init_app remplace ce convertisseur : la coroutine est exécutée sur une boucle
+unique, dans un thread du processus (recréée dans chaque worker après un fork),
+avec le contexte de la requête (request, session, current_app). Le thread de la
+requête attend le résultat.
+
+Ce que ça apporte sous WSGI (serve.py, run.py) :
+- plusieurs attentes d'une même vue se chevauchent (asyncio.gather) au lieu de
+  s'additionner
+- les connexions HTTP sortantes sont gardées d'une requête à l'autre (httpx, si
+  installé, avec un client partagé par la boucle)
+Ce que ça n'apporte pas : le thread de la requête reste occupé pendant l'attente,
+le nombre de requêtes simultanées d'un worker reste borné par --threads (mesure :
+python scripts/bench_async_views.py).
+
+Dans une coroutine, le code bloquant (SQLite, hash de mot de passe) passe par
+await asyncio.to_thread(...) : il bloquerait sinon toutes les vues de la boucle.
+
+fetch_json : requête HTTP asynchrone (httpx si installé, sinon urllib dans un
+thread), FetchError en cas d'erreur réseau, de délai dépassé ou de statut >= 400.
+"""
+import asyncio
+from functools import wraps
+import json
+import os
+import threading
+import urllib.parse
+
+try:
+    import httpx
+except ImportError:  # urllib dans un thread
+    httpx = None
+
+DEFAULT_TIMEOUT = 30.0
+
+_state = {"pid": None, "loop": None, "client": None}
+_lock = threading.Lock()
+
+
+class FetchError(Exception):
+    pass
+
+
+def get_loop():
+    """Boucle partagée du processus (démarrée au premier appel, puis après chaque fork)."""
+    with _lock:
+        if _state["pid"] != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="aio-loop", daemon=True).start()
+            _state.update(pid=os.getpid(), loop=loop, client=None)
+        return _state["loop"]
+
+
+def run(coro, timeout=DEFAULT_TIMEOUT):
+    """Exécute la coroutine sur la boucle partagée et attend son résultat (contexte copié)."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def async_to_sync(func):
+    """Remplace Flask.async_to_sync : vue `async def` exécutée sur la boucle partagée."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return run(func(*args, **kwargs))
+    return wrapper
+
+
+# ----- HTTP -----
+
+def _client():
+    # appelé depuis la boucle : un seul client (pool de connexions) par processus
+    if _state["client"] is None:
+        _state["client"] = httpx.AsyncClient()
+    return _state["client"]
+
+
+def _urllib_json(method, url, params, headers, timeout, payload):
+    import urllib.request  # repli sans httpx : pas chargé au démarrage
+    if params:
+        url = f"{url}{'&' if '?' in url else '?'}{urllib.parse.urlencode(params)}"
+    data = None
+    headers = dict(headers or {})
+    if payload is not None:
+        data = json.dumps(payload).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read() or b"null")
+    except (OSError, ValueError) as exc:  # URLError / HTTPError / délai sont des OSError
+        raise FetchError(str(exc)) from exc
+
+
+async def fetch_json(url, params=None, headers=None, timeout=6.0, method="GET", payload=None):
+    if httpx is None:
+        return await asyncio.to_thread(_urllib_json, method, url, params, headers, timeout, payload)
+    try:
+        response = await _client().request(method, url, params=params, headers=headers,
+                                           json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError) as exc:
+        raise FetchError(str(exc)) from exc
+
+
+def init_app(app):
+    app.async_to_sync = async_to_sync
@@ -0,0 +1,116 @@
+"""
+Adaptateur ASGI de l'application WSGI, pour la servir avec uvicorn / hypercorn :
+
+    uvicorn asgi:application --workers 4
+
+Chaque requête HTTP est exécutée dans un pool de threads (max_workers) : le corps
+de la requête est lu en entier, la réponse est envoyée morceau par morceau (les
+réponses en flux restent en flux). Les vues async de l'application tournent sur la
+boucle partagée de app/aio.py, pas sur celle du serveur ASGI. Le protocole
+lifespan est accepté ; les websockets ne sont pas pris en charge.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import sys
+
+
+class WSGIToASGI:
+    def __init__(self, wsgi_app, max_workers=32):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="asgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise RuntimeError(f"type de connexion ASGI non pris en charge : {scope['type']}")
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._run, environ_for(scope, body), send, loop)
+
+    def _run(self, environ, send, loop):
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started and started[0] is None:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started[:] = [(int(status.split(" ", 1)[0]), headers)]
+            return _no_write
+
+        def send_start():
+            code, headers = started[0]
+            emit({
+                "type": "http.response.start",
+                "status": code,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+            })
+            started[0] = None  # en-têtes envoyés
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if not chunk:
+                    continue
+                if started[0] is not None:
+                    send_start()
+                emit({"type": "http.response.body", "body": chunk, "more_body": True})
+            if started[0] is not None:
+                send_start()
+            emit({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+def _no_write(data):
+    raise RuntimeError("write() n'est pas pris en charge par l'adaptateur ASGI")
+
+
+def environ_for(scope, body):
+    """Environnement WSGI (PEP 3333) d'une requête HTTP ASGI."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            key = name
+        else:
+            key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
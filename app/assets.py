@@ -0,0 +1,154 @@
+"""
+Ressources statiques empreintées, précompressées et servies avec un cache illimité.
+
+Construction : `python scripts/build_assets.py` (voir ce script) copie chaque
+ressource de ASSETS dans ASSETS_DIR (défaut app/static/dist) sous un nom contenant
+l'empreinte de son contenu, ex. elegance.3fa1c0d2e4.css, écrit à côté les versions
+.gz (et .br si le module brotli est installé) et le manifeste manifest.json
+(nom logique -> nom empreinté). Les url(...) des CSS sont réécrites vers les noms
+empreintés (polices de Bootstrap / Google Fonts vendorisées).
+
+Dans les templates : {{ static_url('elegance.css') }}
+- ressource construite : /assets/<nom empreinté>, servie par routes/asset_routes.py
+  en br / gzip / brut selon Accept-Encoding, avec Cache-Control immutable : une
+  visite suivante ne refait aucune requête
+- pas encore construite : /static/<nom> si le fichier existe, sinon l'URL CDN
+  d'origine (VENDOR) pour les dépendances pas encore vendorisées
+"""
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+import posixpath
+import re
+
+from flask import current_app, url_for
+
+try:
+    import brotli
+except ImportError:  # pas de .br, gzip seulement
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+# nom logique (relatif à app/static) -> URL d'origine, téléchargée par build_assets.py --fetch
+VENDOR = {
+    "vendor/bootstrap/bootstrap.min.css": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js",
+    "vendor/fonts/fonts.css": "https://fonts.googleapis.com/css?family=Playfair+Display:700|Poppins:400,700&display=swap",
+}
+
+# ressources empreintées (en plus des fichiers vendorisés et de leurs polices)
+ASSETS = ("elegance.css", "logo.svg", *VENDOR)
+
+# extension de la version précompressée -> valeur de Content-Encoding, par préférence
+ENCODINGS = ((".br", "br"), (".gz", "gzip"))
+
+
+# types déjà compressés : pas de version .gz / .br
+_PRECOMPRESSED = {".woff2", ".woff", ".png", ".jpg", ".jpeg", ".webp", ".gif"}
+_CSS_URL_RE = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+
+
+def _hashed_name(filename, data):
+    stem, ext = posixpath.splitext(filename)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def _resolve(base, ref):
+    """Nom logique d'une référence url(...) relative, ou None (data:, absolue, ancre)."""
+    if re.match(r"^(?:[a-z]+:|/|#)", ref):
+        return None
+    return posixpath.normpath(posixpath.join(base, ref.split("?")[0].split("#")[0]))
+
+
+def precompress(data):
+    """[(".gz", octets), (".br", octets)] : versions plus petites que l'original seulement."""
+    variants = [(".gz", gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    return [(suffix, compressed) for suffix, compressed in variants if len(compressed) < len(data)]
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def build(out_dir, names=ASSETS, source_dir=None):
+    """
+    Empreinte et précompresse les ressources ; renvoie le manifeste écrit dans
+    out_dir/manifest.json. Les fichiers absents sont ignorés, ceux d'un build
+    précédent qui ne sont plus référencés sont supprimés.
+    """
+    source_dir = Path(source_dir or STATIC_DIR)
+    out_dir = Path(out_dir)
+    pending = [n for n in names if (source_dir / n).is_file()]
+    # polices et images référencées par les CSS, empreintées avant eux
+    for name in list(pending):
+        if name.endswith(".css"):
+            text = (source_dir / name).read_text(encoding="utf-8")
+            for _, ref in _CSS_URL_RE.findall(text):
+                target = _resolve(posixpath.dirname(name), ref)
+                if target and target not in pending and (source_dir / target).is_file():
+                    pending.insert(0, target)
+
+    manifest, written = {}, set()
+    for name in sorted(pending, key=lambda n: n.endswith(".css")):
+        data = (source_dir / name).read_bytes()
+        if name.endswith(".css"):
+            base = posixpath.dirname(name)
+
+            def rewrite(m, base=base):
+                target = _resolve(base, m.group(2))
+                if target not in manifest:
+                    return m.group(0)
+                return f"url({m.group(1)}{posixpath.relpath(manifest[target], base or '.')}{m.group(1)})"
+            data = _CSS_URL_RE.sub(rewrite, data.decode("utf-8")).encode("utf-8")
+        hashed = _hashed_name(name, data)
+        manifest[name] = hashed
+        path = out_dir / hashed
+        written.add(path)
+        if not path.exists():
+            _write(path, data)
+        if posixpath.splitext(name)[1] in _PRECOMPRESSED:
+            continue
+        for suffix, compressed in precompress(data):
+            compressed_path = path.with_name(path.name + suffix)
+            if not compressed_path.exists():
+                _write(compressed_path, compressed)
+            written.add(compressed_path)
+
+    if out_dir.is_dir():
+        for path in out_dir.rglob("*"):
+            if path.is_file() and path not in written and path.name != "manifest.json":
+                path.unlink()
+    _write(out_dir / "manifest.json", json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+def load_manifest(directory) -> dict:
+    try:
+        with open(Path(directory) / "manifest.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def static_url(filename):
+    """URL empreintée d'une ressource, avec repli sur /static/ ou le CDN d'origine."""
+    hashed = current_app.extensions["assets_manifest"].get(filename)
+    if hashed is not None:
+        return url_for("assets.asset", filename=hashed)
+    if filename in VENDOR and not (STATIC_DIR / filename).exists():
+        return VENDOR[filename]
+    return url_for("static", filename=filename)
+
+
+def init_app(app):
+    app.config.setdefault("ASSETS_DIR", str(STATIC_DIR / "dist"))
+    app.extensions["assets_manifest"] = load_manifest(app.config["ASSETS_DIR"])
+    app.jinja_env.globals["static_url"] = static_url
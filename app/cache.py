@@ -0,0 +1,475 @@
+"""
+Couche de cache commune (catalogue, fiche produit, utilisateurs...).
+
+    cache = get_cache()
+    product = cache.get_or_set(f"product:{pid}", lambda: load(pid), tags=[f"product:{pid}", "catalogue"])
+    cache.invalidate_tags(f"product:{pid}")
+
+Backends (CACHE_BACKEND) :
+- "memory" (défaut) : LRU + durée de vie, propre au processus ; les valeurs sont
+  gardées par référence (à traiter en lecture seule)
+- "sqlite"          : table cache_entry d'un fichier SQLite (CACHE_PATH), partagé
+  entre workers ; au-delà de CACHE_MAX_ENTRIES les entrées expirant le plus tôt
+  sont supprimées
+- "mmap"            : fichier projeté en mémoire (CACHE_PATH) partagé entre workers,
+  table à correspondance directe (une clé par case, une collision remplace l'entrée)
+
+Invalidation par étiquettes : chaque étiquette (product:<id>, catalogue, user:<id>)
+a un numéro de version stocké dans le backend. Une entrée mémorise les versions de
+ses étiquettes au moment du chargement ; invalider une étiquette incrémente sa
+version et rend périmées toutes les entrées qui la portent, sans les parcourir.
+
+Les étiquettes ne sont incrémentées que par le processus qui valide le commit (et
+seulement pour les écritures ORM). Avec le backend "memory" et plusieurs workers, une
+donnée qui doit suivre la base sans attendre la durée de vie est donc aussi rangée
+sous une clé qui contient sa version : les pages catalogue / produit utilisent
+product.version (app/product_versions.py), lue dans la base à chaque requête.
+
+Coalescence (single-flight) : pendant qu'un thread charge une clé absente, les
+autres threads du processus qui demandent la même clé attendent son résultat au
+lieu d'interroger la base à leur tour.
+
+Métriques (app.metrics) : <nom>_cache_hits_total, _misses_total, _evictions_total,
+_coalesced_total.
+"""
+from collections import OrderedDict
+from pathlib import Path
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+from app import metrics
+
+MISSING = object()
+
+
+def _expires_at(ttl):
+    return time.time() + ttl if ttl else float("inf")
+
+
+# ===== backends =====
+#
+# Interface commune :
+#   get(key) -> (value, versions) ou None     versions : {étiquette: version}
+#   set(key, value, expires_at, versions) -> nombre d'entrées évincées
+#   delete(key), clear()
+#   tag_versions(tags) -> {étiquette: version}, bump_tags(tags)
+
+class MemoryBackend:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # clé -> (expires_at, value, versions)
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, value, expires_at, versions):
+        evicted = 0
+        with self._lock:
+            self._data[key] = (expires_at, value, versions)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return {t: self._tags.get(t, 0) for t in tags}
+
+    def bump_tags(self, tags):
+        with self._lock:
+            for t in tags:
+                self._tags[t] = self._tags.get(t, 0) + 1
+
+
+class SQLiteBackend:
+    def __init__(self, path, max_entries=100_000, prune_every=1000):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._sets = 0
+        self._local = threading.local()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entry (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_entry_expires ON cache_entry (expires_at);
+            CREATE TABLE IF NOT EXISTS cache_tag (
+                tag TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+        """)
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn.execute(
+            "SELECT data FROM cache_entry WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, expires_at, versions):
+        data = pickle.dumps((value, versions), protocol=pickle.HIGHEST_PROTOCOL)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache_entry (key, data, expires_at) VALUES (?, ?, ?)",
+            (key, data, min(expires_at, 1e18)),
+        )
+        self._sets += 1
+        if self._sets % self.prune_every == 0:
+            return self.prune()
+        return 0
+
+    def prune(self):
+        """Supprime les entrées expirées puis, au-delà de max_entries, celles qui expirent le plus tôt."""
+        conn = self._conn
+        conn.execute("DELETE FROM cache_entry WHERE expires_at <= ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM cache_entry WHERE key IN "
+            "(SELECT key FROM cache_entry ORDER BY expires_at LIMIT ?)", (excess,)
+        )
+        return excess
+
+    def delete(self, key):
+        self._conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn.execute("DELETE FROM cache_entry")
+
+    def tag_versions(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        rows = self._conn.execute(
+            f"SELECT tag, version FROM cache_tag WHERE tag IN ({','.join('?' * len(tags))})", tags
+        ).fetchall()
+        found = dict(rows)
+        return {t: found.get(t, 0) for t in tags}
+
+    def bump_tags(self, tags):
+        self._conn.executemany(
+            "INSERT INTO cache_tag (tag, version) VALUES (?, 1) "
+            "ON CONFLICT(tag) DO UPDATE SET version = version + 1",
+            [(t,) for t in tags],
+        )
+
+
+class MmapBackend:
+    """
+    Fichier : en-tête (64 octets), table des versions d'étiquettes (u64 indexés par
+    hachage de l'étiquette), puis `slots` cases de `slot_size` octets :
+      [séquence u32][hachage de la clé u64][expiration f64][longueur u32][pickle]
+    La séquence est impaire pendant une écriture (écritures sous flock exclusif) ;
+    une lecture qui la voit changer recommence. Deux étiquettes de même hachage
+    partagent leur version : au pire une invalidation de trop, jamais une de moins.
+    """
+    MAGIC = b"ELGCACH1"
+    _HEADER = struct.Struct("<8sIII")  # magic, slots, slot_size, tag_slots
+    _HEADER_SIZE = 64
+    _SLOT = struct.Struct("<IQdI")
+    _U64 = struct.Struct("<Q")
+    _U32 = struct.Struct("<I")
+
+    def __init__(self, path, slots=4096, slot_size=4096, tag_slots=4096):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < self._HEADER_SIZE:
+                size = self._HEADER_SIZE + tag_slots * 8 + slots * slot_size
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, self._HEADER.pack(self.MAGIC, slots, slot_size, tag_slots), 0)
+            header = self._HEADER.unpack(os.pread(self._fd, self._HEADER.size, 0))
+            if header[0] != self.MAGIC:
+                raise ValueError(f"{self.path} n'est pas un fichier de cache")
+            _, self.slots, self.slot_size, self.tag_slots = header
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+        self._slots_offset = self._HEADER_SIZE + self.tag_slots * 8
+
+    @staticmethod
+    def _hash(text):
+        # stable entre processus (contrairement à hash())
+        return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def _slot_offset(self, h):
+        return self._slots_offset + (h % self.slots) * self.slot_size
+
+    def _tag_offset(self, tag):
+        return self._HEADER_SIZE + (self._hash(tag) % self.tag_slots) * 8
+
+    def get(self, key):
+        h = self._hash(key)
+        offset = self._slot_offset(h)
+        for _ in range(100):
+            seq = self._U32.unpack_from(self._mm, offset)[0]
+            if seq & 1:
+                continue
+            _, slot_hash, expires_at, length = self._SLOT.unpack_from(self._mm, offset)
+            if slot_hash != h:
+                return None
+            payload = self._mm[offset + self._SLOT.size:offset + self._SLOT.size + length]
+            if self._U32.unpack_from(self._mm, offset)[0] != seq:
+                continue
+            if expires_at <= time.time():
+                return None
+            stored_key, value, versions = pickle.loads(payload)
+            return (value, versions) if stored_key == key else None
+        return None
+
+    def _write_slot(self, offset, fn):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            seq = self._U32.unpack_from(self._mm, offset)[0]
+            self._U32.pack_into(self._mm, offset, seq | 1)
+            try:
+                return fn()
+            finally:
+                self._U32.pack_into(self._mm, offset, (seq | 1) + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def set(self, key, value, expires_at, versions):
+        payload = pickle.dumps((key, value, versions), protocol=pickle.HIGHEST_PROTOCOL)
+        if self._SLOT.size + len(payload) > self.slot_size:
+            return 0  # trop gros pour une case : non mis en cache
+        h = self._hash(key)
+        offset = self._slot_offset(h)
+
+        def write():
+            _, old_hash, old_expires, _ = self._SLOT.unpack_from(self._mm, offset)
+            evicted = int(old_hash not in (0, h) and old_expires > time.time())
+            seq = self._U32.unpack_from(self._mm, offset)[0]
+            self._SLOT.pack_into(self._mm, offset, seq, h, expires_at, len(payload))
+            start = offset + self._SLOT.size
+            self._mm[start:start + len(payload)] = payload
+            return evicted
+        return self._write_slot(offset, write)
+
+    def delete(self, key):
+        h = self._hash(key)
+        offset = self._slot_offset(h)
+
+        def write():
+            if self._SLOT.unpack_from(self._mm, offset)[1] == h:
+                self._U64.pack_into(self._mm, offset + 4, 0)
+        self._write_slot(offset, write)
+
+    def clear(self):
+        for n in range(self.slots):
+            offset = self._slots_offset + n * self.slot_size
+            self._write_slot(offset, lambda: self._U64.pack_into(self._mm, offset + 4, 0))
+
+    def tag_versions(self, tags):
+        return {t: self._U64.unpack_from(self._mm, self._tag_offset(t))[0] for t in tags}
+
+    def bump_tags(self, tags):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            for t in tags:
+                offset = self._tag_offset(t)
+                self._U64.pack_into(self._mm, offset, self._U64.unpack_from(self._mm, offset)[0] + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+# ===== cache =====
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = MISSING
+        self.error = None
+
+
+class Cache:
+    def __init__(self, backend, default_ttl=60.0, name="app", flight_timeout=10.0):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.name = name
+        self.flight_timeout = flight_timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _metric(self, what, value=1):
+        metrics.incr(f"{self.name}_cache_{what}_total", value)
+
+    def _lookup(self, key):
+        entry = self.backend.get(key)
+        if entry is None:
+            return MISSING
+        value, versions = entry
+        if versions and self.backend.tag_versions(versions) != versions:
+            return MISSING  # une étiquette a été invalidée depuis
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        if value is MISSING:
+            self._metric("misses")
+            return default
+        self._metric("hits")
+        return value
+
+    def _store(self, key, value, ttl, versions):
+        ttl = self.default_ttl if ttl is None else ttl
+        evicted = self.backend.set(key, value, _expires_at(ttl), versions)
+        if evicted:
+            self._metric("evictions", evicted)
+
+    def set(self, key, value, ttl=None, tags=()):
+        self._store(key, value, ttl, self.backend.tag_versions(tags))
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def invalidate_tags(self, *tags):
+        if tags:
+            self.backend.bump_tags(tags)
+
+    def get_or_set(self, key, loader, ttl=None, tags=(), cache_none=True):
+        """
+        Valeur en cache, sinon loader() ; un seul chargement à la fois par clé dans le
+        processus. Les versions des étiquettes sont lues avant le chargement : une
+        invalidation survenue pendant celui-ci rend la valeur chargée déjà périmée.
+        cache_none=False : un résultat None n'est pas mis en cache.
+        """
+        value = self._lookup(key)
+        if value is not MISSING:
+            self._metric("hits")
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._metric("coalesced")
+            if flight.event.wait(self.flight_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            return loader()  # chargement trop long : ne pas bloquer indéfiniment
+
+        self._metric("misses")
+        try:
+            versions = self.backend.tag_versions(tags)
+            flight.value = loader()
+            if flight.value is not None or cache_none:
+                self._store(key, flight.value, ttl, versions)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+
+def create_backend(kind="memory", path=None, max_entries=10_000):
+    if kind == "memory":
+        return MemoryBackend(maxsize=max_entries)
+    instance = Path(__file__).resolve().parents[1] / "instance"
+    if kind == "sqlite":
+        return SQLiteBackend(path or instance / "cache.db", max_entries=max_entries)
+    if kind == "mmap":
+        return MmapBackend(path or instance / "cache.bin")
+    raise ValueError(f"CACHE_BACKEND inconnu: {kind}")
+
+
+def get_cache():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("cache")
+
+
+# ----- invalidation automatique à la modification d'un produit -----
+
+def _collect_products(session, flush_context):
+    from app.models import Product
+    ids = session.info.setdefault("cache_product_ids", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            ids.add(obj.id)
+
+
+def _invalidate_products(session):
+    ids = session.info.pop("cache_product_ids", None)
+    cache = get_cache()
+    if ids and cache is not None:
+        cache.invalidate_tags("catalogue", *(f"product:{pid}" for pid in ids))
+
+
+def _drop_products(session):
+    session.info.pop("cache_product_ids", None)
+
+
+_listening = False
+
+
+def init_app(app):
+    global _listening
+    backend = create_backend(
+        app.config.get("CACHE_BACKEND", "memory"),
+        app.config.get("CACHE_PATH"),
+        int(app.config.get("CACHE_MAX_ENTRIES", 10_000)),
+    )
+    cache = Cache(backend, default_ttl=float(app.config.get("CACHE_DEFAULT_TTL", 300)))
+    app.extensions["cache"] = cache
+    if not _listening:
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        event.listen(Session, "after_flush", _collect_products)
+        event.listen(Session, "after_commit", _invalidate_products)
+        event.listen(Session, "after_rollback", _drop_products)
+        _listening = True
+    return cache
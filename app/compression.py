@@ -0,0 +1,219 @@
+"""
+Compression des réponses (middleware WSGI) et suppression des espaces des templates.
+
+CompressionMiddleware compresse en brotli (si le module est installé et accepté par
+le client) ou en gzip les réponses textuelles :
+- pas de compression sous COMPRESS_MIN_SIZE octets (Content-Length connu), ni pour
+  les réponses déjà encodées (/assets/ précompressés), 204 / 304, HEAD ou
+  Cache-Control: no-transform
+- réponse avec Content-Length : compressée en une fois, envoyée telle quelle si le
+  résultat n'est pas plus petit
+- réponse en flux (sans Content-Length) : chaque morceau est compressé puis vidé
+  (flush) aussitôt, le client reçoit les données au fur et à mesure
+- l'ETag d'une réponse compressée devient faible (W/"...") : la comparaison faible
+  de If-None-Match (app/http_cache.py) le reconnaît toujours, et deux encodages ne
+  partagent jamais un ETag fort
+
+WhitespaceStripper (extension Jinja) retire à la compilation l'indentation et les
+lignes vides des templates, hors <pre> et <textarea>. Les retours à la ligne sont
+gardés : le JavaScript en ligne (commentaires //, insertion de points-virgules)
+reste valide.
+
+Configuration : COMPRESSION (défaut activé), COMPRESS_MIN_SIZE (500), COMPRESS_LEVEL
+(gzip, 6), TEMPLATE_STRIP_WHITESPACE (défaut activé). Mesure :
+python scripts/report_compression.py
+"""
+import re
+import zlib
+
+from jinja2.ext import Extension
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_cache_control_header
+
+try:
+    import brotli
+except ImportError:  # gzip seulement
+    brotli = None
+
+COMPRESSIBLE = {
+    "text/html", "text/css", "text/plain", "text/javascript", "text/xml", "text/csv",
+    "application/javascript", "application/json", "application/xml", "image/svg+xml",
+}
+
+
+class _Gzip:
+    name = "gzip"
+
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    name = "br"
+
+    def __init__(self, level):
+        # qualité 5 : proche de gzip -6 en temps CPU, nettement plus compact
+        self._c = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+def choose_encoding(accept_encoding):
+    """"br", "gzip" ou None selon l'en-tête Accept-Encoding."""
+    accepted = parse_accept_header(accept_encoding or "")
+    if brotli is not None and accepted["br"] > 0:
+        return "br"
+    if accepted["gzip"] > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size=500, level=6):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def _compressor(self, encoding):
+        return _Brotli(self.level) if encoding == "br" else _Gzip(self.level)
+
+    def _should_compress(self, environ, status, headers):
+        if environ.get("REQUEST_METHOD") == "HEAD" or "Content-Encoding" in headers:
+            return False
+        code = int(status.split(" ", 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        mimetype = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if mimetype not in COMPRESSIBLE:
+            return False
+        if parse_cache_control_header(headers.get("Cache-Control")).no_transform:
+            return False
+        length = headers.get("Content-Length")
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get("HTTP_ACCEPT_ENCODING"))
+        state = {}
+
+        def capture(status, headers, exc_info=None):
+            headers = Headers(headers)
+            if headers.get("Content-Type", "").split(";")[0].strip().lower() in COMPRESSIBLE:
+                _add_vary(headers)
+            if encoding and self._should_compress(environ, status, headers):
+                state.update(status=status, headers=headers, exc_info=exc_info)
+                return _not_supported
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        app_iter = self.app(environ, capture)
+        if not state:
+            return app_iter
+        if "Content-Length" in state["headers"]:
+            return self._buffered(app_iter, state, encoding, start_response)
+        return self._streamed(app_iter, state, encoding, start_response)
+
+    def _buffered(self, app_iter, state, encoding, start_response):
+        try:
+            body = b"".join(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+        compressor = self._compressor(encoding)
+        compressed = compressor.compress(body) + compressor.finish()
+        headers = state["headers"]
+        if len(compressed) >= len(body):
+            start_response(state["status"], headers.to_wsgi_list(), state["exc_info"])
+            return [body]
+        _mark_encoded(headers, encoding)
+        headers["Content-Length"] = str(len(compressed))
+        start_response(state["status"], headers.to_wsgi_list(), state["exc_info"])
+        return [compressed]
+
+    def _streamed(self, app_iter, state, encoding, start_response):
+        headers = state["headers"]
+        _mark_encoded(headers, encoding)
+        start_response(state["status"], headers.to_wsgi_list(), state["exc_info"])
+        compressor = self._compressor(encoding)
+
+        def generate():
+            try:
+                for chunk in app_iter:
+                    if chunk:
+                        data = compressor.compress(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                yield compressor.finish()
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+        return generate()
+
+
+def _not_supported(data):
+    raise RuntimeError("write() n'est pas pris en charge avec la compression")
+
+
+def _add_vary(headers):
+    vary = [v.strip() for v in headers.get("Vary", "").split(",") if v.strip()]
+    if "accept-encoding" not in (v.lower() for v in vary):
+        headers["Vary"] = ", ".join(vary + ["Accept-Encoding"])
+
+
+def _mark_encoded(headers, encoding):
+    headers["Content-Encoding"] = encoding
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+# ----- templates -----
+
+_PRESERVE_RE = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.IGNORECASE | re.DOTALL)
+_INDENT_RE = re.compile(r"^[ \t]+|[ \t]+$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{2,}")
+
+
+def strip_whitespace(source):
+    parts = _PRESERVE_RE.split(source)
+    out = []
+    # split avec deux groupes : [texte, bloc préservé, nom de balise, texte, ...]
+    for i in range(0, len(parts), 3):
+        text = _INDENT_RE.sub("", parts[i])
+        out.append(_BLANK_LINES_RE.sub("\n", text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out)
+
+
+class WhitespaceStripper(Extension):
+    """Retire indentation et lignes vides du source des templates avant compilation."""
+    def preprocess(self, source, name, filename=None):
+        if name and not name.endswith((".html", ".htm", ".xml", ".svg")):
+            return source
+        return strip_whitespace(source)
+
+
+def init_app(app):
+    if app.config.get("TEMPLATE_STRIP_WHITESPACE", True):
+        app.jinja_env.add_extension(WhitespaceStripper)
+    if app.config.get("COMPRESSION", True):
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            min_size=int(app.config.get("COMPRESS_MIN_SIZE", 500)),
+            level=int(app.config.get("COMPRESS_LEVEL", 6)),
+        )
@@ -1,24 +1,31 @@
 from __future__ import annotations
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from enum import Enum, auto
-from typing import Dict, List, Optional
+from enum import IntEnum
+from typing import Dict, List, Optional, Protocol, runtime_checkable
+import sys
 import uuid
 import time
 import hashlib
+import bisect
+import heapq
+import itertools
+import threading
 
 
 # =========================
 # ======= DOMAIN =========
 # =========================
 
-class OrderStatus(Enum):
-    CREE = auto()
-    VALIDEE = auto()
-    PAYEE = auto()
-    EXPEDIEE = auto()
-    LIVREE = auto()
-    ANNULEE = auto()
-    REMBOURSEE = auto()
+class OrderStatus(IntEnum):
+    # petits entiers : une commande ne stocke qu'une référence vers un int partagé
+    CREE = 1
+    VALIDEE = 2
+    PAYEE = 3
+    EXPEDIEE = 4
+    LIVREE = 5
+    ANNULEE = 6
+    REMBOURSEE = 7
 
 
 @dataclass
@@ -35,12 +42,22 @@ class User:
     is_admin: bool = False
 
     def update_profile(self, **fields):
+        """Modifie le profil ; passer par UserRepository.update_profile pour le journaliser."""
         for k, v in fields.items():
             if hasattr(self, k) and k not in {"id", "email", "is_admin", "password_hash"}:
                 setattr(self, k, v)
 
 
-@dataclass
+# Les classes à fort volume (lignes de commande, paiements, messages...) utilisent
+# slots=True : pas de __dict__ par instance. Les chaînes très répétées (catégorie,
+# transporteur, prestataire) sont internées pour être partagées entre instances.
+
+def _intern(value):
+    # champs optionnels : None (ou autre valeur non str) laissé tel quel
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
 class Product:
     id: str
     name: str
@@ -48,9 +65,13 @@ class Product:
     price_cents: int
     stock_qty: int = 0
     category: str = ""
+    active: bool = True
 
+    def __post_init__(self):
+        self.category = _intern(self.category)
 
-@dataclass
+
+@dataclass(slots=True)
 class CartItem:
     product_id: str
     quantity: int
@@ -87,7 +108,7 @@ class Cart:
     def clear(self):
         self.items.clear()
 
-    def total_cents(self, product_repo: "ProductRepository") -> int:
+    def total_cents(self, product_repo: "ProductRepo") -> int:
         total = 0
         for it in self.items.values():
             p = product_repo.get(it.product_id)
@@ -97,7 +118,7 @@ class Cart:
         return total
 
 
-@dataclass
+@dataclass(slots=True)
 class InvoiceLine:
     product_id: str
     name: str
@@ -116,7 +137,7 @@ class Invoice:
     issued_at: float  # epoch timestamp
 
 
-@dataclass
+@dataclass(slots=True)
 class Payment:
     id: str
     order_id: str
@@ -127,8 +148,11 @@ class Payment:
     succeeded: bool
     created_at: float
 
+    def __post_init__(self):
+        self.provider = _intern(self.provider)
 
-@dataclass
+
+@dataclass(slots=True)
 class Delivery:
     id: str
     order_id: str
@@ -137,6 +161,9 @@ class Delivery:
     address: str
     status: str  # ex: "PREPAREE", "EN_COURS", "LIVREE"
 
+    def __post_init__(self):
+        self.carrier = _intern(self.carrier)
+
 
 @dataclass
 class MessageThread:
@@ -148,7 +175,7 @@ class MessageThread:
     closed: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     id: str
     thread_id: str
@@ -157,15 +184,19 @@ class Message:
     created_at: float
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     product_id: str
     name: str
     unit_price_cents: int
     quantity: int
 
+    def __post_init__(self):
+        self.product_id = _intern(self.product_id)
+        self.name = _intern(self.name)
 
-@dataclass
+
+@dataclass(slots=True)
 class Order:
     id: str
     user_id: str
@@ -186,18 +217,93 @@ class Order:
         return sum(i.unit_price_cents * i.quantity for i in self.items)
 
 
+# =========================
+# == REPOSITORY PROTOCOLS ==
+# =========================
+#
+# Interface commune aux backends de stockage : les repositories en mémoire ci-dessous
+# et les repositories SQLite de app/sqlite_repositories.py. Les services ne dépendent
+# que de ces protocoles ; le backend est choisi par app.repositories.create_repositories.
+# Contrat : une entité obtenue par get() puis modifiée doit être repassée à
+# update()/save() pour que la modification soit enregistrée.
+
+@runtime_checkable
+class UserRepo(Protocol):
+    def add(self, user: User): ...
+    def get(self, user_id: str) -> Optional[User]: ...
+    def get_by_email(self, email: str) -> Optional[User]: ...
+
+
+@runtime_checkable
+class ProductRepo(Protocol):
+    def add(self, product: Product): ...
+    def get(self, product_id: str) -> Optional[Product]: ...
+    def list_all(self) -> List[Product]: ...
+    def list_active(self) -> List[Product]: ...
+    def reserve_stock(self, product_id: str, qty: int): ...
+    def release_stock(self, product_id: str, qty: int): ...
+    def transaction(self): ...
+
+
+@runtime_checkable
+class CartRepo(Protocol):
+    def add(self, cart: Cart): ...
+    def get_or_create(self, user_id: str) -> Cart: ...
+    def save(self, cart: Cart): ...
+    def clear(self, user_id: str): ...
+
+
+@runtime_checkable
+class OrderRepo(Protocol):
+    def add(self, order: Order): ...
+    def get(self, order_id: str) -> Optional[Order]: ...
+    def update(self, order: Order): ...
+    def list_by_user(self, user_id: str) -> List[Order]: ...
+    def list_by_status(self, status: OrderStatus, limit: Optional[int] = None) -> List[Order]: ...
+    def count_by_status(self, status: OrderStatus) -> int: ...
+    def list_created_between(self, start: float, end: float) -> List[Order]: ...
+
+
+@runtime_checkable
+class InvoiceRepo(Protocol):
+    def add(self, invoice: Invoice): ...
+    def get(self, invoice_id: str) -> Optional[Invoice]: ...
+
+
+@runtime_checkable
+class PaymentRepo(Protocol):
+    def add(self, payment: Payment): ...
+    def get(self, payment_id: str) -> Optional[Payment]: ...
+
+
+@runtime_checkable
+class ThreadRepo(Protocol):
+    def add(self, thread: MessageThread): ...
+    def get(self, thread_id: str) -> Optional[MessageThread]: ...
+    def update(self, thread: MessageThread): ...
+    def list_by_user(self, user_id: str) -> List[MessageThread]: ...
+    def list_open(self) -> List[MessageThread]: ...
+
+
 # =========================
 # ===== REPOSITORIES ======
 # =========================
+#
+# Chaque repository a un attribut `journal` (None par défaut) : s'il est défini
+# (voir app/domain_store.py), il est appelé avec l'entité après chaque modification,
+# ce qui permet de persister l'état dans un journal en ajout seul.
 
 class UserRepository:
     def __init__(self):
         self._by_id: Dict[str, User] = {}
         self._by_email: Dict[str, User] = {}
+        self.journal = None
 
     def add(self, user: User):
         self._by_id[user.id] = user
         self._by_email[user.email.lower()] = user
+        if self.journal:
+            self.journal(user)
 
     def get(self, user_id: str) -> Optional[User]:
         return self._by_id.get(user_id)
@@ -205,15 +311,28 @@ class UserRepository:
     def get_by_email(self, email: str) -> Optional[User]:
         return self._by_email.get(email.lower())
 
+    def update_profile(self, user_id: str, **fields) -> Optional[User]:
+        user = self._by_id.get(user_id)
+        if user is None:
+            return None
+        user.update_profile(**fields)
+        if self.journal:
+            self.journal(user)
+        return user
+
 
 class ProductRepository:
     def __init__(self):
         self._products = []
         self._by_id = {}  # Ajout de l'attribut manquant
+        self.journal = None
+        self._tx = threading.local()
 
     def add(self, product):
         self._products.append(product)
         self._by_id[product.id] = product  # Mise à jour du dictionnaire
+        if self.journal:
+            self.journal(product)
 
     def list_all(self):
         return self._products
@@ -229,34 +348,95 @@ class ProductRepository:
         if not p or p.stock_qty < qty:
             raise ValueError("Stock insuffisant.")
         p.stock_qty -= qty
+        if self.journal:
+            self.journal(p)
+        undo = getattr(self._tx, "undo", None)
+        if undo is not None:
+            undo.append((product_id, qty))
+
+    @contextmanager
+    def transaction(self):
+        """Réservations du bloc rendues s'il lève (équivalent en mémoire de BEGIN / ROLLBACK)."""
+        if getattr(self._tx, "undo", None) is not None:
+            yield  # bloc imbriqué : le bloc extérieur décide
+            return
+        self._tx.undo = []
+        try:
+            yield
+        except BaseException:
+            for product_id, qty in reversed(self._tx.undo):
+                self.release_stock(product_id, qty)
+            raise
+        finally:
+            self._tx.undo = None
 
     def release_stock(self, product_id: str, qty: int):
         p = self.get(product_id)
         if p:
             p.stock_qty += qty
+            if self.journal:
+                self.journal(p)
 
 
 class CartRepository:
     def __init__(self):
         self._by_user: Dict[str, Cart] = {}
+        self.journal = None
+
+    def add(self, cart: Cart):
+        self._by_user[cart.user_id] = cart
+        self.save(cart)
 
     def get_or_create(self, user_id: str) -> Cart:
         if user_id not in self._by_user:
-            self._by_user[user_id] = Cart(user_id=user_id)
+            self.add(Cart(user_id=user_id))
         return self._by_user[user_id]
 
+    def save(self, cart: Cart):
+        """À appeler après une modification du panier (journalisation)."""
+        if self.journal:
+            self.journal(cart)
+
     def clear(self, user_id: str):
-        self.get_or_create(user_id).clear()
+        cart = self.get_or_create(user_id)
+        cart.clear()
+        self.save(cart)
 
 
 class OrderRepository:
+    """
+    Commandes en mémoire avec index secondaires, tenus à jour par add() et update() :
+    - par utilisateur
+    - par statut : un ensemble ordonné (dict) par statut, dans l'ordre d'arrivée
+      dans ce statut -> files du back-office en O(résultat)
+    - par date de création : liste triée (created_at, id) pour les requêtes par période
+    Les services modifient order.status puis appellent update(), qui déplace la commande
+    d'un ensemble de statut à l'autre.
+    """
     def __init__(self):
         self._by_id: Dict[str, Order] = {}
         self._by_user: Dict[str, List[str]] = {}
+        self._by_status: Dict[OrderStatus, Dict[str, None]] = {s: {} for s in OrderStatus}
+        self._status_of: Dict[str, OrderStatus] = {}
+        self._by_date: List[tuple] = []
+        self.journal = None
+
+    def _index_status(self, order: Order):
+        old = self._status_of.get(order.id)
+        if old == order.status:
+            return
+        if old is not None:
+            self._by_status[old].pop(order.id, None)
+        self._by_status[order.status][order.id] = None
+        self._status_of[order.id] = order.status
 
     def add(self, order: Order):
         self._by_id[order.id] = order
         self._by_user.setdefault(order.user_id, []).append(order.id)
+        self._index_status(order)
+        bisect.insort(self._by_date, (order.created_at, order.id))
+        if self.journal:
+            self.journal(order)
 
     def get(self, order_id: str) -> Optional[Order]:
         return self._by_id.get(order_id)
@@ -264,16 +444,37 @@ class OrderRepository:
     def list_by_user(self, user_id: str) -> List[Order]:
         return [self._by_id[oid] for oid in self._by_user.get(user_id, [])]
 
+    def list_by_status(self, status: OrderStatus, limit: Optional[int] = None) -> List[Order]:
+        ids = self._by_status[status]
+        if limit is not None:
+            ids = itertools.islice(ids, limit)
+        return [self._by_id[oid] for oid in ids]
+
+    def count_by_status(self, status: OrderStatus) -> int:
+        return len(self._by_status[status])
+
+    def list_created_between(self, start: float, end: float) -> List[Order]:
+        """Commandes créées dans [start, end), par date croissante."""
+        lo = bisect.bisect_left(self._by_date, (start,))
+        hi = bisect.bisect_left(self._by_date, (end,))
+        return [self._by_id[oid] for _, oid in self._by_date[lo:hi]]
+
     def update(self, order: Order):
         self._by_id[order.id] = order
+        self._index_status(order)
+        if self.journal:
+            self.journal(order)
 
 
 class InvoiceRepository:
     def __init__(self):
         self._by_id: Dict[str, Invoice] = {}
+        self.journal = None
 
     def add(self, invoice: Invoice):
         self._by_id[invoice.id] = invoice
+        if self.journal:
+            self.journal(invoice)
 
     def get(self, invoice_id: str) -> Optional[Invoice]:
         return self._by_id.get(invoice_id)
@@ -282,9 +483,12 @@ class InvoiceRepository:
 class PaymentRepository:
     def __init__(self):
         self._by_id: Dict[str, Payment] = {}
+        self.journal = None
 
     def add(self, payment: Payment):
         self._by_id[payment.id] = payment
+        if self.journal:
+            self.journal(payment)
 
     def get(self, payment_id: str) -> Optional[Payment]:
         return self._by_id.get(payment_id)
@@ -293,15 +497,32 @@ class PaymentRepository:
 class ThreadRepository:
     def __init__(self):
         self._by_id: Dict[str, MessageThread] = {}
+        self._by_user: Dict[str, Dict[str, None]] = {}  # ensemble ordonné d'ids
+        self._open: Dict[str, None] = {}
+        self.journal = None
 
     def add(self, thread: MessageThread):
         self._by_id[thread.id] = thread
+        self._by_user.setdefault(thread.user_id, {})[thread.id] = None
+        self.update(thread)
 
     def get(self, thread_id: str) -> Optional[MessageThread]:
         return self._by_id.get(thread_id)
 
+    def update(self, thread: MessageThread):
+        self._by_id[thread.id] = thread
+        if thread.closed:
+            self._open.pop(thread.id, None)
+        else:
+            self._open[thread.id] = None
+        if self.journal:
+            self.journal(thread)
+
     def list_by_user(self, user_id: str) -> List[MessageThread]:
-        return [t for t in self._by_id.values() if t.user_id == user_id]
+        return [self._by_id[tid] for tid in self._by_user.get(user_id, {})]
+
+    def list_open(self) -> List[MessageThread]:
+        return [self._by_id[tid] for tid in self._open]
 
 
 # =========================
@@ -321,25 +542,95 @@ class PasswordHasher:
         return PasswordHasher.hash(password) == stored_hash
 
 
-class SessionManager:
-    """Gestion simple de sessions en mémoire."""
+class _SessionShard:
+    __slots__ = ("lock", "sessions", "heap")
+
     def __init__(self):
-        self._sessions: Dict[str, str] = {}  # token -> user_id
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, List] = {}  # token -> [user_id, expires_at]
+        self.heap: List = []  # (échéance, token), au plus une entrée par session
+
+
+class SessionManager:
+    """
+    Sessions en mémoire (token -> user_id), utilisables depuis plusieurs threads.
+    - les sessions sont réparties sur `shards` dictionnaires, chacun avec son verrou
+    - chaque session expire après `ttl` secondes ; avec sliding=True l'échéance est
+      repoussée à chaque get_user_id()
+    - la purge utilise un tas d'échéances par shard : elle ne visite que les sessions
+      arrivées à échéance (les sessions prolongées entre-temps sont simplement replacées
+      dans le tas), au lieu de parcourir toutes les sessions
+    """
+    def __init__(self, ttl: float = 3600.0, sliding: bool = True, shards: int = 16, clock=time.monotonic):
+        self.ttl = ttl
+        self.sliding = sliding
+        self._clock = clock
+        self._shards = [_SessionShard() for _ in range(max(1, shards))]
+
+    def _shard(self, token: str) -> _SessionShard:
+        return self._shards[hash(token) % len(self._shards)]
 
     def create_session(self, user_id: str) -> str:
         token = str(uuid.uuid4())
-        self._sessions[token] = user_id
+        now = self._clock()
+        shard = self._shard(token)
+        with shard.lock:
+            self._sweep_shard(shard, now)
+            shard.sessions[token] = [user_id, now + self.ttl]
+            heapq.heappush(shard.heap, (now + self.ttl, token))
         return token
 
     def destroy_session(self, token: str):
-        self._sessions.pop(token, None)
+        shard = self._shard(token)
+        with shard.lock:
+            # l'entrée du tas devient orpheline et sera ignorée à la purge
+            shard.sessions.pop(token, None)
 
     def get_user_id(self, token: str) -> Optional[str]:
-        return self._sessions.get(token)
+        shard = self._shard(token)
+        now = self._clock()
+        with shard.lock:
+            entry = shard.sessions.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del shard.sessions[token]
+                return None
+            if self.sliding:
+                entry[1] = now + self.ttl
+            return entry[0]
+
+    def _sweep_shard(self, shard: _SessionShard, now: float) -> int:
+        removed = 0
+        heap = shard.heap
+        while heap and heap[0][0] <= now:
+            _, token = heapq.heappop(heap)
+            entry = shard.sessions.get(token)
+            if entry is None:
+                continue
+            if entry[1] <= now:
+                del shard.sessions[token]
+                removed += 1
+            else:
+                # session prolongée (expiration glissante) : replacer à sa vraie échéance
+                heapq.heappush(heap, (entry[1], token))
+        return removed
+
+    def sweep(self) -> int:
+        """Supprime les sessions expirées ; retourne le nombre de sessions supprimées."""
+        now = self._clock()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += self._sweep_shard(shard, now)
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(shard.sessions) for shard in self._shards)
 
 
 class AuthService:
-    def __init__(self, users: UserRepository, sessions: SessionManager):
+    def __init__(self, users: UserRepo, sessions: SessionManager):
         self.users = users
         self.sessions = sessions
 
@@ -387,7 +678,7 @@ class AuthService:
 # =========================
 
 class CatalogService:
-    def __init__(self, products: ProductRepository):
+    def __init__(self, products: ProductRepo):
         self.products = products
 
     def list_products(self) -> List[Product]:
@@ -395,7 +686,7 @@ class CatalogService:
 
 
 class CartService:
-    def __init__(self, carts: CartRepository, products: ProductRepository):
+    def __init__(self, carts: CartRepo, products: ProductRepo):
         self.carts = carts
         self.products = products
 
@@ -403,10 +694,14 @@ class CartService:
         product = self.products.get(product_id)
         if not product:
             raise ValueError("Produit introuvable.")
-        self.carts.get_or_create(user_id).add(product, qty)
+        cart = self.carts.get_or_create(user_id)
+        cart.add(product, qty)
+        self.carts.save(cart)
 
     def remove_from_cart(self, user_id: str, product_id: str, qty: int = 1):
-        self.carts.get_or_create(user_id).remove(product_id, qty)
+        cart = self.carts.get_or_create(user_id)
+        cart.remove(product_id, qty)
+        self.carts.save(cart)
 
     def view_cart(self, user_id: str) -> Cart:
         return self.carts.get_or_create(user_id)
@@ -435,7 +730,7 @@ class PaymentGateway:
 
 
 class BillingService:
-    def __init__(self, invoices: InvoiceRepository):
+    def __init__(self, invoices: InvoiceRepo):
         self.invoices = invoices
 
     def issue_invoice(self, order: Order) -> Invoice:
@@ -486,15 +781,15 @@ class DeliveryService:
 class OrderService:
     def __init__(
         self,
-        orders: OrderRepository,
-        products: ProductRepository,
-        carts: CartRepository,
-        payments: PaymentRepository,
-        invoices: InvoiceRepository,
+        orders: OrderRepo,
+        products: ProductRepo,
+        carts: CartRepo,
+        payments: PaymentRepo,
+        invoices: InvoiceRepo,
         billing: BillingService,
         delivery_svc: DeliveryService,
         gateway: PaymentGateway,
-        users: UserRepository
+        users: UserRepo
     ):
         self.orders = orders
         self.products = products
@@ -509,34 +804,36 @@ class OrderService:
     # ----- core flows -----
 
     def checkout(self, user_id: str) -> Order:
-        cart = self.carts.get_or_create(user_id)
-        if not cart.items:
-            raise ValueError("Panier vide.")
-        # Réserver le stock
-        order_items: List[OrderItem] = []
-        for it in cart.items.values():
-            p = self.products.get(it.product_id)
-            if not p or not p.active:
-                raise ValueError("Produit indisponible.")
-            if p.stock_qty < it.quantity:
-                raise ValueError(f"Stock insuffisant pour {p.name}.")
-            self.products.reserve_stock(p.id, it.quantity)
-            order_items.append(OrderItem(
-                product_id=p.id,
-                name=p.name,
-                unit_price_cents=p.price_cents,
-                quantity=it.quantity
-            ))
-        order = Order(
-            id=str(uuid.uuid4()),
-            user_id=user_id,
-            items=order_items,
-            status=OrderStatus.CREE,
-            created_at=time.time()
-        )
-        self.orders.add(order)
-        # vider le panier
-        self.carts.clear(user_id)
+        # une seule transaction : une ligne refusée annule les réservations précédentes
+        with self.products.transaction():
+            cart = self.carts.get_or_create(user_id)
+            if not cart.items:
+                raise ValueError("Panier vide.")
+            # Réserver le stock
+            order_items: List[OrderItem] = []
+            for it in cart.items.values():
+                p = self.products.get(it.product_id)
+                if not p or not p.active:
+                    raise ValueError("Produit indisponible.")
+                if p.stock_qty < it.quantity:
+                    raise ValueError(f"Stock insuffisant pour {p.name}.")
+                self.products.reserve_stock(p.id, it.quantity)
+                order_items.append(OrderItem(
+                    product_id=p.id,
+                    name=p.name,
+                    unit_price_cents=p.price_cents,
+                    quantity=it.quantity
+                ))
+            order = Order(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                items=order_items,
+                status=OrderStatus.CREE,
+                created_at=time.time()
+            )
+            self.orders.add(order)
+            # vider le panier
+            self.carts.clear(user_id)
         return order
 
     def pay_by_card(self, order_id: str, card_number: str, exp_month: int, exp_year: int, cvc: str) -> Payment:
@@ -590,6 +887,13 @@ class OrderService:
 
     # ----- backoffice -----
 
+    def backoffice_queue(self, admin_user_id: str, status: OrderStatus, limit: Optional[int] = None) -> List[Order]:
+        """File du back-office (ex: PAYEE = à expédier, CREE = à valider), via l'index de statut."""
+        admin = self.users.get(admin_user_id)
+        if not admin or not admin.is_admin:
+            raise PermissionError("Droits insuffisants.")
+        return self.orders.list_by_status(status, limit)
+
     def backoffice_validate_order(self, admin_user_id: str, order_id: str) -> Order:
         admin = self.users.get(admin_user_id)
         if not admin or not admin.is_admin:
@@ -656,7 +960,7 @@ class OrderService:
 
 class CustomerService:
     """Service client: fils de discussion & messages côté UI + réponses agents."""
-    def __init__(self, threads: ThreadRepository, users: UserRepository):
+    def __init__(self, threads: ThreadRepo, users: UserRepo):
         self.threads = threads
         self.users = users
 
@@ -673,6 +977,7 @@ class CustomerService:
             raise ValueError("Auteur inconnu.")
         msg = Message(id=str(uuid.uuid4()), thread_id=thread_id, author_user_id=author_user_id, body=body, created_at=time.time())
         th.messages.append(msg)
+        self.threads.update(th)
         return msg
 
     def close_thread(self, thread_id: str, admin_user_id: str):
@@ -683,6 +988,7 @@ class CustomerService:
         if not th:
             raise ValueError("Fil introuvable.")
         th.closed = True
+        self.threads.update(th)
         return th
 
 
@@ -716,7 +1022,7 @@ if __name__ == "__main__":
     products.add(p1); products.add(p2)
 
     # create users
-    admin = auth.register("admin@shop.test", "admin", "Admin", "Root", "1 Rue du BO", is_admin=True)
+    admin = auth.register("admin@shop.test", "admin", "Admin", "Root", "1 Rue du BO", "Paris", "75000", is_admin=True)
     client = auth.register("client@shop.test", "secret", "Alice", "Martin", "12 Rue des Fleurs", "Paris", "75000", "0123456789")
 
     token = auth.login("client@shop.test", "secret")
@@ -736,7 +1042,7 @@ if __name__ == "__main__":
 
     # validate
     order = order_svc.backoffice_validate_order(admin.id, order.id)
-    print("Commande validée:", order.status)
+    print("Commande validée:", order.status.name)
 
     # pay
     payment = order_svc.pay_by_card(order.id, "4242424242424242", 12, 2030, "123")
@@ -746,7 +1052,7 @@ if __name__ == "__main__":
     order = order_svc.backoffice_ship_order(admin.id, order.id)
     print("Expédiée, tracking:", order.delivery.tracking_number)
     order = order_svc.backoffice_mark_delivered(admin.id, order.id)
-    print("Statut:", order.status)
+    print("Statut:", order.status.name)
 
     # support thread
     th = cs.open_thread(user_id, "Taille trop petite", order_id=order.id)
@@ -0,0 +1,325 @@
+"""
+Persistance des repositories en mémoire du domaine : instantané + journal en ajout seul.
+
+Principe
+- chaque modification d'entité (produit, commande, panier, fil de discussion...) est
+  ajoutée au journal courant sous la forme d'un enregistrement "upsert" :
+  [longueur u32][crc32 u32][pickle (repo, entité)]
+- snapshot() écrit l'état complet (pickle protocole 5) puis ouvre un nouveau segment
+  de journal ; les segments couverts par l'instantané sont supprimés
+- au démarrage, load_into() charge le dernier instantané valide puis rejoue les
+  segments suivants ; un enregistrement final incomplet (arrêt brutal) est ignoré
+  et tronqué
+
+Fichiers dans le dossier du store :
+  snapshot.<seg>.pkl   état couvrant tous les segments < seg
+  journal.<seg>.log    segments de journal
+
+Un seul processus écrit dans un dossier donné : un verrou (store.lock, fcntl.lockf,
+non hérité au fork) est pris avant le chargement ; un autre processus attend au plus
+lock_timeout secondes (relève d'un worker recyclé) puis échoue. Avec plusieurs
+workers, chacun aurait de toute façon sa propre copie en mémoire des repositories :
+utiliser DOMAIN_BACKEND=sqlite (app/repositories.py).
+
+Activation dans services_init : variable d'environnement DOMAIN_STORE_DIR.
+"""
+from pathlib import Path
+import gc
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+_HEADER = struct.Struct("<II")  # longueur, crc32
+
+# clé d'identité de chaque type d'entité, par nom de repository
+KEYS = {
+    "users": lambda e: e.id,
+    "products": lambda e: e.id,
+    "carts": lambda e: e.user_id,
+    "orders": lambda e: e.id,
+    "invoices": lambda e: e.id,
+    "payments": lambda e: e.id,
+    "threads": lambda e: e.id,
+}
+
+
+class DomainStore:
+    def __init__(self, directory, fsync=False, snapshot_every=None, lock_timeout=10.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self.lock_timeout = lock_timeout
+        self._lock = threading.RLock()
+        self._repos = {}
+        self._log = None
+        self._segment = 0
+        self._records = 0
+        self._child = None
+        self._thread = None
+        self._owner = None
+        self._lock_file = None
+
+    def _acquire(self):
+        """Verrou exclusif du dossier pour le processus courant (pris une fois par pid)."""
+        if self._owner == os.getpid():
+            return
+        if self._owner is not None:
+            # objet hérité d'un fork : le journal appartient au processus parent
+            raise RuntimeError(f"DomainStore {self.directory} ouvert par le processus {self._owner}")
+        if fcntl is not None:
+            f = open(self.directory / "store.lock", "a+b")
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        f.close()
+                        raise RuntimeError(
+                            f"DomainStore {self.directory} déjà utilisé par un autre processus "
+                            "(un seul worker, ou DOMAIN_BACKEND=sqlite)"
+                        ) from None
+                    time.sleep(0.1)
+            self._lock_file = f
+        self._owner = os.getpid()
+
+    # ----- fichiers -----
+
+    def _segments(self, prefix, suffix):
+        pattern = re.compile(rf"^{prefix}\.(\d+)\.{suffix}$")
+        out = []
+        for p in self.directory.iterdir():
+            m = pattern.match(p.name)
+            if m:
+                out.append((int(m.group(1)), p))
+        return sorted(out)
+
+    def _log_path(self, segment):
+        return self.directory / f"journal.{segment:08d}.log"
+
+    def _snapshot_path(self, segment):
+        return self.directory / f"snapshot.{segment:08d}.pkl"
+
+    def _open_log(self, segment):
+        if self._log:
+            self._log.close()
+        self._segment = segment
+        self._log = open(self._log_path(segment), "ab", buffering=0)
+
+    # ----- chargement -----
+
+    @staticmethod
+    def _read_records(path):
+        """Itère sur les enregistrements valides ; s'arrête (et tronque) au premier invalide."""
+        with open(path, "r+b") as f:
+            data = f.read()
+            pos = 0
+            while pos + _HEADER.size <= len(data):
+                length, crc = _HEADER.unpack_from(data, pos)
+                start = pos + _HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                yield pickle.loads(payload)
+                pos = start + length
+            if pos < len(data):
+                f.truncate(pos)
+
+    def load_into(self, repos: dict):
+        """Reconstruit les repositories (vides) à partir de l'instantané et du journal."""
+        # des millions de petits objets sont créés d'un coup : le ramasse-miettes
+        # cyclique se déclencherait sans cesse pour rien pendant le chargement
+        self._acquire()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._load_into(repos)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _load_into(self, repos):
+        state = {name: {} for name in KEYS}
+        snapshot_segment = 0
+        for segment, path in reversed(self._segments("snapshot", "pkl")):
+            try:
+                with open(path, "rb") as f:
+                    saved = pickle.load(f)
+            except Exception:
+                continue  # instantané corrompu : on essaie le précédent
+            for name, entities in saved.items():
+                state[name] = {KEYS[name](e): e for e in entities}
+            snapshot_segment = segment
+            break
+
+        last_segment = snapshot_segment
+        for segment, path in self._segments("journal", "log"):
+            if segment < snapshot_segment:
+                continue
+            for name, entity in self._read_records(path):
+                state[name][KEYS[name](entity)] = entity
+            last_segment = segment
+
+        for name, entities in state.items():
+            repo = repos.get(name)
+            if repo is None:
+                continue
+            journal, repo.journal = repo.journal, None
+            for entity in entities.values():
+                repo.add(entity)
+            repo.journal = journal
+
+        self._open_log(last_segment)
+        return sum(len(e) for e in state.values())
+
+    def attach(self, repos: dict):
+        """Branche le journal sur les repositories : chaque modification est enregistrée."""
+        self._acquire()
+        self._repos = repos
+        if self._log is None:
+            segments = self._segments("journal", "log")
+            self._open_log(segments[-1][0] if segments else 0)
+        for name, repo in repos.items():
+            repo.journal = self._recorder(name)
+
+    def _recorder(self, name):
+        def record(entity):
+            self.append(name, entity)
+        return record
+
+    # ----- écriture -----
+
+    def append(self, name, entity):
+        if self._owner != os.getpid():
+            self._acquire()  # lève RuntimeError dans un processus fils
+        payload = pickle.dumps((name, entity), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._log.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._records += 1
+            if self._child is not None:
+                # fils d'instantané terminé : récolté ici plutôt qu'au prochain instantané
+                self._reap_child()
+            due = self.snapshot_every and self._records >= self.snapshot_every
+        if due:
+            # jamais dans le thread de la requête : fork (ou thread) d'écriture
+            self.snapshot(background=True)
+
+    def _state(self):
+        state = {}
+        for name, repo in self._repos.items():
+            if name == "products":
+                state[name] = list(repo._by_id.values())
+            elif name == "carts":
+                state[name] = list(repo._by_user.values())
+            else:
+                state[name] = list(repo._by_id.values())
+        return state
+
+    def _write_snapshot(self, segment, state):
+        path = self._snapshot_path(segment)
+        tmp = path.with_suffix(".tmp")
+        # pickle.dumps peut rendre la main aux autres threads (__getstate__ des
+        # dataclasses slots=True est du code Python) : une entité modifiée pendant
+        # l'encodage peut apparaître dans sa version plus récente. Sans conséquence :
+        # toute modification est aussi ajoutée au nouveau segment, rejoué après
+        # l'instantané. Un dict modifié pendant l'encodage fait échouer l'écriture
+        # (RuntimeError) : l'instantané est alors abandonné, journaux conservés.
+        blob = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _cleanup(self, segment):
+        """Supprime les segments et instantanés antérieurs à `segment`."""
+        for seg, path in self._segments("journal", "log") + self._segments("snapshot", "pkl"):
+            if seg < segment:
+                path.unlink(missing_ok=True)
+
+    def snapshot(self, background=False):
+        """
+        Écrit un instantané de l'état courant et démarre un nouveau segment de journal.
+        background=True : l'écriture se fait hors du thread appelant, dans un processus
+        fils (fork, POSIX : copie figée de la mémoire, l'appelant n'est bloqué que le
+        temps du fork) ou à défaut dans un thread ; retourne None si une écriture en
+        arrière-plan est déjà en cours.
+        """
+        with self._lock:
+            self._reap_child()
+            if background and (self._child is not None or (self._thread and self._thread.is_alive())):
+                return None
+            segment = self._segment + 1
+            self._open_log(segment)
+            self._records = 0
+            if background and hasattr(os, "fork"):
+                pid = os.fork()
+                if pid == 0:
+                    code = 0
+                    try:
+                        self._write_snapshot(segment, self._state())
+                    except BaseException:
+                        code = 1
+                    os._exit(code)
+                self._child = (pid, segment)
+                return segment
+            # listes d'entités copiées sous le verrou, en même temps que le changement de segment
+            state = self._state()
+            if background:
+                self._thread = threading.Thread(
+                    target=self._write_in_thread, args=(segment, state), name="domain-snapshot", daemon=True
+                )
+                self._thread.start()
+                return segment
+        self._write_snapshot(segment, state)
+        self._cleanup(segment)
+        return segment
+
+    def _write_in_thread(self, segment, state):
+        try:
+            self._write_snapshot(segment, state)
+        except Exception:
+            return  # segments conservés : l'état reste reconstructible
+        self._cleanup(segment)
+
+    def _reap_child(self, block=False):
+        if self._child is None:
+            return
+        pid, segment = self._child
+        try:
+            done, status = os.waitpid(pid, 0 if block else os.WNOHANG)
+        except ChildProcessError:
+            # déjà récolté ailleurs (SIGCHLD ignoré...) : issue inconnue, segments conservés
+            self._child = None
+            return
+        if done:
+            self._child = None
+            if os.waitstatus_to_exitcode(status) == 0:
+                self._cleanup(segment)
+
+    def close(self):
+        with self._lock:
+            self._reap_child(block=True)
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+            if self._log:
+                self._log.close()
+                self._log = None
+            if self._lock_file is not None and self._owner == os.getpid():
+                self._lock_file.close()  # libère le verrou
+                self._lock_file = None
+                self._owner = None
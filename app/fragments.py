@@ -0,0 +1,64 @@
+"""
+Fragments personnalisés (compte, panier, messages flash) servis à part pour que les
+pages publiques soient identiques pour tous les visiteurs.
+
+Page partagée : requête GET/HEAD d'un blueprint dont la politique de cache est
+publique (app/proxy_cache.py : catalogue, accueil). Son HTML ne lit jamais la
+session : base.html y place des emplacements au lieu du contenu personnel, et l'ETag
+(app/http_cache.py) ne dépend plus de l'utilisateur. Une seule copie est donc
+partagée par le proxy et tous les navigateurs.
+
+Remplissage des emplacements (FRAGMENTS_MODE) :
+- "fetch" (défaut) : un petit script appelle /fragment/personal (JSON avec le HTML
+  de chaque emplacement et le nombre d'articles du panier) ; sans JavaScript la
+  version anonyme reste affichée
+- "esi"            : <esi:include src="/fragment/<nom>"/>, assemblé par le proxy
+  (Varnish : set beresp.do_esi = true)
+
+Les fragments eux-mêmes ne sont jamais mis en cache (private, no-store).
+"""
+from flask import current_app, get_flashed_messages, render_template, request, session, url_for
+from markupsafe import Markup
+
+PARTS = {"account": "_account.html", "flashes": "_flashes.html"}
+
+
+def shared_page() -> bool:
+    """True si la réponse en cours est commune à tous les visiteurs."""
+    if request.method not in ("GET", "HEAD") or request.blueprint is None:
+        return False
+    policy = current_app.extensions.get("cache_policies", {}).get(request.blueprint)
+    return bool(policy) and policy.startswith("public")
+
+
+def personal_context() -> dict:
+    cart = session.get("cart") or {}
+    return {
+        "logged_in": bool(session.get("user_id")),
+        "is_admin": bool(session.get("is_admin")),
+        "cart_count": sum(int(q) for q in cart.values()),
+    }
+
+
+def render_part(name, context=None):
+    if name == "flashes":
+        return render_template(PARTS[name], messages=get_flashed_messages(with_categories=True))
+    return render_template(PARTS[name], **(context or personal_context()))
+
+
+def personal_slot(name):
+    """Contenu personnel d'une page : inline, ou emplacement rempli par le client / le proxy."""
+    if not shared_page():
+        return Markup(render_part(name))
+    src = url_for("fragments.part", name=name)
+    if current_app.config.get("FRAGMENTS_MODE", "fetch") == "esi":
+        return Markup(f'<esi:include src="{src}"/>')
+    anonymous = "" if name == "flashes" else render_template(
+        PARTS[name], logged_in=False, is_admin=False, cart_count=None
+    )
+    return Markup(f'<div data-personal="{name}">{anonymous}</div>')
+
+
+def init_app(app):
+    app.jinja_env.globals["personal_slot"] = personal_slot
+    app.jinja_env.globals["shared_page"] = shared_page
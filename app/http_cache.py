@@ -0,0 +1,124 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified) pour le catalogue et les fiches produit.
+
+L'ETag n'est pas une empreinte du corps rendu : il est calculé à partir des versions
+des lignes produit (app/product_versions.py), incrémentées par trigger à chaque
+modification, quel que soit l'écrivain et le worker : catalogue_version() pour les
+listes (génération de la table), product_version(id) pour une fiche. Le décorateur
+@conditional(validator) lit cette version et répond 304 Not Modified avant d'appeler
+la vue : une requête d'une ligne, ou une lecture du catalogue partagé s'il est
+configuré (app/shared_catalogue.py), ni chargement du catalogue ni template. Tous les workers
+calculent le même ETag pour le même contenu.
+
+L'ETag contient aussi :
+- l'utilisateur connecté, sauf sur les pages partagées dont la partie personnelle est
+  servie à part (app/fragments.py) ; les réponses personnalisées sont
+  Cache-Control: private
+- une époque : RELEASE (config ou variable d'environnement), sinon une empreinte des
+  templates (chemins, tailles, dates) : un déploiement qui change les templates
+  change les ETag, identiques entre workers d'un même déploiement
+
+Pas de validateur si des messages flash sont en attente et que la page les affiche
+elle-même : elle ne doit pas être resservie depuis le cache du navigateur.
+
+Last-Modified est la date à laquelle ce processus a vu l'ETag courant pour la première
+fois ; If-Modified-Since n'est utilisé que sans If-None-Match.
+"""
+from functools import lru_cache, wraps
+from pathlib import Path
+import hashlib
+import os
+import threading
+import time
+
+from flask import current_app, make_response, request, session
+from werkzeug.http import http_date
+
+from app import metrics
+from app.fragments import shared_page
+
+_first_seen = {}
+_first_seen_lock = threading.Lock()
+_FIRST_SEEN_MAX = 10_000
+
+
+@lru_cache(maxsize=8)
+def _templates_fingerprint(folder):
+    digest = hashlib.sha1()
+    for path in sorted(Path(folder).rglob("*")):
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f"{path.relative_to(folder)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def _epoch():
+    release = current_app.config.get("RELEASE") or os.environ.get("RELEASE")
+    if release:
+        return str(release)
+    return _templates_fingerprint(os.path.join(current_app.root_path, current_app.template_folder or "templates"))
+
+
+def etag_for(version, shared=False):
+    """ETag d'une version de contenu (pour l'utilisateur courant si la page n'est pas partagée)."""
+    parts = [_epoch()]
+    if not shared:
+        parts += [str(session.get("user_id") or ""), str(bool(session.get("is_admin")))]
+    parts.append(str(version))
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _last_modified(etag):
+    with _first_seen_lock:
+        seen = _first_seen.get(etag)
+        if seen is None:
+            if len(_first_seen) >= _FIRST_SEEN_MAX:
+                _first_seen.clear()
+            seen = _first_seen[etag] = int(time.time())
+    return seen
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # comparaison faible : app/compression.py rend l'ETag faible (W/"...")
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and since.timestamp() >= last_modified
+
+
+def _set_validators(response, etag, last_modified, shared):
+    response.set_etag(etag)
+    response.headers["Last-Modified"] = http_date(last_modified)
+    # toujours revalider : le 304 ne coûte presque rien
+    response.cache_control.no_cache = True
+    if not shared:
+        if session.get("user_id"):
+            response.cache_control.private = True
+        response.vary.add("Cookie")
+
+
+def conditional(validator):
+    """
+    Répond 304 si le client a déjà la version courante. validator : fonction des
+    arguments de la vue qui renvoie la version du contenu
+    (ex. lambda product_id: f"product:{product_id}={product_version(product_id)}").
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            shared = shared_page()
+            if request.method not in ("GET", "HEAD") or (not shared and session.get("_flashes")):
+                return view(*args, **kwargs)
+            etag = etag_for(validator(**kwargs), shared)
+            last_modified = _last_modified(etag)
+            if _not_modified(etag, last_modified):
+                metrics.incr("http_not_modified_total")
+                response = current_app.response_class(status=304)
+                _set_validators(response, etag, last_modified, shared)
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified, shared)
+            return response
+        return wrapper
+    return decorator
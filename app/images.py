@@ -0,0 +1,273 @@
+"""
+Variantes redimensionnées des photos produits (JPEG et WebP) pour srcset/sizes.
+
+Chaque photo source app/static/images/<nom>.jpg est déclinée en trois largeurs
+(SIZES : vignette, carte, zoom ; jamais agrandie) et deux formats. Le nom de fichier
+contient une empreinte du contenu source et des paramètres d'encodage :
+
+    <nom>.<taille>.<empreinte>.<ext>      ex. karakou_3.card.1f0c9a7e2b.webp
+
+une URL ne désigne donc jamais deux contenus différents et peut être mise en cache
+par le navigateur sans limite (Cache-Control immutable).
+
+- hors ligne : `python scripts/build_image_variants.py` génère toutes les variantes
+  dans IMAGE_VARIANTS_DIR (défaut app/static/images/variants)
+- à la demande : /img/<fichier> (routes/image_routes.py) sert la variante
+  pré-générée, sinon celle du cache disque IMAGE_CACHE_DIR (défaut instance/image_cache),
+  sinon la génère ; le cache est borné à IMAGE_CACHE_MAX_BYTES, les fichiers les moins
+  récemment servis sont supprimés en premier (date de modification mise à jour à
+  chaque lecture)
+- templates : {{ responsive_img(p.id, p.name, sizes=..., css_class=...) }} produit un
+  <picture> avec une source WebP et un <img> JPEG de repli
+
+Pillow est optionnel : sans lui, responsive_img renvoie un simple <img> vers la
+photo d'origine et /img/ redirige vers celle-ci.
+"""
+from collections import namedtuple
+import hashlib
+import importlib.util
+import io
+import os
+from pathlib import Path
+import re
+import threading
+
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+
+from app import metrics
+
+# Pillow importé au premier usage (hors du démarrage des workers) ; absent : photos d'origine
+_HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SOURCE_DIR = Path(__file__).resolve().parent / "static" / "images"
+
+# largeur maximale (px) de chaque taille
+SIZES = {"thumb": 240, "card": 480, "zoom": 1200}
+# extension -> (format Pillow, type MIME, options d'encodage)
+FORMATS = {
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+}
+_NAME_RE = re.compile(r"^[\w-]+$")
+_VARIANT_RE = re.compile(r"^(?P<name>[\w-]+)\.(?P<size>[a-z]+)\.(?P<digest>[0-9a-f]{10})\.(?P<ext>[a-z]+)$")
+
+Variant = namedtuple("Variant", "filename width height")
+_Source = namedtuple("_Source", "stamp digest width height")
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def available() -> bool:
+    return _HAS_PIL
+
+
+def source_path(name):
+    return SOURCE_DIR / f"{name}.jpg"
+
+
+def _source(name):
+    """Empreinte et dimensions de la source, recalculées seulement si le fichier change."""
+    path = source_path(name)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    info = _sources.get(name)
+    if info is not None and info.stamp == stamp:
+        return info
+    from PIL import Image
+    data = path.read_bytes()
+    with Image.open(io.BytesIO(data)) as im:
+        width, height = im.size
+    info = _Source(stamp, hashlib.sha1(data).digest(), width, height)
+    with _sources_lock:
+        _sources[name] = info
+    return info
+
+
+def _target(info, size):
+    width = min(SIZES[size], info.width)
+    return width, max(1, round(info.height * width / info.width))
+
+
+def _digest(info, size, ext):
+    params = f"{_target(info, size)}:{FORMATS[ext][0]}:{sorted(FORMATS[ext][2].items())}"
+    return hashlib.sha1(info.digest + params.encode()).hexdigest()[:10]
+
+
+def variant(name, size, ext):
+    """Variant(filename, width, height) de la photo <name>, ou None (source absente / sans Pillow)."""
+    if not _HAS_PIL or not _NAME_RE.match(name):
+        return None
+    info = _source(name)
+    if info is None:
+        return None
+    width, height = _target(info, size)
+    return Variant(f"{name}.{size}.{_digest(info, size, ext)}.{ext}", width, height)
+
+
+def parse(filename):
+    """(nom, taille, empreinte, ext) d'un nom de variante, ou None s'il est invalide."""
+    m = _VARIANT_RE.match(filename)
+    if not m or m["size"] not in SIZES or m["ext"] not in FORMATS:
+        return None
+    return m["name"], m["size"], m["digest"], m["ext"]
+
+
+def render(name, size, ext) -> bytes:
+    """Encode la variante (redimensionnement Lanczos, transparence aplatie sur fond blanc)."""
+    info = _source(name)
+    width, height = _target(info, size)
+    from PIL import Image, ImageOps
+    fmt, _, options = FORMATS[ext]
+    with Image.open(source_path(name)) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            background = Image.new("RGB", im.size, (255, 255, 255))
+            background.paste(im, mask=im.getchannel("A"))
+            im = background
+        elif im.mode != "RGB":
+            im = im.convert("RGB")
+        if im.size != (width, height):
+            im = im.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        im.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def generate_all(directory, names=None):
+    """Pré-génère toutes les variantes ; renvoie [(fichier, octets, créé)]. Les variantes
+    d'une version précédente de chaque photo sont supprimées."""
+    directory = Path(directory)
+    if names is None:
+        names = sorted(p.stem for p in SOURCE_DIR.glob("*.jpg") if _NAME_RE.match(p.stem))
+    results = []
+    for name in names:
+        current = set()
+        for size in SIZES:
+            for ext in FORMATS:
+                v = variant(name, size, ext)
+                if v is None:
+                    continue
+                path = directory / v.filename
+                current.add(v.filename)
+                created = not path.exists()
+                if created:
+                    _write(path, render(name, size, ext))
+                results.append((v.filename, path.stat().st_size, created))
+        for old in directory.glob(f"{name}.*.*.*"):
+            if old.name not in current and parse(old.name) and parse(old.name)[0] == name:
+                old.unlink()
+    return results
+
+
+class DiskCache:
+    """Cache disque LRU des variantes générées à la demande, borné en octets."""
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        path = self.directory / filename
+        try:
+            os.utime(path)  # récence LRU = date de modification
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, filename, data):
+        path = self.directory / filename
+        _write(path, data)
+        self.prune()
+        return path
+
+    def size(self):
+        if not self.directory.is_dir():
+            return 0
+        return sum(p.stat().st_size for p in self.directory.iterdir() if p.is_file())
+
+    def prune(self):
+        """Supprime les fichiers les moins récemment lus jusqu'à repasser sous max_bytes."""
+        with self._lock:
+            entries = []
+            for p in self.directory.iterdir():
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, p))
+            total = sum(size for _, size, _ in entries)
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                metrics.incr("image_cache_evictions_total")
+
+
+# ----- intégration Flask -----
+
+def variant_url(name, size, ext):
+    v = variant(name, size, ext)
+    if v is None:
+        return url_for("static", filename=f"images/{name}.jpg")
+    return url_for("images.variant_file", filename=v.filename)
+
+
+def _srcset(name, ext):
+    entries, seen = [], set()
+    for size in SIZES:
+        v = variant(name, size, ext)
+        if v.width not in seen:
+            seen.add(v.width)
+            entries.append(f"{url_for('images.variant_file', filename=v.filename)} {v.width}w")
+    return ", ".join(entries)
+
+
+def responsive_img(name, alt="", sizes="100vw", css_class="", size="card", loading="lazy"):
+    """<picture> WebP + JPEG avec srcset/sizes ; <img> d'origine sans Pillow ou sans source."""
+    name = str(name)
+    attrs = f'class="{escape(css_class)}" alt="{escape(alt)}" loading="{escape(loading)}" decoding="async"'
+    fallback = variant(name, size, "jpg")
+    if fallback is None:
+        src = url_for("static", filename=f"images/{name}.jpg")
+        return Markup(f'<img src="{escape(src)}" {attrs}>')
+    src = url_for("images.variant_file", filename=fallback.filename)
+    return Markup(
+        "<picture>"
+        f'<source type="image/webp" srcset="{escape(_srcset(name, "webp"))}" sizes="{escape(sizes)}">'
+        f'<img src="{escape(src)}" srcset="{escape(_srcset(name, "jpg"))}" sizes="{escape(sizes)}" '
+        f'width="{fallback.width}" height="{fallback.height}" {attrs}>'
+        "</picture>"
+    )
+
+
+def get_disk_cache():
+    return current_app.extensions["image_cache"]
+
+
+def init_app(app):
+    app.config.setdefault("IMAGE_VARIANTS_DIR", str(SOURCE_DIR / "variants"))
+    app.config.setdefault("IMAGE_CACHE_DIR", str(PROJECT_ROOT / "instance" / "image_cache"))
+    app.extensions["image_cache"] = DiskCache(
+        app.config["IMAGE_CACHE_DIR"],
+        int(app.config.get("IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    )
+    app.jinja_env.globals["responsive_img"] = responsive_img
+    app.jinja_env.globals["variant_url"] = variant_url
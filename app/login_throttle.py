@@ -0,0 +1,173 @@
+"""
+Limitation des tentatives de connexion (par email et par IP).
+
+Chaque tentative est comptée dans une fenêtre glissante ; au-delà de la limite la
+requête est refusée AVANT toute vérification de mot de passe, ce qui protège le CPU
+(hachage scrypt) lors d'une rafale de credential stuffing.
+
+Fenêtre glissante plutôt que seau à jetons : c'est un seau de capacité `limite`
+dont chaque jeton revient `window` secondes après usage, avec un délai
+Retry-After exact (plus ancienne tentative + fenêtre) et un état partageable en
+lignes SQLite ; un seau classique demanderait un compteur + horodatage par clé mis
+à jour en lecture-modification-écriture.
+
+Le contrôle et l'enregistrement d'une tentative (acquire) sont atomiques : un seul
+verrou en mémoire, une seule transaction BEGIN IMMEDIATE en SQLite, pour qu'une
+rafale simultanée (threads, workers) ne dépasse pas la limite.
+
+Stockage :
+- MemoryWindow : en mémoire, propre au processus
+- SQLiteWindow : fichier SQLite partagé entre les workers (LOGIN_THROTTLE_DB)
+"""
+from collections import deque
+import sqlite3
+import threading
+import time
+
+from app import metrics
+
+
+class MemoryWindow:
+    """Journal des tentatives par clé (deque de timestamps), en mémoire."""
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._hits = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def _prune(self, key, cutoff):
+        q = self._hits.get(key)
+        if q is None:
+            return None
+        while q and q[0] <= cutoff:
+            q.popleft()
+        if not q:
+            del self._hits[key]
+            return None
+        return q
+
+    def _sweep(self, cutoff):
+        for key in list(self._hits):
+            self._prune(key, cutoff)
+
+    def acquire(self, limits, now, window):
+        """
+        Enregistre la tentative si aucune clé n'a atteint sa limite ({clé: limite}).
+        Retourne 0 si enregistrée, sinon les secondes avant un nouvel essai.
+        """
+        cutoff = now - window
+        with self._lock:
+            self._calls += 1
+            if self._calls % self.SWEEP_EVERY == 0:
+                self._sweep(cutoff)
+            retry_after = 0
+            for key, limit in limits.items():
+                q = self._prune(key, cutoff)
+                if q and len(q) >= limit:
+                    retry_after = max(retry_after, int(q[0] + window - now) + 1)
+            if not retry_after:
+                for key in limits:
+                    self._hits.setdefault(key, deque()).append(now)
+            return retry_after
+
+    def clear(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class SQLiteWindow:
+    """Même API que MemoryWindow, stockée dans une base SQLite partagée."""
+    PURGE_EVERY = 100
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._calls = 0
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS login_attempt (key TEXT NOT NULL, ts REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_login_attempt_key_ts ON login_attempt (key, ts)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        # isolation_level=None : transactions explicites (BEGIN IMMEDIATE dans acquire)
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def acquire(self, limits, now, window):
+        """Comme MemoryWindow.acquire ; le verrou d'écriture est pris avant le comptage."""
+        cutoff = now - window
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            retry_after = 0
+            for key, limit in limits.items():
+                n, oldest = conn.execute(
+                    "SELECT COUNT(*), MIN(ts) FROM login_attempt WHERE key = ? AND ts > ?", (key, cutoff)
+                ).fetchone()
+                if n >= limit:
+                    retry_after = max(retry_after, int(oldest + window - now) + 1)
+            if not retry_after:
+                conn.executemany("INSERT INTO login_attempt (key, ts) VALUES (?, ?)", [(k, now) for k in limits])
+                self._calls += 1
+                if self._calls % self.PURGE_EVERY == 0:
+                    # purge des tentatives trop anciennes (une heure suffit pour toutes les fenêtres)
+                    conn.execute("DELETE FROM login_attempt WHERE ts < ?", (now - 3600,))
+            conn.execute("COMMIT")
+            return retry_after
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def clear(self, key):
+        conn = self._connect()
+        conn.execute("DELETE FROM login_attempt WHERE key = ?", (key,))
+        conn.commit()
+        conn.close()
+
+
+class LoginThrottle:
+    def __init__(self, store=None, max_per_email=5, max_per_ip=30, window=300, clock=time.time):
+        self.store = store or MemoryWindow()
+        self.max_per_email = max_per_email
+        self.max_per_ip = max_per_ip
+        self.window = window
+        self._clock = clock
+
+    @classmethod
+    def from_config(cls, config):
+        db = config.get("LOGIN_THROTTLE_DB")
+        return cls(
+            store=SQLiteWindow(db) if db else MemoryWindow(),
+            max_per_email=int(config.get("LOGIN_THROTTLE_EMAIL_LIMIT", 5)),
+            max_per_ip=int(config.get("LOGIN_THROTTLE_IP_LIMIT", 30)),
+            window=float(config.get("LOGIN_THROTTLE_WINDOW", 300)),
+        )
+
+    def _keys(self, email, ip):
+        keys = {}
+        if email:
+            keys["email:" + email.strip().lower()] = self.max_per_email
+        if ip:
+            keys["ip:" + ip] = self.max_per_ip
+        return keys
+
+    def attempt(self, email, ip):
+        """
+        Enregistre une tentative. Retourne (autorisée, secondes_avant_nouvel_essai).
+        Une tentative refusée n'est pas comptée (elle ne prolonge pas le blocage).
+        """
+        retry_after = self.store.acquire(self._keys(email, ip), self._clock(), self.window)
+        if retry_after:
+            metrics.incr("login_throttled_total")
+            return False, retry_after
+        metrics.incr("login_attempts_total")
+        return True, 0
+
+    def reset(self, email):
+        """Après une connexion réussie, on efface le compteur de l'email."""
+        if email:
+            self.store.clear("email:" + email.strip().lower())
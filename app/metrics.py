@@ -0,0 +1,30 @@
+"""
+Compteurs de métriques du processus.
+
+Usage : metrics.incr("login_throttled_total")
+Les valeurs sont exposées en texte sur /metrics (voir routes/metrics_routes.py).
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+
+
+def incr(name: str, value: int = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def get(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
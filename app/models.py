@@ -39,6 +39,9 @@ class Product(db.Model):
     stock_qty = db.Column(db.Integer)  # Quantité en stock
     category = db.Column(db.String(50))  # Catégorie (ex : Kabyle, Caftan…)
     active = db.Column(db.Boolean, default=True)  # Produit actif ou non
+    # Version de la ligne : posée par des triggers SQLite à l'insertion et à chaque
+    # modification, depuis un compteur global qui ne descend jamais (voir app/product_versions.py)
+    version = db.Column(db.Integer, nullable=False, server_default=text("1"))
 
     # Relations avec d'autres tables
     order_items = db.relationship("OrderItem", back_populates="product", lazy="select")
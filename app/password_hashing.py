@@ -0,0 +1,176 @@
+"""
+Hachage des mots de passe hors du thread de requête.
+
+Les fonctions de werkzeug (scrypt / pbkdf2) sont coûteuses en CPU et gardent le GIL
+pendant plusieurs dizaines de millisecondes : une rafale de connexions bloquait
+toutes les autres requêtes du worker. Le calcul est donc délégué à un pool de
+processus borné ; le thread de requête attend simplement le résultat.
+
+Configuration (variables d'environnement) :
+- PASSWORD_HASH_METHOD  : méthode werkzeug (ex: "scrypt:32768:8:1", "pbkdf2:sha256:600000"),
+                          à choisir avec scripts/calibrate_password_hash.py
+- PASSWORD_HASH_WORKERS : nombre de processus du pool (0 = calcul dans le thread courant)
+"""
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+# ancien format de app.domain.PasswordHasher : sha256 hexadécimal, sans sel
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def current_method() -> str:
+    return os.environ.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+
+
+def is_legacy_hash(stored_hash: str) -> bool:
+    return bool(stored_hash) and bool(_LEGACY_SHA256.match(stored_hash))
+
+
+def hash_method(stored_hash: str) -> str:
+    """Retourne la partie "méthode" d'un hash werkzeug (avant le premier '$')."""
+    return (stored_hash or "").split("$", 1)[0]
+
+
+def normalize_method(method: str) -> str:
+    """
+    Forme complète d'une méthode werkzeug, telle qu'écrite dans les hash :
+    "scrypt" -> "scrypt:32768:8:1", "pbkdf2" / "pbkdf2:sha256" -> "pbkdf2:sha256:<itérations par défaut>".
+    """
+    name, *args = (method or "").split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2" and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+def needs_rehash(stored_hash: str, method: Optional[str] = None) -> bool:
+    """True si le hash stocké doit être recalculé avec les paramètres courants."""
+    if not stored_hash:
+        return False
+    if is_legacy_hash(stored_hash):
+        return True
+    return normalize_method(hash_method(stored_hash)) != normalize_method(method or current_method())
+
+
+# fonctions exécutées dans les processus du pool (doivent rester au niveau module)
+def _hash_job(password: str, method: str) -> str:
+    return generate_password_hash(password, method=method)
+
+
+def _check_job(stored_hash: str, password: str) -> bool:
+    return check_password_hash(stored_hash, password)
+
+
+def _check_legacy(stored_hash: str, password: str) -> bool:
+    digest = hashlib.sha256(password.encode("utf-8")).hexdigest()
+    return hmac.compare_digest(digest, stored_hash)
+
+
+class PasswordHashPool:
+    """
+    Pool de processus borné pour hash/vérification.
+    - max_workers=0 : pas de pool, calcul direct (tests, scripts)
+    - max_pending   : nombre maximal de calculs en vol ; au-delà les requêtes attendent
+    Le pool est créé au premier usage et recréé après un fork (workers pré-forkés).
+    """
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None, method: Optional[str] = None):
+        if max_workers is None:
+            max_workers = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+        self.max_workers = max(0, max_workers)
+        self.method = method
+        self._slots = threading.BoundedSemaphore(max_pending or max(1, self.max_workers) * 4)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.max_workers:
+            return fn(*args)
+        with self._slots:
+            return self._get_executor().submit(fn, *args).result()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_job, password, self.method or current_method())
+
+    def verify(self, stored_hash: str, password: str) -> bool:
+        if not stored_hash or password is None:
+            return False
+        if is_legacy_hash(stored_hash):
+            # sha256 simple : assez rapide pour rester dans le thread courant
+            return _check_legacy(stored_hash, password)
+        return self._run(_check_job, stored_hash, password)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return needs_rehash(stored_hash, self.method)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_pool: Optional[PasswordHashPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool() -> PasswordHashPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PasswordHashPool()
+        return _pool
+
+
+def _time_method(method: str, samples: int) -> float:
+    best = None
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        generate_password_hash("calibration-password", method=method)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1000
+
+
+def calibrate(target_ms: float = 250.0, algorithm: str = "scrypt", samples: int = 3) -> str:
+    """
+    Choisit le coût le plus élevé dont le temps de hachage reste sous target_ms
+    sur la machine courante. Retourne la méthode werkzeug correspondante.
+    """
+    if algorithm == "scrypt":
+        n = 2 ** 12
+        best = f"scrypt:{n}:8:1"
+        # scrypt: n doit être une puissance de 2 ; on double tant qu'on reste sous la cible
+        while n <= 2 ** 20:
+            method = f"scrypt:{n}:8:1"
+            if _time_method(method, samples) > target_ms:
+                break
+            best = method
+            n *= 2
+        return best
+    if algorithm == "pbkdf2":
+        base = 50_000
+        elapsed = _time_method(f"pbkdf2:sha256:{base}", samples)
+        # le coût de pbkdf2 est linéaire en nombre d'itérations
+        iterations = int(base * target_ms / max(elapsed, 0.001))
+        iterations = max(base, iterations // 10_000 * 10_000)
+        return f"pbkdf2:sha256:{iterations}"
+    raise ValueError(f"Algorithme inconnu: {algorithm}")
@@ -0,0 +1,27 @@
+"""
+Passerelle de paiement locale, en attendant un vrai prestataire.
+
+Mêmes réponses que le mock du domaine (refus si la carte finit par 0000), avec une
+latence simulée (PAYMENT_GATEWAY_LATENCY secondes, défaut 0) pour reproduire un
+appel réseau : charge_card() bloque le thread, charge_card_async() n'attend que
+sur la boucle (vue async, app/aio.py).
+"""
+import asyncio
+import time
+
+from app.domain import PaymentGateway
+
+
+class StandInGateway(PaymentGateway):
+    def __init__(self, latency=0.0):
+        self.latency = float(latency)
+
+    def charge_card(self, card_number, exp_month, exp_year, cvc, amount_cents, idempotency_key):
+        if self.latency:
+            time.sleep(self.latency)
+        return super().charge_card(card_number, exp_month, exp_year, cvc, amount_cents, idempotency_key)
+
+    async def charge_card_async(self, card_number, exp_month, exp_year, cvc, amount_cents, idempotency_key):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return super().charge_card(card_number, exp_month, exp_year, cvc, amount_cents, idempotency_key)
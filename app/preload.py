@@ -0,0 +1,186 @@
+"""
+Mode préchargement pour serveurs pré-forkés (gunicorn --preload, scripts/...).
+
+Avec PRELOAD activé (config ou variable d'environnement PRELOAD=1), create_app :
+- construit une fois, dans le processus maître, un instantané compact du catalogue
+  (CatalogueSnapshot) et les autres structures lues par toutes les requêtes (templates
+  compilés, table de routage)
+- appelle gc.collect() puis gc.freeze() : les objets existants passent dans la
+  génération permanente, le ramasse-miettes des workers ne les parcourt plus (un
+  parcours écrit dans chaque en-tête d'objet et dé-partagerait les pages)
+
+L'instantané évite les millions de petits objets (instances ORM, dict, str) dont le
+compteur de références serait modifié à chaque lecture : les textes sont concaténés
+dans un seul bloc bytes et les nombres sont dans des array ; les objets
+ProductView ne sont créés qu'à la lecture, dans le worker.
+
+L'instantané garde la génération du catalogue à laquelle il a été lu
+(catalogue_version(), app/product_versions.py, la même lecture que pour les ETag).
+À chaque lecture, si la génération a changé, seules les lignes de version plus
+récente sont relues (les versions viennent du même compteur), plus le nombre de
+lignes :
+- prix, stock ou statut actif seulement : modifiés en place dans les array (seules
+  ces pages sont copiées dans le worker)
+- produit ajouté ou supprimé, nom / description / catégorie modifiés : l'instantané
+  est reconstruit dans le worker (il n'est alors plus partagé avec le maître)
+Les écritures d'un autre worker ou hors ORM sont donc vues dès la requête suivante.
+"""
+from array import array
+from collections import namedtuple
+import gc
+import os
+import threading
+import time
+
+from flask import current_app
+
+ProductView = namedtuple(
+    "ProductView", "id name description price_cents stock_qty category active"
+)
+
+_TEXT_FIELDS = 4  # id, name, description, category
+
+
+class CatalogueSnapshot:
+    __slots__ = ("_text", "_offsets", "_price", "_stock", "_active", "_index",
+                 "_categories", "built_at", "_lock", "catalogue_version")
+
+    def __init__(self, rows, catalogue_version=None):
+        """
+        rows : itérable de (id, name, description, price_cents, stock_qty, category, active
+        [, version]) ; catalogue_version : génération du catalogue au moment de la lecture.
+        """
+        chunks = []
+        offsets = array("I", [0])
+        price, stock, active = array("q"), array("q"), bytearray()
+        index, categories = {}, {}
+        pos = 0
+        for n, (pid, name, description, price_cents, stock_qty, category, is_active, *version) in enumerate(rows):
+            for value in (pid, name, description or "", category or ""):
+                data = value.encode("utf-8")
+                chunks.append(data)
+                pos += len(data)
+                offsets.append(pos)
+            price.append(int(price_cents or 0))
+            stock.append(int(stock_qty or 0))
+            active.append(1 if is_active is None or is_active else 0)
+            index[pid] = n
+            categories.setdefault(category or "", array("I")).append(n)
+        self._text = b"".join(chunks)
+        self._offsets = offsets
+        self._price = price
+        self._stock = stock
+        self._active = active
+        self._index = index
+        self._categories = categories
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.catalogue_version = catalogue_version
+
+    @classmethod
+    def from_db(cls):
+        from app.models import Product, db
+        from app.product_versions import catalogue_version
+        version = catalogue_version()  # lue avant les lignes : au pire relue pour rien
+        return cls(db.session.execute(_select_rows().order_by(Product.id)), version)
+
+    def _field(self, n, k):
+        i = n * _TEXT_FIELDS + k
+        return self._text[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def _view(self, n) -> ProductView:
+        return ProductView(
+            self._field(n, 0), self._field(n, 1), self._field(n, 2),
+            self._price[n], self._stock[n], self._field(n, 3), bool(self._active[n]),
+        )
+
+    def __len__(self):
+        return len(self._price)
+
+    def __iter__(self):
+        return (self._view(n) for n in range(len(self)))
+
+    def get(self, product_id):
+        n = self._index.get(product_id)
+        return None if n is None else self._view(n)
+
+    def in_category(self, category):
+        return [self._view(n) for n in self._categories.get(category, ())]
+
+    def update(self, rows):
+        """
+        rows : itérable de lignes complètes (comme __init__, avec version). Modifie prix,
+        stock et actif en place ; False (rien modifié) si une ligne est inconnue
+        ou change de texte : l'instantané doit alors être reconstruit.
+        """
+        rows = list(rows)
+        with self._lock:
+            for pid, name, description, price_cents, stock_qty, category, is_active, version in rows:
+                n = self._index.get(pid)
+                if n is None or (self._field(n, 1), self._field(n, 2), self._field(n, 3)) != (
+                        name, description or "", category or ""):
+                    return False
+            for pid, name, description, price_cents, stock_qty, category, is_active, version in rows:
+                n = self._index[pid]
+                self._price[n] = int(price_cents or 0)
+                self._stock[n] = int(stock_qty or 0)
+                self._active[n] = 1 if is_active is None or is_active else 0
+        return True
+
+
+def _select_rows():
+    from app.models import Product, db
+    return db.select(Product.id, Product.name, Product.description, Product.price_cents,
+                     Product.stock_qty, Product.category, Product.active, Product.version)
+
+
+def enabled(app) -> bool:
+    value = app.config.get("PRELOAD", os.environ.get("PRELOAD", ""))
+    return str(value).lower() in {"1", "true", "yes", "on"}
+
+
+def init_app(app):
+    """À appeler en fin de create_app : construit les structures partagées puis fige le GC."""
+    if not enabled(app):
+        return None
+    with app.app_context():
+        snapshot = CatalogueSnapshot.from_db()
+    app.extensions["catalogue_snapshot"] = snapshot
+
+    # templates compilés une seule fois (cache Jinja du maître, hérité par les workers)
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except Exception:
+            pass
+    # table de routage compilée
+    app.url_map.update()
+
+    gc.collect()
+    gc.freeze()
+    return snapshot
+
+
+def get_snapshot():
+    """
+    Instantané du catalogue (None hors mode préchargement), remis à jour si la
+    génération du catalogue a changé depuis sa construction ou sa dernière mise à jour.
+    """
+    snapshot = current_app.extensions.get("catalogue_snapshot")
+    if snapshot is None:
+        return None
+    from app.product_versions import catalogue_version
+    current = catalogue_version()
+    if current == snapshot.catalogue_version:
+        return snapshot
+    from app.models import Product, db
+    # versions posées depuis la génération de l'instantané (index ix_product_version)
+    rows = db.session.execute(_select_rows().where(Product.version > snapshot.catalogue_version)).all()
+    count = db.session.execute(db.select(db.func.count()).select_from(Product)).scalar()
+    # produit inconnu (ajout) ou texte modifié : update() refuse ; sans ajout, un
+    # nombre de lignes différent signale une suppression
+    if not snapshot.update(rows) or count != len(snapshot):
+        snapshot = CatalogueSnapshot(db.session.execute(_select_rows().order_by(Product.id)), current)
+        current_app.extensions["catalogue_snapshot"] = snapshot
+    snapshot.catalogue_version = current
+    return snapshot
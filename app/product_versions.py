@@ -0,0 +1,332 @@
+"""
+Version des lignes produit et revalidation des paniers.
+
+product.version vient d'un compteur global (catalogue_meta.generation, une seule
+ligne) que des triggers SQLite incrémentent à chaque insertion et à chaque changement
+de prix, de stock, de statut actif ou de ce qu'affichent les pages (nom, description,
+catégorie), quel que soit l'écrivain (ORM, sqlite3 brut, scripts). Le compteur ne
+descend jamais : un produit supprimé puis recréé avec le même id reçoit une version
+qu'il n'a jamais eue, (id, version) désigne donc toujours le même contenu. Une
+suppression incrémente aussi le compteur : c'est la génération du catalogue.
+Chaque incrément est noté dans catalogue_log (génération, id, catégorie d'avant,
+NULL pour un ajout) ; seules les LOG_RETENTION dernières générations sont gardées.
+changes_since() en tire les produits et catégories touchés depuis une génération,
+suppressions et recréations comprises (purge du proxy, app/proxy_cache.py).
+Schéma (tables catalogue_meta et catalogue_log, index, triggers) créé :
+- avec la table (événement after_create, donc par db.create_all())
+- pour une base existante : python scripts/add_product_version_column.py [base.db]
+  (ensure_schema : colonne, tables, triggers remplacés s'ils datent d'une version
+  antérieure). create_app ne modifie pas le schéma : il vérifie seulement
+  (check_schema) et journalise ce qui manque.
+
+Les mêmes versions valident ETag (app/http_cache.py) et entrées du cache : chaque
+worker les lit dans la base, elles ne dépendent pas du processus qui a écrit.
+catalogue_version() est la génération (toute la table), product_version() la
+version d'une fiche ; les deux sont lues une fois par requête, ou dans le catalogue
+partagé s'il est configuré (SHARED_CATALOGUE_PATH, app/shared_catalogue.py). Les
+lignes modifiées depuis une génération g sont celles de version > g (index
+ix_product_version).
+
+Panier : à côté de session["cart"] ({product_id: quantité}), session["cart_lines"]
+ne garde que {product_id: version} (le cookie reste petit). Prix, stock et nom sont
+gardés par processus, par (product_id, version) : revalidate_lines() ne fait qu'une
+requête légère `SELECT id, version` pour toutes les lignes, puis ne relit les
+colonnes complètes que des produits dont la version n'est pas encore connue.
+"""
+from collections import OrderedDict
+import threading
+import weakref
+
+from flask import has_request_context, request
+from sqlalchemy import event, text
+
+from app.models import Product, db
+from app.shared_catalogue import get_shared_catalogue
+
+# compteur global ; amorcé au-dessus de toutes les versions existantes (migration)
+META_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS catalogue_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO catalogue_meta (id, generation) SELECT 1, COALESCE(MAX(version), 0) FROM product",
+    "CREATE INDEX IF NOT EXISTS ix_product_version ON product (version)",
+    """
+    CREATE TABLE IF NOT EXISTS catalogue_log (
+        generation INTEGER PRIMARY KEY,
+        product_id TEXT NOT NULL,
+        category TEXT
+    )
+    """,
+)
+
+LOG_RETENTION = 10000
+
+
+def _bump(product_id, category):
+    return f"""
+    UPDATE catalogue_meta SET generation = generation + 1 WHERE id = 1;
+    INSERT INTO catalogue_log (generation, product_id, category)
+        SELECT generation, {product_id}, {category} FROM catalogue_meta WHERE id = 1;
+    DELETE FROM catalogue_log
+        WHERE generation <= (SELECT generation FROM catalogue_meta WHERE id = 1) - {LOG_RETENTION};"""
+
+
+_SET_VERSION = """
+    UPDATE product SET version = (SELECT generation FROM catalogue_meta WHERE id = 1) WHERE rowid = NEW.rowid;"""
+
+TRIGGERS = {
+    "product_version_insert": f"""
+CREATE TRIGGER IF NOT EXISTS product_version_insert
+AFTER INSERT ON product
+BEGIN{_bump("NEW.id", "NULL")}{_SET_VERSION}
+END
+""",
+    # la colonne version n'est pas listée : sa mise à jour ne redéclenche rien
+    "product_version_bump": f"""
+CREATE TRIGGER IF NOT EXISTS product_version_bump
+AFTER UPDATE OF price_cents, stock_qty, active, name, description, category ON product
+WHEN OLD.price_cents IS NOT NEW.price_cents
+  OR OLD.stock_qty IS NOT NEW.stock_qty
+  OR OLD.active IS NOT NEW.active
+  OR OLD.name IS NOT NEW.name
+  OR OLD.description IS NOT NEW.description
+  OR OLD.category IS NOT NEW.category
+BEGIN{_bump("NEW.id", "COALESCE(OLD.category, '')")}{_SET_VERSION}
+END
+""",
+    "product_generation_delete": f"""
+CREATE TRIGGER IF NOT EXISTS product_generation_delete
+AFTER DELETE ON product
+BEGIN{_bump("OLD.id", "COALESCE(OLD.category, '')")}
+END
+""",
+}
+
+
+def _normalized(sql):
+    # texte gardé par sqlite_master (sans IF NOT EXISTS), espaces normalisés
+    return " ".join(sql.replace("IF NOT EXISTS ", "").split())
+
+
+def _create(connection):
+    for statement in META_SQL:
+        connection.execute(text(statement))
+    for name, sql in TRIGGERS.items():
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        connection.execute(text(sql))
+
+
+@event.listens_for(Product.__table__, "after_create")
+def _create_trigger(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        _create(connection)
+
+
+def check_schema(connection):
+    """Liste de ce qui manque à une table product existante (colonne, table, trigger absent ou ancien)."""
+    if connection.dialect.name != "sqlite":
+        return []
+    columns = [r[1] for r in connection.execute(text("PRAGMA table_info(product)"))]
+    if not columns:
+        return []  # table pas encore créée : after_create s'en chargera
+    missing = []
+    if "version" not in columns:
+        missing.append("colonne version")
+    found = dict(connection.execute(text(
+        "SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'index', 'trigger') "
+        "AND tbl_name IN ('product', 'catalogue_meta', 'catalogue_log')"
+    )).all())
+    if "catalogue_meta" not in found:
+        missing.append("table catalogue_meta")
+    if "catalogue_log" not in found:
+        missing.append("table catalogue_log")
+    if "ix_product_version" not in found:
+        missing.append("index ix_product_version")
+    for name, sql in TRIGGERS.items():
+        if name not in found:
+            missing.append(f"trigger {name}")
+        elif _normalized(found[name]) != _normalized(sql):
+            missing.append(f"trigger {name} à jour")
+    return missing
+
+
+def ensure_schema(connection):
+    """Ajoute colonne, compteur et triggers à une table product existante (sans effet sinon)."""
+    if connection.dialect.name != "sqlite":
+        return False
+    columns = [r[1] for r in connection.execute(text("PRAGMA table_info(product)"))]
+    if not columns:
+        return False  # table pas encore créée : after_create s'en chargera
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE product ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    _create(connection)
+    return True
+
+
+def _forget_versions(session):
+    if has_request_context():
+        request.environ.pop("elegance.product_versions", None)
+
+
+_listening = False
+
+
+def init_app(app):
+    """Vérifie le schéma (lecture seule) ; la migration est un geste explicite."""
+    global _listening
+    if not _listening:
+        from sqlalchemy.orm import Session
+        # une vue qui modifie un produit relit ensuite les versions à jour
+        event.listen(Session, "after_commit", _forget_versions)
+        _listening = True
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                missing = check_schema(connection)
+        except Exception:
+            app.logger.exception("product.version : vérification du schéma impossible")
+            return False
+    if missing:
+        app.logger.error(
+            "product.version : %s absent(s) de la base ; lancer python scripts/add_product_version_column.py",
+            ", ".join(missing),
+        )
+        return False
+    return True
+
+
+# ----- revalidation des lignes de panier -----
+
+def _in_chunks(ids, size=500):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def current_versions(product_ids) -> dict:
+    """{id: version} en une requête (par tranche de 500 ids)."""
+    versions = {}
+    for chunk in _in_chunks(product_ids):
+        versions.update(db.session.execute(
+            db.select(Product.id, Product.version).where(Product.id.in_(chunk))
+        ).all())
+    return versions
+
+
+def _per_request(key, load):
+    if not has_request_context():
+        return load()
+    # environ plutôt que g : g est partagé si un contexte d'application était déjà actif
+    versions = request.environ.setdefault("elegance.product_versions", {})
+    if key not in versions:
+        versions[key] = load()
+    return versions[key]
+
+
+def catalogue_version() -> int:
+    """Génération du catalogue : augmente à chaque insertion, modification ou suppression."""
+    shared = get_shared_catalogue()
+    if shared is not None:
+        return shared.catalogue_generation  # lecture en mémoire, sans requête
+    return _per_request("catalogue", lambda: db.session.execute(
+        text("SELECT generation FROM catalogue_meta WHERE id = 1")
+    ).scalar() or 0)
+
+
+def product_version(product_id):
+    """Version d'un produit, None s'il n'existe pas."""
+    shared = get_shared_catalogue()
+    if shared is not None:
+        entry = shared.get(str(product_id))
+        return entry.version if entry is not None and entry.version else None
+    return _per_request(f"product:{product_id}", lambda: current_versions([product_id]).get(product_id))
+
+
+def changes_since(connection, generation):
+    """
+    (génération courante, [(id, catégorie d'avant, catégorie actuelle)]) des produits
+    ajoutés, modifiés ou supprimés après `generation` (catégorie actuelle None si le
+    produit n'existe plus). Liste None si catalogue_log ne remonte plus aussi loin.
+    """
+    current = connection.execute(text("SELECT generation FROM catalogue_meta WHERE id = 1")).scalar() or 0
+    if current <= generation:
+        return current, []
+    oldest = connection.execute(text("SELECT MIN(generation) FROM catalogue_log")).scalar()
+    if oldest is None or oldest > generation + 1:
+        return current, None
+    rows = connection.execute(text(
+        "SELECT l.product_id, l.category, CASE WHEN p.id IS NULL THEN NULL ELSE COALESCE(p.category, '') END "
+        "FROM catalogue_log l "
+        "LEFT JOIN product p ON p.id = l.product_id "
+        "WHERE l.generation > :generation AND l.generation <= :current ORDER BY l.generation"
+    ), {"generation": generation, "current": current}).all()
+    return current, [tuple(row) for row in rows]
+
+
+# (product_id, version) -> [version, prix, stock, nom], par moteur (une base par application)
+LINE_CACHE_SIZE = 10_000
+_line_caches = weakref.WeakKeyDictionary()
+_line_lock = threading.Lock()
+
+
+def _line_cache():
+    with _line_lock:
+        cache = _line_caches.get(db.engine)
+        if cache is None:
+            cache = _line_caches[db.engine] = OrderedDict()
+        return cache
+
+
+def revalidate_lines(cart: dict, known: dict):
+    """
+    cart : {product_id: quantité} ; known : {product_id: version} vus la dernière fois.
+    Retourne ({product_id: [version, prix, stock, nom]}, ids dont la version a changé).
+    Seuls les produits absents du cache du processus à leur version courante sont relus.
+    Les produits disparus n'ont pas de ligne.
+    """
+    ids = [str(pid) for pid in cart]
+    if not ids:
+        return {}, []
+    versions = current_versions(ids)
+    cache = _line_cache()
+    fresh = {}
+    stale = []
+    missing = []
+    with _line_lock:
+        for pid in ids:
+            version = versions.get(pid)
+            if version is None:
+                continue
+            if known.get(pid) != version:
+                stale.append(pid)
+            line = cache.get((pid, version))
+            if line is None:
+                missing.append(pid)
+            else:
+                cache.move_to_end((pid, version))
+                fresh[pid] = line
+    for chunk in _in_chunks(missing):
+        rows = db.session.execute(
+            db.select(Product.id, Product.version, Product.price_cents, Product.stock_qty, Product.name)
+            .where(Product.id.in_(chunk))
+        ).all()
+        with _line_lock:
+            for pid, version, price_cents, stock_qty, name in rows:
+                line = fresh[pid] = [version, int(price_cents or 0), int(stock_qty or 0), name]
+                cache[(pid, version)] = line
+            while len(cache) > LINE_CACHE_SIZE:
+                cache.popitem(last=False)
+    return fresh, stale
+
+
+def session_lines(session) -> dict:
+    """Lignes du panier de session revalidées ; la session n'est réécrite que si les versions ont changé."""
+    cart = session.get("cart", {}) or {}
+    known = session.get("cart_lines", {}) or {}
+    fresh, stale = revalidate_lines(cart, known)
+    if stale or fresh.keys() != known.keys():
+        session["cart_lines"] = {pid: line[0] for pid, line in fresh.items()}
+    return fresh
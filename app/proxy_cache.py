@@ -0,0 +1,289 @@
+"""
+En-têtes pour un proxy cache local (Varnish, nginx) et purge par clés de substitution.
+
+Politiques par blueprint (CACHE_POLICIES, fusionné avec DEFAULT_POLICIES) : valeur
+de Cache-Control appliquée aux réponses GET/HEAD anonymes des routes du blueprint.
+Les navigateurs revalident (max-age=0, ETag de app/http_cache.py), le proxy garde la
+page s-maxage secondes ou jusqu'à la purge. Ces pages ne contiennent rien de
+personnel (app/fragments.py) ; seule une vue qui pose elle-même Cache-Control
+private / no-store garde son en-tête. Les blueprints sans politique reçoivent
+DEFAULT_PRIVATE si la vue n'a rien précisé (panier, commandes, compte ne doivent
+jamais être partagés).
+
+Clés de substitution : les vues déclarent les données affichées avec
+surrogate_keys("product-<id>", "category-<nom>", ...), envoyées dans l'en-tête
+Surrogate-Key. Chaque commit SQLAlchemy qui modifie un produit envoie en arrière-plan
+une requête PURGE à CACHE_PURGE_URL avec les clés concernées dans l'en-tête
+CACHE_PURGE_HEADER (défaut Surrogate-Key). Les écrivains hors ORM (sqlite3 brut,
+scripts, autre application) ne passent pas par ces événements : toutes les
+CACHE_PURGE_POLL secondes (défaut 5, 0 pour désactiver), un seul processus compare
+la génération du catalogue (app/product_versions.py) à celle du relevé précédent
+et, si elle a bougé, purge en une requête les clés notées depuis dans
+catalogue_log : produits ajoutés, modifiés, supprimés ou recréés, ancienne et
+nouvelle catégorie. Ce processus est celui qui tient le verrou flock de
+CACHE_PURGE_LOCK (défaut : chemin de la base + ".purge-lock") ; les autres workers
+essaient de le prendre à chaque intervalle et le reprennent si son détenteur
+s'arrête, à partir de la génération qu'il a notée dans le fichier. Si le journal ne
+remonte plus assez loin, toutes les clés des produits existants sont purgées. Une
+écriture faite par l'ORM est purgée par son worker puis une seconde fois par le
+relevé. Exemple Varnish (vmod xkey) :
+
+    if (req.method == "PURGE") {
+        if (client.ip !~ purgers) { return (synth(403)); }
+        set req.http.n-gone = xkey.purge(req.http.Surrogate-Key);
+        return (synth(200, req.http.n-gone));
+    }
+    (et dans vcl_backend_response : set beresp.http.xkey = beresp.http.Surrogate-Key;)
+"""
+import fcntl
+import os
+import queue
+import re
+import threading
+
+from flask import current_app, g, has_app_context, request, session
+
+from app import metrics
+from app.fragments import shared_page
+
+DEFAULT_POLICIES = {
+    "catalogue": "public, max-age=0, s-maxage=300, stale-while-revalidate=30",
+    "home": "public, max-age=0, s-maxage=300",
+    # en-têtes posés par les routes elles-mêmes (fichiers immutables)
+    "images": None,
+    "assets": None,
+    "metrics": "private, no-store",
+}
+DEFAULT_PRIVATE = "private, no-store"
+
+_KEY_RE = re.compile(r"[^\w.-]+")
+
+
+def key(kind, value) -> str:
+    """Clé de substitution, ex. key("category", "Robes kabyles") -> "category-Robes_kabyles"."""
+    return f"{kind}-{_KEY_RE.sub('_', str(value))}"
+
+
+def product_keys(product) -> list:
+    return [key("product", product.id), key("category", product.category or "")]
+
+
+def surrogate_keys(*keys):
+    """Déclare les clés de la réponse en cours."""
+    g.setdefault("surrogate_keys", set()).update(keys)
+
+
+def _personalized(response) -> bool:
+    cc = response.cache_control
+    if cc.private or cc.no_store:
+        return True
+    return not shared_page() and bool(session.get("user_id") or session.get("_flashes"))
+
+
+def _apply_policy(response):
+    keys = g.pop("surrogate_keys", None)
+    if keys:
+        response.headers["Surrogate-Key"] = " ".join(sorted(keys))
+    if request.blueprint is None or request.method not in ("GET", "HEAD"):
+        return response
+    policies = current_app.extensions["cache_policies"]
+    if request.blueprint not in policies:
+        if "Cache-Control" not in response.headers:
+            response.headers["Cache-Control"] = DEFAULT_PRIVATE
+        return response
+    policy = policies[request.blueprint]
+    if policy and response.status_code in (200, 304) and not _personalized(response):
+        response.headers["Cache-Control"] = policy
+    return response
+
+
+# ----- purge -----
+
+class PurgeNotifier:
+    """
+    Envoie les purges depuis un thread de fond : un commit n'attend jamais le proxy.
+    Les clés accumulées pendant un envoi partent ensemble dans la requête suivante.
+    Avec app, poll et lock_path, le même thread relève toutes les poll secondes les
+    produits changés depuis le relevé précédent (changed_keys()), dans le seul
+    processus qui tient le verrou de lock_path.
+    """
+    def __init__(self, url, header="Surrogate-Key", timeout=2.0, app=None, poll=0.0, lock_path=None):
+        self.url = url
+        self.header = header
+        self.timeout = timeout
+        self.app = app
+        self.poll = poll
+        self.lock_path = lock_path
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._lock_fd = None
+        self._lock_pid = None
+        self._generation = None  # génération du catalogue au dernier relevé
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            # thread absent ou hérité d'un fork (il n'existe pas dans le fils)
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name="cache-purge", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def purge(self, keys):
+        keys = set(keys)
+        if keys:
+            self._ensure_thread()
+            self._queue.put(keys)
+
+    def _owns_poll(self):
+        """Vrai si ce processus tient le verrou du relevé (pris au passage s'il est libre)."""
+        if self._lock_pid == os.getpid():
+            return True
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # copie héritée d'un fork : le verrou reste au parent
+            self._lock_fd = None
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd, self._lock_pid = fd, os.getpid()
+        # reprise là où le détenteur précédent s'est arrêté
+        saved = os.pread(fd, 32, 0).strip()
+        self._generation = int(saved) if saved.isdigit() else None
+        return True
+
+    def changed_keys(self):
+        """Clés des produits changés depuis le relevé précédent ; vide hors du processus qui relève."""
+        from sqlalchemy import text
+        from app.models import db
+        from app.product_versions import changes_since
+        if not self._owns_poll():
+            return set()
+        keys = set()
+        with self.app.app_context(), db.engine.connect() as connection:
+            if self._generation is None:  # relevé de référence
+                current = connection.execute(text("SELECT generation FROM catalogue_meta WHERE id = 1")).scalar() or 0
+            else:
+                current, changes = changes_since(connection, self._generation)
+                if changes is None:  # journal trop court : tout le catalogue
+                    changes = [(pid, None, category or "") for pid, category in
+                               connection.execute(text("SELECT id, category FROM product"))]
+                for pid, before, after in changes:
+                    keys.add(key("product", pid))
+                    keys.update(key("category", c) for c in (before, after) if c is not None)
+        if current != self._generation:
+            self._generation = current
+            os.ftruncate(self._lock_fd, 0)
+            os.pwrite(self._lock_fd, f"{current}\n".encode(), 0)
+        return keys
+
+    def _poll(self):
+        try:
+            return self.changed_keys()
+        except Exception:
+            metrics.incr("cache_purge_errors_total")
+            return set()
+
+    def _run(self):
+        q = self._queue
+        polling = self.app is not None and self.poll and self.lock_path
+        # premier relevé : référence, ou reprise d'un détenteur précédent du verrou
+        keys = self._poll() if polling else set()
+        while True:
+            if not keys:
+                try:
+                    keys = q.get(timeout=self.poll) if polling else q.get()
+                except queue.Empty:
+                    keys = self._poll()
+                    if not keys:
+                        continue
+            try:
+                while True:
+                    keys |= q.get_nowait()
+            except queue.Empty:
+                pass
+            self.send(keys)
+            keys = set()
+
+    def send(self, keys):
+        import urllib.request  # seulement si CACHE_PURGE_URL est configuré
+        req = urllib.request.Request(self.url, method="PURGE", headers={self.header: " ".join(sorted(keys))})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout):
+                pass
+            metrics.incr("cache_purge_requests_total")
+        except Exception:
+            metrics.incr("cache_purge_errors_total")
+
+
+def get_purge_notifier():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("purge_notifier")
+
+
+def _collect_keys(session, flush_context):
+    from sqlalchemy import inspect
+    from app.models import Product
+    keys = session.info.setdefault("purge_keys", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            keys.update(product_keys(obj))
+            # produit changé de catégorie : l'ancienne liste doit aussi être purgée
+            for old in inspect(obj).attrs.category.history.deleted:
+                keys.add(key("category", old or ""))
+
+
+def _send_keys(session):
+    keys = session.info.pop("purge_keys", None)
+    notifier = get_purge_notifier()
+    if keys and notifier is not None:
+        notifier.purge(keys)
+
+
+def _drop_keys(session):
+    session.info.pop("purge_keys", None)
+
+
+_listening = False
+
+
+def init_app(app):
+    global _listening
+    policies = dict(DEFAULT_POLICIES)
+    policies.update(app.config.get("CACHE_POLICIES") or {})
+    app.extensions["cache_policies"] = policies
+    app.after_request(_apply_policy)
+
+    url = app.config.get("CACHE_PURGE_URL") or os.environ.get("CACHE_PURGE_URL")
+    if not url:
+        return None
+    poll = float(app.config.get("CACHE_PURGE_POLL", 5))
+    lock_path = app.config.get("CACHE_PURGE_LOCK") or os.environ.get("CACHE_PURGE_LOCK")
+    if poll and not lock_path:
+        from app.models import db
+        with app.app_context():
+            database = db.engine.url.database
+        if database and database != ":memory:":
+            lock_path = f"{database}.purge-lock"
+    notifier = PurgeNotifier(url, app.config.get("CACHE_PURGE_HEADER", "Surrogate-Key"), app=app,
+                             poll=poll, lock_path=lock_path)
+    app.extensions["purge_notifier"] = notifier
+    if notifier.poll and notifier.lock_path:
+        # chaque worker démarre son thread à la première requête après le fork ;
+        # seul le détenteur du verrou relève la base, les autres attendent leur tour
+        app.before_request(notifier._ensure_thread)
+    if not _listening:
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        event.listen(Session, "after_flush", _collect_keys)
+        event.listen(Session, "after_commit", _send_keys)
+        event.listen(Session, "after_rollback", _drop_keys)
+        _listening = True
+    return notifier
@@ -0,0 +1,47 @@
+"""
+Choix du backend de stockage des repositories du domaine.
+
+  DOMAIN_BACKEND=memory   (défaut) dictionnaires en mémoire, persistance optionnelle
+                          par instantané + journal (DOMAIN_STORE_DIR, voir domain_store)
+  DOMAIN_BACKEND=sqlite   fichier SQLite partagé entre workers (DOMAIN_SQLITE_PATH,
+                          défaut instance/domain.db)
+
+Les deux backends respectent les protocoles UserRepo, ProductRepo, CartRepo... de
+app/domain.py ; comparer leurs performances : scripts/bench_repository_backends.py.
+"""
+from pathlib import Path
+import os
+
+from app import domain
+
+NAMES = ("users", "products", "carts", "orders", "invoices", "payments", "threads")
+
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parents[1] / "instance" / "domain.db"
+
+
+def create_repositories(backend=None, path=None) -> dict:
+    """Retourne {"users": ..., "products": ..., ...} pour le backend demandé."""
+    backend = backend or os.environ.get("DOMAIN_BACKEND", "memory")
+    if backend == "memory":
+        return {
+            "users": domain.UserRepository(),
+            "products": domain.ProductRepository(),
+            "carts": domain.CartRepository(),
+            "orders": domain.OrderRepository(),
+            "invoices": domain.InvoiceRepository(),
+            "payments": domain.PaymentRepository(),
+            "threads": domain.ThreadRepository(),
+        }
+    if backend == "sqlite":
+        from app import sqlite_repositories as sq
+        db = sq.SQLiteDomainDatabase(path or os.environ.get("DOMAIN_SQLITE_PATH") or DEFAULT_SQLITE_PATH)
+        return {
+            "users": sq.SQLiteUserRepository(db),
+            "products": sq.SQLiteProductRepository(db),
+            "carts": sq.SQLiteCartRepository(db),
+            "orders": sq.SQLiteOrderRepository(db),
+            "invoices": sq.SQLiteInvoiceRepository(db),
+            "payments": sq.SQLitePaymentRepository(db),
+            "threads": sq.SQLiteThreadRepository(db),
+        }
+    raise ValueError(f"DOMAIN_BACKEND inconnu: {backend}")
@@ -0,0 +1,41 @@
+"""
+Registre explicite des blueprints, enregistrés par create_app dans cet ordre.
+
+L'ordre compte quand deux blueprints déclarent la même URL (home et main pour "/") :
+le premier enregistré répond. Une nouvelle route : ajouter (module, variable) ici.
+"""
+from functools import lru_cache
+import importlib
+
+BLUEPRINTS = (
+    ("admin_routes", "admin_bp"),
+    ("asset_routes", "assets_bp"),
+    ("auth_routes", "auth_bp"),
+    ("cart_routes", "cart_bp"),
+    ("catalogue_routes", "catalogue_bp"),
+    ("checkout_routes", "checkout_bp"),
+    ("delivery_routes", "bp"),
+    ("fragment_routes", "fragments_bp"),
+    ("home_routes", "home_bp"),
+    ("image_routes", "images_bp"),
+    ("main_routes", "main_bp"),
+    ("metrics_routes", "metrics_bp"),
+    ("newsletter_routes", "newsletter_bp"),
+    ("order_routes", "order_bp"),
+    ("profile_routes", "profile_bp"),
+    ("wishlist_routes", "wishlist_bp"),
+)
+
+
+@lru_cache(maxsize=None)
+def blueprints() -> tuple:
+    """Blueprints du registre (modules importés une fois par processus)."""
+    return tuple(
+        getattr(importlib.import_module(f"{__name__}.{module}"), attr)
+        for module, attr in BLUEPRINTS
+    )
+
+
+def register_blueprints(app):
+    for bp in blueprints():
+        app.register_blueprint(bp)
@@ -6,7 +6,7 @@ Routes d'administration (interface minimale).
 """
 from functools import wraps
 from flask import Blueprint, render_template, session, redirect, url_for, request, flash, jsonify, abort, current_app
-from app.services_init import products
+from app.services_init import get_service
 from pathlib import Path
 import sqlite3, uuid
 from datetime import datetime
@@ -54,7 +54,7 @@ def delete_product():
     """Suppression d'un produit (POST)."""
     pid = request.form.get("product_id")
     try:
-        products.delete(pid)
+        get_service("products").delete(pid)
         flash("Produit supprimé.", "success")
     except Exception as e:
         flash("Erreur suppression: " + str(e), "danger")
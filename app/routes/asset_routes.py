@@ -0,0 +1,32 @@
+import mimetypes
+import os
+
+from flask import Blueprint, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+from app.assets import ENCODINGS
+
+assets_bp = Blueprint("assets", __name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@assets_bp.route("/assets/<path:filename>")
+def asset(filename):
+    """Ressource empreintée, en version précompressée si le client l'accepte."""
+    path = safe_join(current_app.config["ASSETS_DIR"], filename)
+    if path is None or filename == "manifest.json" or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    encoding = None
+    for suffix, name in ENCODINGS:
+        if request.accept_encodings[name] > 0 and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, name
+            break
+    response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
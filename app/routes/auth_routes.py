@@ -1,10 +1,13 @@
+import asyncio
+
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
 from app.auth_validators import validate_password_strength, validate_email_address
+from app.services.address_validator import validate_address_async
 
 auth_bp = Blueprint("auth", __name__)
 
 @auth_bp.route("/register", methods=["GET", "POST"])
-def register():
+async def register():
     services = current_app.extensions["services"]
     auth = services["auth"]
     if request.method == "POST":
@@ -25,8 +28,19 @@ def register():
         if not email or not password:
             flash("Email et mot de passe requis.", "danger")
             return redirect(url_for("auth.register"))
+
+        # validation d'adresse (Nominatim ou équivalent) si ADDRESS_VALIDATION_URL est configurée
+        validation_url = current_app.config.get("ADDRESS_VALIDATION_URL")
+        if validation_url:
+            address = ", ".join(
+                v for v in ((request.form.get(k) or "").strip() for k in ("address", "postal_code", "city")) if v
+            )
+            if await validate_address_async(address, url=validation_url) is None:
+                flash("Adresse invalide ou introuvable. Veuillez vérifier et réessayer.", "warning")
+                return redirect(url_for("auth.register"))
         try:
-            auth.register(email, password, first_name=first_name, last_name=last_name)
+            # hash (pool de processus) et écriture SQLite hors de la boucle d'événements
+            await asyncio.to_thread(auth.register, email, password, first_name=first_name, last_name=last_name)
         except Exception as e:
             flash(str(e), "danger")
             return redirect(url_for("auth.register"))
@@ -44,6 +58,14 @@ def login():
         flash("Email et mot de passe requis.", "danger")
         return redirect(url_for("auth.login"))
 
+    # limitation des tentatives AVANT tout calcul de hash
+    throttle = current_app.extensions.get("login_throttle")
+    if throttle:
+        allowed, retry_after = throttle.attempt(email, request.remote_addr)
+        if not allowed:
+            flash(f"Trop de tentatives de connexion. Réessayez dans {retry_after} secondes.", "danger")
+            return redirect(url_for("auth.login"))
+
     services = current_app.extensions.get("services", {})
     auth = services.get("auth")
     if not auth:
@@ -76,8 +98,14 @@ def login():
         flash("Erreur interne: utilisateur non valide.", "danger")
         return redirect(url_for("auth.login"))
 
+    # nouvel identifiant de session à la connexion (fixation de session) ; import ici :
+    # le module des sessions côté serveur n'est pas chargé avec SESSION_BACKEND=cookie
+    from app.session_store import regenerate
+    regenerate(session)
     session["user_id"] = uid
     session["is_admin"] = bool(is_admin)
+    if throttle:
+        throttle.reset(email)
 
     flash("Connecté.", "success")
     next_url = request.args.get("next") or url_for("catalogue.catalogue")
@@ -1,6 +1,8 @@
 from flask import Blueprint, current_app, redirect, url_for, render_template, request, flash, session, jsonify
 from app.models import Product
 from app.auth_helpers import login_required
+from app.shared_catalogue import get_shared_catalogue
+from app.product_versions import session_lines
 
 cart_bp = Blueprint("cart", __name__)
 
@@ -66,24 +68,18 @@ def add_to_cart(product_id):
     except Exception:
         qty = 1
 
-    # Try to use the cart service's add method if present.
-    if cart_svc and hasattr(cart_svc, "add"):
+    # Try to use the cart service (CartBackend) if present.
+    if cart_svc:
         try:
             cart_svc.add(product_id, qty)
             # Verify service persisted the item (best-effort).
             try:
-                items, total = cart_svc.view() if hasattr(cart_svc, "view") else (None, None)
-                if items is not None:
-                    found = any(
-                        (it.get("product_id") == product_id) or
-                        (getattr(getattr(it, "product", None), "id", None) == product_id)
-                        for it in items
-                    )
-                    if not found:
-                        # Service didn't persist -> fallback to session
-                        _session_add(product_id, qty)
-                        flash("Produit ajouté au panier (session fallback après échec du service).", "warning")
-                        return redirect(request.referrer or url_for("catalogue.catalogue"))
+                items, _ = cart_svc.view()
+                if not any(it["product_id"] == str(product_id) for it in items):
+                    # Service didn't persist -> fallback to session
+                    _session_add(product_id, qty)
+                    flash("Produit ajouté au panier (session fallback après échec du service).", "warning")
+                    return redirect(request.referrer or url_for("catalogue.catalogue"))
                 flash("Produit ajouté au panier.", "success")
             except Exception:
                 # If verification fails, fallback to session for reliability
@@ -107,8 +103,9 @@ def view_cart():
     services = current_app.extensions.get("services", {})
     cart_svc = services.get("cart")
 
+    # lignes déjà normalisées par CartAdapter (product dict, price_cents, subtotal_cents...)
     items, total_cents = [], 0
-    if cart_svc and hasattr(cart_svc, "view"):
+    if cart_svc:
         try:
             items, total_cents = cart_svc.view()
         except Exception:
@@ -119,44 +116,6 @@ def view_cart():
     if (not items) and session.get("cart"):
         from app.routes.checkout_routes import _build_items_from_session
         items, total_cents = _build_items_from_session()
-    else:
-        # normaliser les items (toujours fournir subtotal_cents, product dict, product_id, price_cents, quantity)
-        normalized = []
-        total = 0
-        for it in items or []:
-            if isinstance(it, dict):
-                qty = int(it.get("quantity", 1) or 1)
-                # prix depuis clef price_cents ou product.price_cents ou 0
-                price = int(it.get("price_cents") or (it.get("product") and it["product"].get("price_cents")) or 0)
-                subtotal = int(it.get("subtotal_cents", price * qty))
-                prod = it.get("product")
-                if isinstance(prod, dict):
-                    prod_dict = {"id": str(prod.get("id", it.get("product_id", ""))),
-                                 "name": prod.get("name", str(prod.get("id", it.get("product_id", "")))),
-                                 "price_cents": int(prod.get("price_cents", price))}
-                else:
-                    prod_dict = {"id": str(it.get("product_id", "")), "name": str(prod) if prod else str(it.get("product_id", "")), "price_cents": price}
-            else:
-                # object-like
-                qty = int(getattr(it, "quantity", 1) or 1)
-                price = int(getattr(it, "price_cents", getattr(getattr(it, "product", None), "price_cents", 0) or 0))
-                subtotal = int(getattr(it, "subtotal_cents", price * qty))
-                prod = getattr(it, "product", None)
-                prod_dict = {"id": str(getattr(prod, "id", getattr(it, "product_id", ""))),
-                             "name": getattr(prod, "name", str(getattr(it, "product_id", ""))),
-                             "price_cents": price}
-
-            normalized.append({
-                "product_id": str(prod_dict.get("id")),
-                "product": prod_dict,
-                "quantity": int(qty),
-                "price_cents": int(price),
-                "subtotal_cents": int(subtotal)
-            })
-            total += subtotal
-
-        items = normalized
-        total_cents = total
 
     return render_template("cart.html", items=items, cart_total=(total_cents or 0)/100)
 
@@ -169,7 +128,7 @@ def remove_from_cart(product_id):
     """
     services = current_app.extensions.get("services", {})
     cart_svc = services.get("cart")
-    if cart_svc and hasattr(cart_svc, "remove"):
+    if cart_svc:
         try:
             cart_svc.remove(product_id, 0)
             flash("Produit supprimé du panier.", "info")
@@ -192,8 +151,7 @@ def update_cart(product_id=None):
     """
     Update cart quantities.
     - If product_id is provided: handle single-item update.
-      * Try cart_svc.set_quantity if available.
-      * Otherwise compute delta and call cart_svc.add/remove if supported.
+      * Compute delta and call cart_svc.add/remove.
       * Falls back to session update on any error.
     - If no product_id: handle full-cart update using form keys quantities[<product_id>].
       * If cart service is absent, update session directly.
@@ -218,40 +176,17 @@ def update_cart(product_id=None):
         except Exception:
             qty = 0
 
-        if cart_svc and hasattr(cart_svc, "view"):
-            # Prefer direct set if service supports it
-            if hasattr(cart_svc, "set_quantity"):
-                try:
-                    cart_svc.set_quantity(product_id, qty)
-                    flash("Panier mis à jour.", "success")
-                    return redirect(url_for("cart.view_cart"))
-                except Exception:
-                    current_app.logger.exception("cart.set_quantity failed")
-            # Otherwise compute current quantity then call add/remove to reach target qty
+        if cart_svc:
+            # compute current quantity then call add/remove to reach target qty
             try:
                 items, _ = cart_svc.view()
-                current = 0
-                for it in items:
-                    # Support both dict and object shapes returned by service
-                    pid = None
-                    curq = None
-                    if isinstance(it, dict):
-                        pid = str(it.get("product_id") or (it.get("product") and it["product"].get("id")))
-                        curq = int(it.get("quantity") or 0)
-                    else:
-                        prod = getattr(it, "product", None)
-                        pid = str(getattr(prod, "id", None) if prod else getattr(it, "product_id", None))
-                        curq = int(getattr(it, "quantity", 0) or 0)
-                    if pid == str(product_id):
-                        current = curq
-                        break
+                current = next((it["quantity"] for it in items if it["product_id"] == str(product_id)), 0)
                 delta = qty - current
-                if delta > 0 and hasattr(cart_svc, "add"):
+                if delta > 0:
                     cart_svc.add(product_id, delta)
-                elif delta < 0 and hasattr(cart_svc, "remove"):
+                elif delta < 0:
                     cart_svc.remove(product_id, -delta)
                 else:
-                    # If service cannot handle, update session directly
                     _session_set(product_id, qty)
                 flash("Panier mis à jour.", "success")
                 return redirect(url_for("cart.view_cart"))
@@ -267,7 +202,7 @@ def update_cart(product_id=None):
             return redirect(url_for("cart.view_cart"))
 
     # full-cart update: parse form keys quantities[<pid>]
-    if not cart_svc or not hasattr(cart_svc, "view"):
+    if not cart_svc:
         new_cart = {}
         for key, val in request.form.items():
             if key.startswith("quantities[") and key.endswith("]"):
@@ -287,17 +222,7 @@ def update_cart(product_id=None):
         current_items, _ = cart_svc.view()
     except Exception:
         current_items = []
-    current_map = {}
-    for it in current_items:
-        if isinstance(it, dict):
-            pid = it.get("product_id") or (it.get("product") and it["product"].get("id"))
-            qty = int(it.get("quantity") or 0)
-        else:
-            prod = getattr(it, "product", None)
-            pid = getattr(prod, "id", None) if prod else getattr(it, "product_id", None)
-            qty = int(getattr(it, "quantity", 0) or 0)
-        if pid is not None:
-            current_map[str(pid)] = qty
+    current_map = {it["product_id"]: it["quantity"] for it in current_items}
 
     # Apply deltas based on submitted form
     for key, val in request.form.items():
@@ -308,9 +233,9 @@ def update_cart(product_id=None):
             except Exception:
                 continue
             delta = qty - current_map.get(str(pid), 0)
-            if delta > 0 and hasattr(cart_svc, "add"):
+            if delta > 0:
                 cart_svc.add(pid, delta)
-            elif delta < 0 and hasattr(cart_svc, "remove"):
+            elif delta < 0:
                 cart_svc.remove(pid, -delta)
 
     flash("Panier mis à jour.", "success")
@@ -338,12 +263,21 @@ def api_update_item(product_id):
     session["cart"] = cart
     session.modified = True   # <-- ensure Flask saves the session cookie
 
+    shared = get_shared_catalogue()
+    lines = None
+
     def _price_cents(pid):
-        try:
-            p = Product.query.get(pid)
-            return int(getattr(p, "price_cents", 0) or 0) if p else 0
-        except Exception:
-            return 0
+        nonlocal lines
+        if shared is not None:
+            # catalogue partagé : lecture en mémoire, sans requête SQL
+            entry = shared.get(str(pid))
+            if entry is not None and entry.active:
+                return entry.price_cents
+        if lines is None:
+            # lignes du panier revalidées par version (une requête pour tout le panier)
+            lines = session_lines(session)
+        line = lines.get(str(pid))
+        return line[1] if line else 0
 
     price_cents = _price_cents(product_id)
     subtotal = price_cents * (qty or 0)
@@ -1,26 +1,109 @@
-from flask import Blueprint, render_template
-from app.models import Product
+from flask import Blueprint, abort, jsonify, render_template, redirect, url_for
+from app.cache import get_cache
+from app.http_cache import conditional
+from app.models import Product, db
+from app.preload import ProductView, get_snapshot
+from app.product_versions import catalogue_version, product_version
+from app.proxy_cache import key, product_keys, surrogate_keys
 
 catalogue_bp = Blueprint("catalogue", __name__)
 
-@catalogue_bp.route("/catalogue")
-def catalogue():
-    all_products = Product.query.all()
-    categories = {
-        "Kabyle": {"title": "Robes Kabyles", "desc": "Découvrez nos robes kabyles traditionnelles, brodées à la main."},
-        "Abaya": {"title": "Abayas Orientales", "desc": "Abayas élégantes, fluides et modernes pour toutes les occasions."},
-        "Caftan": {"title": "Caftans Marocains", "desc": "Caftans marocains raffinés, ornés de broderies et de perles."},
-        "Karakou": {"title": "Karakous Algériens", "desc": "Karakous en velours, broderies dorées, symbole d’élégance algérienne."}
-    }
-    grouped = {cat: [] for cat in categories}
-    for p in all_products:
+CATEGORIES = {
+    "Kabyle": {"title": "Robes Kabyles", "desc": "Découvrez nos robes kabyles traditionnelles, brodées à la main."},
+    "Abaya": {"title": "Abayas Orientales", "desc": "Abayas élégantes, fluides et modernes pour toutes les occasions."},
+    "Caftan": {"title": "Caftans Marocains", "desc": "Caftans marocains raffinés, ornés de broderies et de perles."},
+    "Karakou": {"title": "Karakous Algériens", "desc": "Karakous en velours, broderies dorées, symbole d’élégance algérienne."}
+}
+
+_COLUMNS = (Product.id, Product.name, Product.description, Product.price_cents,
+            Product.stock_qty, Product.category, Product.active)
+
+
+def _load_grouped():
+    grouped = {cat: [] for cat in CATEGORIES}
+    for row in db.session.execute(db.select(*_COLUMNS).order_by(Product.id)):
+        p = ProductView(*row)
         if p.category in grouped:
             grouped[p.category].append(p)
-    return render_template("catalogue.html", categories=categories, grouped=grouped)
+    return grouped
+
+
+def _load_product(product_id):
+    row = db.session.execute(db.select(*_COLUMNS).where(Product.id == product_id)).first()
+    return ProductView(*row) if row else None
+
+
+def _grouped():
+    # mode préchargement : instantané partagé entre workers au lieu des objets ORM
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return {cat: snapshot.in_category(cat) for cat in CATEGORIES}
+    # clé par version de la table : une écriture d'un autre worker ou hors ORM change
+    # la clé ; l'étiquette "catalogue" libère en plus l'entrée dans ce processus
+    return get_cache().get_or_set(f"catalogue:grouped:{catalogue_version()}", _load_grouped, tags=("catalogue",))
+
+
+def _product(product_id):
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.get(product_id)
+    return get_cache().get_or_set(
+        f"product:{product_id}:{product_version(product_id)}", lambda: _load_product(product_id),
+        tags=(f"product:{product_id}",),
+    )
+
+
+def _listing_keys():
+    # une clé par catégorie (pas par produit : l'en-tête resterait borné) ; toute
+    # purge d'un produit inclut la clé de sa catégorie
+    surrogate_keys("catalogue", *(key("category", cat) for cat in CATEGORIES))
+
+
+def _catalogue_validator(**kwargs):
+    return f"catalogue={catalogue_version()}"
+
+
+def _product_validator(product_id):
+    return f"product:{product_id}={product_version(product_id)}"
+
+
+@catalogue_bp.route("/catalogue")
+@conditional(_catalogue_validator)
+def catalogue():
+    grouped = _grouped()
+    _listing_keys()
+    return render_template("catalogue.html", categories=CATEGORIES, grouped=grouped)
+
+@catalogue_bp.route("/catalogue/<category>")
+@conditional(_catalogue_validator)
+def category(category):
+    if category not in CATEGORIES:
+        abort(404)
+    grouped = _grouped()
+    surrogate_keys("catalogue", key("category", category))
+    return render_template("catalogue.html", categories={category: CATEGORIES[category]}, grouped=grouped)
 
 @catalogue_bp.route("/product/<product_id>")
+@conditional(_product_validator)
 def product_detail(product_id):
-    product = products.get(product_id)
+    product = _product(product_id)
     if not product:
         return redirect(url_for("catalogue.catalogue"))
-    return render_template("product_detail.html", product=product)
\ No newline at end of file
+    surrogate_keys(*product_keys(product))
+    return render_template("product_detail.html", product=product)
+
+@catalogue_bp.route("/api/products")
+@conditional(_catalogue_validator)
+def api_products():
+    grouped = _grouped()
+    _listing_keys()
+    return jsonify([p._asdict() for cat in CATEGORIES for p in grouped[cat] if p.active])
+
+@catalogue_bp.route("/api/products/<product_id>")
+@conditional(_product_validator)
+def api_product(product_id):
+    product = _product(product_id)
+    if not product:
+        abort(404)
+    surrogate_keys(*product_keys(product))
+    return jsonify(product._asdict())
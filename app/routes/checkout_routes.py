@@ -1,22 +1,22 @@
+import asyncio
+
 from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session
 import uuid
 
 checkout_bp = Blueprint("checkout", __name__)
 
 def _build_items_from_session():
-    from app.models import Product
+    # une requête `SELECT id, version` pour tout le panier, lignes complètes relues
+    # seulement pour les produits modifiés depuis la dernière vue
+    from app.product_versions import session_lines
     cart = session.get("cart", {}) or {}
+    lines = session_lines(session)
     items = []
     total_cents = 0
     for pid, qty in cart.items():
-        try:
-            p = Product.query.get(pid)
-            price = int(getattr(p, "price_cents", 0) or 0) if p else 0
-            name = getattr(p, "name", str(pid)) if p else str(pid)
-        except Exception:
-            p = None
-            price = 0
-            name = str(pid)
+        line = lines.get(str(pid))
+        price = line[1] if line else 0
+        name = line[3] if line else str(pid)
         subtotal = price * int(qty)
         items.append({
             "product_id": str(pid),
@@ -28,41 +28,6 @@ def _build_items_from_session():
         total_cents += subtotal
     return items, total_cents
 
-def _normalize_items(items):
-    """Assure que chaque item a keys: product_id, product, quantity, price_cents, subtotal_cents"""
-    out = []
-    total = 0
-    for it in items or []:
-        # support dict or object shapes
-        if isinstance(it, dict):
-            pid = str(it.get("product_id") or (it.get("product") and it["product"].get("id")) or it.get("id") or "")
-            qty = int(it.get("quantity", 1))
-            price = int(it.get("price_cents") or (it.get("product") and it["product"].get("price_cents")) or it.get("subtotal_cents",0) // max(qty,1) or 0)
-            subtotal = int(it.get("subtotal_cents", price * qty))
-            prod = it.get("product")
-            if isinstance(prod, dict):
-                prod_dict = {"id": str(prod.get("id", pid)), "name": prod.get("name", str(pid)), "price_cents": int(prod.get("price_cents", price))}
-            else:
-                prod_dict = {"id": pid, "name": str(prod) if prod else pid, "price_cents": price}
-        else:
-            # object-like
-            pid = str(getattr(it, "product_id", "") or (getattr(getattr(it, "product", None), "id", None)) or getattr(it, "id", ""))
-            qty = int(getattr(it, "quantity", 1) or 1)
-            price = int(getattr(it, "price_cents", getattr(getattr(it, "product", None), "price_cents", 0) or 0))
-            subtotal = int(getattr(it, "subtotal_cents", price * qty))
-            prod = getattr(it, "product", None)
-            prod_dict = {"id": str(getattr(prod, "id", pid)), "name": getattr(prod, "name", str(pid)), "price_cents": price}
-
-        out.append({
-            "product_id": pid,
-            "product": prod_dict,
-            "quantity": qty,
-            "price_cents": price,
-            "subtotal_cents": subtotal
-        })
-        total += subtotal
-    return out, total
-
 @checkout_bp.route("/checkout", methods=["GET", "POST"])
 def checkout():
     services = current_app.extensions.get("services", {})
@@ -70,8 +35,9 @@ def checkout():
     cart_svc = services.get("cart")
 
     # récupérer items + total (préférence service, fallback session si service vide)
+    # cart.view() renvoie déjà des lignes normalisées (CartAdapter)
     items, total_cents = [], 0
-    if cart_svc and hasattr(cart_svc, "view"):
+    if cart_svc:
         try:
             items, total_cents = cart_svc.view()
         except Exception:
@@ -82,9 +48,6 @@ def checkout():
     if (not items) and session.get("cart"):
         current_app.logger.debug("Using session cart in checkout because service returned empty")
         items, total_cents = _build_items_from_session()
-    else:
-        # normalize items returned by service or domain to ensure subtotal_cents exists
-        items, total_cents = _normalize_items(items)
 
     if request.method == "GET":
         if not items:
@@ -120,8 +83,24 @@ def checkout():
     session["pending_payment"] = {"order_id": order.get("id"), "amount_cents": int(total_cents or 0)}
     return redirect(url_for("checkout.pay"))
 
+def _finalize_order(order_svc, order_id):
+    """Commande payée : statut, numéro de suivi (appels SQLite bloquants)."""
+    # mark as paid (set_status fait partie de OrderBackend)
+    order_svc.set_status(order_id, "PAID")
+    # generate tracking number and persist (extensions optionnelles de DevOrderService)
+    tracking = uuid.uuid4().hex[:12].upper()
+    if hasattr(order_svc, "set_tracking"):
+        order_svc.set_tracking(order_id, tracking)
+    # optionally set paid_at if service supports (best-effort)
+    try:
+        if hasattr(order_svc, "set_paid_at"):
+            order_svc.set_paid_at(order_id)
+    except Exception:
+        pass
+
+
 @checkout_bp.route("/checkout/pay", methods=["GET", "POST"])
-def pay():
+async def pay():
     # require login to access payment flow
     if session.get("user_id") is None:
         flash("Connectez‑vous pour effectuer le paiement.", "warning")
@@ -136,25 +115,17 @@ def pay():
         amount_eur = (pending.get("amount_cents", 0) or 0) / 100
         return render_template("pay.html", order_id=pending.get("order_id"), amount_eur=amount_eur)
 
-    # POST from pay.html -> traiter paiement (simple simulation)
-    card_number = request.form.get("card_number")
-    paid = True
-    if paid:
+    # POST from pay.html -> débit via la passerelle (attente non bloquante pour la boucle)
+    card_number = (request.form.get("card_number") or "").replace(" ", "")
+    gateway = current_app.extensions["services"]["payment"]
+    result = await gateway.charge_card_async(
+        card_number, request.form.get("exp_month"), request.form.get("exp_year"), request.form.get("cvc"),
+        int(pending.get("amount_cents") or 0), idempotency_key=str(pending.get("order_id")),
+    )
+    if result["success"]:
         order_svc = current_app.extensions.get("services", {}).get("order")
         try:
-            # mark as paid
-            if hasattr(order_svc, "set_status"):
-                order_svc.set_status(pending.get("order_id"), "PAID")
-            # generate tracking number and persist
-            tracking = uuid.uuid4().hex[:12].upper()
-            if hasattr(order_svc, "set_tracking"):
-                order_svc.set_tracking(pending.get("order_id"), tracking)
-            # optionally set paid_at if service supports (best-effort)
-            try:
-                if hasattr(order_svc, "set_paid_at"):
-                    order_svc.set_paid_at(pending.get("order_id"))
-            except Exception:
-                pass
+            await asyncio.to_thread(_finalize_order, order_svc, pending.get("order_id"))
         except Exception:
             current_app.logger.exception("Failed to finalize order after payment")
         session.pop("pending_payment", None)
@@ -163,4 +134,4 @@ def pay():
         return redirect(url_for("order.my_orders"))
     else:
         flash("Paiement échoué.", "danger")
-        return redirect(url_for("checkout.pay"))
\ No newline at end of file
+        return redirect(url_for("checkout.pay"))
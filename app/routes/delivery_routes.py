@@ -1,21 +1,45 @@
-from flask import Blueprint, request, redirect, url_for, render_template, flash, session
+import asyncio
+
+from flask import Blueprint, current_app, request, redirect, url_for, render_template, flash, session
+from app.aio import FetchError, fetch_json
 from app.models import Delivery
 
 bp = Blueprint('delivery_bp', __name__, url_prefix='/delivery')
 
+
+async def _carrier_status(tracking_number):
+    """Statut en direct chez le transporteur (CARRIER_TRACKING_URL, ex. https://.../track/{tracking_number})."""
+    url = current_app.config.get("CARRIER_TRACKING_URL")
+    if not url:
+        return None
+    try:
+        data = await fetch_json(url.format(tracking_number=tracking_number), timeout=5)
+    except FetchError:
+        current_app.logger.warning("suivi transporteur indisponible pour %s", tracking_number)
+        return None
+    return data.get("status") if isinstance(data, dict) else None
+
+
 @bp.route('/track', methods=['GET', 'POST'])
-def track():
+async def track():
     if session.get("user_id") is None:
         flash("Connectez‑vous pour suivre une commande.", "warning")
         return redirect(url_for("auth.login", next=request.url))
     query = request.values.get('tracking_number', '').strip()
     delivery = None
+    carrier_status = None
     error = None
     if request.method == 'POST' or query:
         if not query:
             error = "Veuillez saisir un numéro de suivi."
         else:
-            delivery = Delivery.query.filter_by(tracking_number=query).first()
+            # base locale et transporteur interrogés en même temps
+            delivery, carrier_status = await asyncio.gather(
+                asyncio.to_thread(lambda: Delivery.query.filter_by(tracking_number=query).first()),
+                _carrier_status(query),
+            )
             if not delivery:
                 error = "Aucune livraison trouvée pour ce numéro de suivi."
-    return render_template('delivery/track.html', delivery=delivery, query=query, error=error)
\ No newline at end of file
+                carrier_status = None
+    return render_template('delivery/track.html', delivery=delivery, query=query, error=error,
+                           carrier_status=carrier_status)
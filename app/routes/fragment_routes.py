@@ -0,0 +1,24 @@
+from flask import Blueprint, abort, jsonify
+
+from app.fragments import PARTS, personal_context, render_part
+
+fragments_bp = Blueprint("fragments", __name__)
+
+
+@fragments_bp.route("/fragment/personal")
+def personal():
+    """Tous les fragments en un appel (mode fetch)."""
+    context = personal_context()
+    return jsonify({
+        "cart_count": context["cart_count"],
+        "logged_in": context["logged_in"],
+        "parts": {name: render_part(name, context) for name in PARTS},
+    })
+
+
+@fragments_bp.route("/fragment/<name>")
+def part(name):
+    """Un fragment HTML (mode esi)."""
+    if name not in PARTS:
+        abort(404)
+    return render_part(name)
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from flask import Blueprint, abort, current_app, redirect, send_file, url_for
+from app import images, metrics
+
+images_bp = Blueprint("images", __name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@images_bp.route("/img/<filename>")
+def variant_file(filename):
+    """Variante redimensionnée (pré-générée, en cache disque ou générée à la demande)."""
+    parsed = images.parse(filename)
+    if parsed is None:
+        abort(404)
+    name, size, digest, ext = parsed
+    if not images.available():
+        return redirect(url_for("static", filename=f"images/{name}.jpg"))
+    current = images.variant(name, size, ext)
+    if current is None:
+        abort(404)
+    if current.filename != filename:
+        # photo source modifiée depuis : URL de la version courante
+        return redirect(url_for("images.variant_file", filename=current.filename))
+
+    path = Path(current_app.config["IMAGE_VARIANTS_DIR"]) / filename
+    if path.is_file():
+        metrics.incr("image_variant_prebuilt_total")
+    else:
+        cache = images.get_disk_cache()
+        path = cache.get(filename)
+        if path is not None:
+            metrics.incr("image_cache_hits_total")
+        else:
+            metrics.incr("image_cache_misses_total")
+            path = cache.put(filename, images.render(name, size, ext))
+    response = send_file(path, mimetype=images.FORMATS[ext][1], max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
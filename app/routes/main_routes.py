@@ -1,9 +1,9 @@
 from flask import Blueprint, render_template
-from app.services_init import catalog
+from app.services_init import get_service
 
 main_bp = Blueprint("main", __name__)
 
 @main_bp.route("/")
 def home():
-    products = catalog.list_products()
+    products = get_service("catalog").list_products()
     return render_template("index.html", products=products)
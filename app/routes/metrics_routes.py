@@ -0,0 +1,23 @@
+import hmac
+import os
+
+from flask import Blueprint, Response, abort, current_app, request, session
+from app import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def _token_ok():
+    # l'adresse source ne prouve rien derrière le proxy local (toujours 127.0.0.1)
+    token = current_app.config.get("METRICS_TOKEN") or os.environ.get("METRICS_TOKEN")
+    sent = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(sent.encode(), f"Bearer {token}".encode())
+
+
+@metrics_bp.route("/metrics")
+def show_metrics():
+    """Compteurs au format texte "nom valeur" (admin, ou en-tête Authorization: Bearer METRICS_TOKEN)."""
+    if not session.get("is_admin") and not _token_ok():
+        abort(404)
+    lines = [f"{name} {value}" for name, value in sorted(metrics.snapshot().items())]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain")
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from werkzeug.utils import secure_filename
 from pathlib import Path
 from app.models import User, db
+from app.user_loader import get_current_user, invalidate_user
 import uuid
 import os
 
@@ -17,7 +18,8 @@ def view_profile():
         flash("Veuillez vous connecter.", "warning")
         return redirect("/login")
 
-    user = User.query.get(user_id)
+    # instantané en cache : pas de requête SQL en affichage
+    user = get_current_user()
     if not user:
         flash("Utilisateur introuvable.", "danger")
         return redirect("/")
@@ -28,8 +30,10 @@ def view_profile():
             filename = f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
             dest = UPLOAD_DIR / filename
             f.save(str(dest))  # write file to static/uploads
-            user.profile_image = f"uploads/{filename}"  # store path usable by url_for('static', filename=...)
+            db_user = db.session.get(User, user_id)
+            db_user.profile_image = f"uploads/{filename}"  # store path usable by url_for('static', filename=...)
             db.session.commit()  # important
+            invalidate_user(user_id)
             flash("Photo de profil mise à jour.", "success")
             return redirect(url_for("profile.view_profile"))
 
@@ -42,28 +46,33 @@ def edit_profile():
         flash("Veuillez vous connecter pour accéder à votre profil.", "warning")
         return redirect("/login")
 
-    user = User.query.get(user_id)
+    if request.method == "GET":
+        user = get_current_user()
+        if not user:
+            flash("Utilisateur introuvable.", "danger")
+            return redirect("/")
+        return render_template("edit_profile.html", user=user)
+
+    user = db.session.get(User, user_id)
     if not user:
         flash("Utilisateur introuvable.", "danger")
         return redirect("/")
 
-    if request.method == "POST":
-        first_name = request.form.get("first_name")
-        last_name = request.form.get("last_name")
-        if first_name is not None:
-            user.first_name = first_name.strip()
-        if last_name is not None:
-            user.last_name = last_name.strip()
-
-        f = request.files.get("profile_image")
-        if f and f.filename:
-            filename = f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
-            dest = UPLOAD_DIR / filename
-            f.save(str(dest))
-            user.profile_image = f"uploads/{filename}"
+    first_name = request.form.get("first_name")
+    last_name = request.form.get("last_name")
+    if first_name is not None:
+        user.first_name = first_name.strip()
+    if last_name is not None:
+        user.last_name = last_name.strip()
 
-        db.session.commit()
-        flash("Profil mis à jour.", "success")
-        return redirect(url_for("profile.view_profile"))
+    f = request.files.get("profile_image")
+    if f and f.filename:
+        filename = f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
+        dest = UPLOAD_DIR / filename
+        f.save(str(dest))
+        user.profile_image = f"uploads/{filename}"
 
-    return render_template("edit_profile.html", user=user)
\ No newline at end of file
+    db.session.commit()
+    invalidate_user(user_id)
+    flash("Profil mis à jour.", "success")
+    return redirect(url_for("profile.view_profile"))
@@ -1,5 +1,5 @@
 from flask import Blueprint, session, redirect, url_for, render_template
-from app.services_init import products
+from app.services_init import get_service
 
 wishlist_bp = Blueprint("wishlist", __name__)
 
@@ -17,5 +17,6 @@ def add_to_wishlist(product_id):
 @wishlist_bp.route("/wishlist")
 def view_wishlist():
     wishlist = get_wishlist()
+    products = get_service("products")
     items = [products.get(pid) for pid in wishlist if products.get(pid)]
     return render_template("wishlist.html", items=items)
\ No newline at end of file
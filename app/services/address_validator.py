@@ -1,18 +1,14 @@
-import requests
 from typing import Optional, Dict
 
 NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 
-def validate_address_nominatim(raw_address: str, countrycodes: Optional[str] = None, strict: bool = True) -> Optional[Dict]:
-    """
-    Valide et normalise une adresse via Nominatim (OpenStreetMap).
-    Retourne un dict avec display_name, lat, lon, address si OK, sinon None.
-    - strict=True : exige au moins ville et code postal.
-    Remarque: respecter les règles d'usage Nominatim (User-Agent, rate limit).
-    """
-    if not raw_address or not raw_address.strip():
-        return None
+HEADERS = {
+    # Remplace contact@example.com par ton email ou info de contact
+    "User-Agent": "Tradition-Elegance/1.0 (contact@example.com)"
+}
+
 
+def _params(raw_address: str, countrycodes: Optional[str]) -> Dict:
     params = {
         "q": raw_address,
         "format": "jsonv2",
@@ -21,36 +17,63 @@ def validate_address_nominatim(raw_address: str, countrycodes: Optional[str] = N
     }
     if countrycodes:
         params["countrycodes"] = countrycodes  # ex: "fr"
+    return params
 
-    headers = {
-        # Remplace contact@example.com par ton email ou info de contact
-        "User-Agent": "Tradition-Elegance/1.0 (contact@example.com)"
-    }
 
-    try:
-        r = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=6)
-        r.raise_for_status()
-        data = r.json()
-        if not data:
+def _parse(data, strict: bool) -> Optional[Dict]:
+    if not data:
+        return None
+
+    best = data[0]
+    addr = best.get("address", {})
+
+    has_street = any(k in addr for k in ("road", "house_number", "pedestrian"))
+    has_city = any(k in addr for k in ("city", "town", "village", "municipality"))
+    has_postcode = "postcode" in addr
+
+    if strict:
+        if not (has_city and has_postcode):
             return None
 
-        best = data[0]
-        addr = best.get("address", {})
+    return {
+        "display_name": best.get("display_name"),
+        "lat": best.get("lat"),
+        "lon": best.get("lon"),
+        "address": addr
+    }
 
-        has_street = any(k in addr for k in ("road", "house_number", "pedestrian"))
-        has_city = any(k in addr for k in ("city", "town", "village", "municipality"))
-        has_postcode = "postcode" in addr
 
-        if strict:
-            if not (has_city and has_postcode):
-                return None
+def validate_address_nominatim(raw_address: str, countrycodes: Optional[str] = None, strict: bool = True) -> Optional[Dict]:
+    """
+    Valide et normalise une adresse via Nominatim (OpenStreetMap).
+    Retourne un dict avec display_name, lat, lon, address si OK, sinon None.
+    - strict=True : exige au moins ville et code postal.
+    Remarque: respecter les règles d'usage Nominatim (User-Agent, rate limit).
+    """
+    import requests  # importé à l'usage : pas au démarrage des workers
 
-        return {
-            "display_name": best.get("display_name"),
-            "lat": best.get("lat"),
-            "lon": best.get("lon"),
-            "address": addr
-        }
+    if not raw_address or not raw_address.strip():
+        return None
+
+    try:
+        r = requests.get(NOMINATIM_URL, params=_params(raw_address, countrycodes), headers=HEADERS, timeout=6)
+        r.raise_for_status()
+        return _parse(r.json(), strict)
     except requests.RequestException:
         # En cas d'erreur réseau, renvoyer None (inscription bloquée) ou adapter pour soft-fallback.
-        return None
\ No newline at end of file
+        return None
+
+
+async def validate_address_async(raw_address: str, countrycodes: Optional[str] = None, strict: bool = True,
+                                 url: str = NOMINATIM_URL) -> Optional[Dict]:
+    """Même contrat que validate_address_nominatim, pour les vues async (app/aio.py)."""
+    from app.aio import FetchError, fetch_json
+
+    if not raw_address or not raw_address.strip():
+        return None
+
+    try:
+        data = await fetch_json(url, params=_params(raw_address, countrycodes), headers=HEADERS, timeout=6)
+    except FetchError:
+        return None
+    return _parse(data, strict)
@@ -1,13 +1,13 @@
-from app.domain import (
-    UserRepository, ProductRepository, CartRepository, OrderRepository,
-    InvoiceRepository, PaymentRepository, ThreadRepository,
-    SessionManager, AuthService, CatalogService, CartService,
-    BillingService, DeliveryService, PaymentGateway, OrderService, CustomerService, Product
-)
-from werkzeug.security import check_password_hash, generate_password_hash
+from app.password_hashing import get_hash_pool
 from datetime import datetime
 from pathlib import Path
 import sqlite3, os, uuid
+import inspect
+import threading
+from collections.abc import MutableMapping
+from functools import wraps
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Protocol, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = PROJECT_ROOT / "elegance.db"
@@ -48,7 +48,27 @@ class AuthService:
     def verify_password(self, user, password):
         if not user or not user.get("password_hash"):
             return False
-        return check_password_hash(user["password_hash"], password)
+        # calcul délégué au pool de processus (ne bloque pas le GIL du worker)
+        return get_hash_pool().verify(user["password_hash"], password)
+
+    def _upgrade_hash(self, user, password):
+        """
+        Recalcule le hash si les paramètres ont changé (PASSWORD_HASH_METHOD)
+        ou si c'est un ancien sha256 de domain.PasswordHasher.
+        """
+        pool = get_hash_pool()
+        if not pool.needs_rehash(user.get("password_hash")):
+            return
+        try:
+            new_hash = pool.hash(password)
+            conn = _connect()
+            conn.execute("UPDATE user SET password_hash = ? WHERE id = ?", (new_hash, user["id"]))
+            conn.commit()
+            conn.close()
+            user["password_hash"] = new_hash
+        except Exception:
+            # la connexion reste valide même si la mise à niveau échoue
+            pass
 
     # Ajout : méthode login attendue par d'autres parties du code
     def login(self, email, password):
@@ -70,6 +90,7 @@ class AuthService:
             return None
         if not self.verify_password(user, password):
             return None
+        self._upgrade_hash(user, password)
         # si on a un session manager, créer une session (optionnel)
         if self._sessions and hasattr(self._sessions, "create"):
             try:
@@ -104,7 +125,7 @@ class AuthService:
             conn.close()
             raise RuntimeError("Un compte avec cet email existe déjà.")
 
-        pw_hash = generate_password_hash(password)
+        pw_hash = get_hash_pool().hash(password)
         # INSERT sans created_at (évite l'erreur si la colonne n'existe pas)
         cur.execute(
             "INSERT INTO user (email, password_hash, first_name, last_name, is_admin) VALUES (?, ?, ?, ?, ?)",
@@ -142,64 +163,114 @@ class ProductService:
             raise RuntimeError("Produit introuvable")
         return affected
 
+class CartBackend(Protocol):
+    """API panier attendue par les routes (CartAdapter la fournit pour tout service panier)."""
+    def add(self, product_id: str, qty: int = 1): ...
+    def remove(self, product_id: str, qty: int = 0): ...
+    def view(self) -> Tuple[List[Dict], int]: ...
+
+
+class OrderBackend(Protocol):
+    """API commandes attendue par les routes (DevOrderService, OrderAdapter)."""
+    def create_order(self, user_id, items, total_cents, status: str = "PENDING") -> Dict: ...
+    def get_user_orders(self, user_id) -> List[Dict]: ...
+    def get_order(self, order_id) -> Optional[Dict]: ...
+    def set_status(self, order_id, status: str): ...
+
+
+def _find_attr(obj, names):
+    """Première méthode de obj parmi names : (nom, méthode liée) ou (None, None)."""
+    for name in names:
+        fn = getattr(obj, name, None)
+        if callable(fn):
+            return name, fn
+    return None, None
+
+
+def _unsupported(message):
+    def fail(*args, **kwargs):
+        raise RuntimeError(message)
+    return fail
+
+
+def normalize_lines(items):
+    """
+    Lignes de panier / commande (dict ou objet) -> (lignes, total_cents), chaque ligne
+    ayant product_id, product {id, name, price_cents}, quantity, price_cents, subtotal_cents.
+    """
+    out = []
+    total = 0
+    for it in items or []:
+        if isinstance(it, dict):
+            pid = str(it.get("product_id") or (it.get("product") and it["product"].get("id")) or it.get("id") or "")
+            qty = int(it.get("quantity", 1))
+            price = int(it.get("price_cents") or (it.get("product") and it["product"].get("price_cents")) or it.get("subtotal_cents",0) // max(qty,1) or 0)
+            subtotal = int(it.get("subtotal_cents", price * qty))
+            prod = it.get("product")
+            if isinstance(prod, dict):
+                prod_dict = {"id": str(prod.get("id", pid)), "name": prod.get("name", str(pid)), "price_cents": int(prod.get("price_cents", price))}
+            else:
+                prod_dict = {"id": pid, "name": str(prod) if prod else pid, "price_cents": price}
+        else:
+            pid = str(getattr(it, "product_id", "") or (getattr(getattr(it, "product", None), "id", None)) or getattr(it, "id", ""))
+            qty = int(getattr(it, "quantity", 1) or 1)
+            price = int(getattr(it, "price_cents", getattr(getattr(it, "product", None), "price_cents", 0) or 0))
+            subtotal = int(getattr(it, "subtotal_cents", price * qty))
+            prod = getattr(it, "product", None)
+            prod_dict = {"id": str(getattr(prod, "id", pid)), "name": getattr(prod, "name", str(pid)), "price_cents": price}
+
+        out.append({
+            "product_id": pid,
+            "product": prod_dict,
+            "quantity": qty,
+            "price_cents": price,
+            "subtotal_cents": subtotal
+        })
+        total += subtotal
+    return out, total
+
+
 class CartAdapter:
     """
-    Adaptateur pour fournir l'API minimale attendue par les routes :
-    - view() -> (items, total_cents)
+    Adaptateur fournissant l'API CartBackend attendue par les routes :
+    - view() -> (lignes normalisées, total_cents), voir normalize_lines
     - add(product_id, qty)
     - remove(product_id, qty)
-    Il délègue aux méthodes disponibles du service réel (cart_svc) avec des fallbacks.
+    Les méthodes du service réel (svc) sont choisies une fois, à la construction ;
+    une opération absente lève RuntimeError à l'appel (les routes retombent sur la session).
     """
     def __init__(self, svc):
         self._svc = svc
+        # CartService.add_to_cart du domaine prend user_id en premier : pas compatible
+        _, add = _find_attr(svc, ("add", "add_item"))
+        self.add = add or _unsupported("Cart service has no compatible add method")
 
-    def add(self, product_id, qty=1):
-        if hasattr(self._svc, "add"):
-            return self._svc.add(product_id, qty)
-        if hasattr(self._svc, "add_item"):
-            return self._svc.add_item(product_id, qty)
-        if hasattr(self._svc, "add_to_cart"):
-            return self._svc.add_to_cart(product_id, qty)
-        raise RuntimeError("Cart service has no compatible add method")
-
-    def remove(self, product_id, qty=0):
         # qty==0 -> remove line
-        if hasattr(self._svc, "remove"):
-            return self._svc.remove(product_id, qty)
-        if hasattr(self._svc, "remove_item"):
-            return self._svc.remove_item(product_id, qty)
-        if hasattr(self._svc, "set_quantity"):
-            return self._svc.set_quantity(product_id, 0)
-        if hasattr(self._svc, "delete"):
-            return self._svc.delete(product_id)
-        raise RuntimeError("Cart service has no compatible remove method")
+        name, remove = _find_attr(svc, ("remove", "remove_item", "set_quantity", "delete"))
+        if name == "set_quantity":
+            self.remove = lambda product_id, qty=0: remove(product_id, 0)
+        elif name == "delete":
+            self.remove = lambda product_id, qty=0: remove(product_id)
+        else:
+            self.remove = remove or _unsupported("Cart service has no compatible remove method")
+
+        name, items = _find_attr(svc, ("view", "get_cart", "list_items"))
+        if name == "view":
+            self._items = lambda: svc.view()[0]
+        elif name == "get_cart":
+            self._items = lambda: self._cart_items(items())
+        else:
+            self._items = items or list
+
+    @staticmethod
+    def _cart_items(cart):
+        # get_cart() renvoie un dict ou un objet
+        if isinstance(cart, dict):
+            return cart.get("items", [])
+        return getattr(cart, "items", []) or []
 
     def view(self):
-        # try direct view
-        if hasattr(self._svc, "view"):
-            return self._svc.view()
-        # common alternative: get_cart() returning dict or object
-        if hasattr(self._svc, "get_cart"):
-            cart = self._svc.get_cart()
-            if isinstance(cart, dict):
-                items = cart.get("items", [])
-                total = cart.get("total_cents", 0)
-            else:
-                items = getattr(cart, "items", []) or []
-                total = getattr(cart, "total_cents", 0) or getattr(cart, "total", 0)
-            return items, total
-        # list_items fallback
-        if hasattr(self._svc, "list_items"):
-            items = self._svc.list_items()
-            total = 0
-            for it in items:
-                # try different shapes
-                qty = getattr(it, "quantity", None) or (it.get("quantity") if isinstance(it, dict) else 1)
-                price = getattr(it, "price_cents", None) or (it.get("price_cents") if isinstance(it, dict) else 0)
-                total += (price or 0) * (qty or 1)
-            return items, total
-        # default empty cart
-        return [], 0
+        return normalize_lines(self._items())
 
 class DevOrderService:
     def __init__(self):
@@ -338,276 +409,385 @@ class DevOrderService:
         conn.commit()
         conn.close()
         return True
-# Création des repositories et services
-users = UserRepository()
-products = ProductRepository()
-carts = CartRepository()
-orders = OrderRepository()
-invoices = InvoiceRepository()
-payments = PaymentRepository()
-threads = ThreadRepository()
-sessions = SessionManager()
-
-# créer auth en passant users/sessions (conserver cette instance)
-auth = AuthService(users, sessions)
-catalog = CatalogService(products)
-cart_svc = CartService(carts, products)
-billing = BillingService(invoices)
-delivery_svc = DeliveryService()
-gateway = PaymentGateway()
-# tentative de création du service de commande, fallback sur DevOrderService en cas d'échec
-try:
-    # si OrderService demande des dépendances (implémentation domaine), tenter la création
-    order_svc = OrderService(orders, products, carts, payments, invoices, billing, delivery_svc, gateway, users)
-except Exception:
-    # fallback : utiliser le service en mémoire
-    order_svc = DevOrderService()
-cs = CustomerService(threads, users)
-
-# Ajout des produits traditionnels
-products.add(Product(
-    id="robe_kabyle",
-    name="Robe Kabyle Prestige",
-    description="Robe traditionnelle kabyle brodée à la main, motifs berbères colorés.",
-    price_cents=15900,
-    stock_qty=10,
-    category="Kabyle"
-))
-products.add(Product(
-    id="abaya_orientale",
-    name="Abaya Orientale Chic",
-    description="Abaya fluide et élégante, tissu léger, finitions dorées.",
-    price_cents=9900,
-    stock_qty=15,
-    category="Orientale"
-))
-products.add(Product(
-    id="caftan_marocain",
-    name="Caftan Marocain Élégance",
-    description="Caftan marocain moderne, ornements dorés et coupe raffinée.",
-    price_cents=18900,
-    stock_qty=8,
-    category="Marocain"
-))
-products.add(Product(
-    id="ferguani",
-    name="Ferguani Tradition",
-    description="Robe ferguani, tissu artisanal, broderies fines.",
-    price_cents=12900,
-    stock_qty=12,
-    category="Algérien"
-))
-products.add(Product(
-    id="tlemcani",
-    name="Tlemcani Authentique",
-    description="Robe tlemcani, coupe traditionnelle, motifs floraux.",
-    price_cents=14900,
-    stock_qty=7,
-    category="Algérien"
-))
-
-# Ajout des produits modernes
-products.add(Product(
-    id="robe_kabyle_1",
-    name="Robe Kabyle Prestige",
-    description="Broderie berbère, tissu premium.",
-    price_cents=15900,
-    stock_qty=5,
-    category="Kabyle"
-))
-products.add(Product(
-    id="robe_kabyle_2",
-    name="Robe Kabyle Élégance",
-    description="Motifs floraux, coupe moderne.",
-    price_cents=14900,
-    stock_qty=3,
-    category="Kabyle"
-))
-products.add(Product(
-    id="robe_kabyle_3",
-    name="Robe Kabyle Tradition",
-    description="Couleurs vives, ceinture tissée.",
-    price_cents=13900,
-    stock_qty=4,
-    category="Kabyle"
-))
-products.add(Product(
-    id="caftan_1",
-    name="Caftan Marocain Or",
-    description="Ornements dorés, coupe royale.",
-    price_cents=18900,
-    stock_qty=2,
-    category="Caftan"
-))
-products.add(Product(
-    id="caftan_2",
-    name="Caftan Bleu Nuit",
-    description="Velours bleu, broderie argent.",
-    price_cents=17900,
-    stock_qty=3,
-    category="Caftan"
-))
-products.add(Product(
-    id="caftan_3",
-    name="Caftan Classique",
-    description="Coupe traditionnelle, tissu léger.",
-    price_cents=16900,
-    stock_qty=5,
-    category="Caftan"
-))
-products.add(Product(
-    id="abaya_1",
-    name="Abaya Orientale Chic",
-    description="Tissu fluide, finitions dorées.",
-    price_cents=9900,
-    stock_qty=6,
-    category="Abaya"
-))
-products.add(Product(
-    id="abaya_2",
-    name="Abaya Noire Élégante",
-    description="Noir profond, coupe moderne.",
-    price_cents=10900,
-    stock_qty=4,
-    category="Abaya"
-))
-products.add(Product(
-    id="abaya_3",
-    name="Abaya Blanche Pureté",
-    description="Blanc cassé, détails subtils.",
-    price_cents=11900,
-    stock_qty=3,
-    category="Abaya"
-))
-products.add(Product(
-    id="karakou_1",
-    name="Karakou Vert Olive",
-    description="Velours vert, broderie dorée.",
-    price_cents=19900,
-    stock_qty=2,
-    category="Karakou"
-))
-products.add(Product(
-    id="karakou_2",
-    name="Karakou Bordeaux Élégance",
-    description="Bordeaux profond, coupe raffinée.",
-    price_cents=20900,
-    stock_qty=3,
-    category="Karakou"
-))
-products.add(Product(
-    id="karakou_3",
-    name="Karakou Tradition",
-    description="Motifs classiques, tissu premium.",
-    price_cents=18900,
-    stock_qty=2,
-    category="Karakou"
-))
-
-# ATTENTION : ne pas écraser 'auth' ci‑dessous — supprimer la réassignation
-# auth = AuthService()   <-- supprimer cette ligne si présente
+def _seed_products(products):
+    """Catalogue initial (uniquement si le repository restauré est vide)."""
+    from app.domain import Product
+    # Ajout des produits traditionnels
+    products.add(Product(
+        id="robe_kabyle",
+        name="Robe Kabyle Prestige",
+        description="Robe traditionnelle kabyle brodée à la main, motifs berbères colorés.",
+        price_cents=15900,
+        stock_qty=10,
+        category="Kabyle"
+    ))
+    products.add(Product(
+        id="abaya_orientale",
+        name="Abaya Orientale Chic",
+        description="Abaya fluide et élégante, tissu léger, finitions dorées.",
+        price_cents=9900,
+        stock_qty=15,
+        category="Orientale"
+    ))
+    products.add(Product(
+        id="caftan_marocain",
+        name="Caftan Marocain Élégance",
+        description="Caftan marocain moderne, ornements dorés et coupe raffinée.",
+        price_cents=18900,
+        stock_qty=8,
+        category="Marocain"
+    ))
+    products.add(Product(
+        id="ferguani",
+        name="Ferguani Tradition",
+        description="Robe ferguani, tissu artisanal, broderies fines.",
+        price_cents=12900,
+        stock_qty=12,
+        category="Algérien"
+    ))
+    products.add(Product(
+        id="tlemcani",
+        name="Tlemcani Authentique",
+        description="Robe tlemcani, coupe traditionnelle, motifs floraux.",
+        price_cents=14900,
+        stock_qty=7,
+        category="Algérien"
+    ))
+
+    # Ajout des produits modernes
+    products.add(Product(
+        id="robe_kabyle_1",
+        name="Robe Kabyle Prestige",
+        description="Broderie berbère, tissu premium.",
+        price_cents=15900,
+        stock_qty=5,
+        category="Kabyle"
+    ))
+    products.add(Product(
+        id="robe_kabyle_2",
+        name="Robe Kabyle Élégance",
+        description="Motifs floraux, coupe moderne.",
+        price_cents=14900,
+        stock_qty=3,
+        category="Kabyle"
+    ))
+    products.add(Product(
+        id="robe_kabyle_3",
+        name="Robe Kabyle Tradition",
+        description="Couleurs vives, ceinture tissée.",
+        price_cents=13900,
+        stock_qty=4,
+        category="Kabyle"
+    ))
+    products.add(Product(
+        id="caftan_1",
+        name="Caftan Marocain Or",
+        description="Ornements dorés, coupe royale.",
+        price_cents=18900,
+        stock_qty=2,
+        category="Caftan"
+    ))
+    products.add(Product(
+        id="caftan_2",
+        name="Caftan Bleu Nuit",
+        description="Velours bleu, broderie argent.",
+        price_cents=17900,
+        stock_qty=3,
+        category="Caftan"
+    ))
+    products.add(Product(
+        id="caftan_3",
+        name="Caftan Classique",
+        description="Coupe traditionnelle, tissu léger.",
+        price_cents=16900,
+        stock_qty=5,
+        category="Caftan"
+    ))
+    products.add(Product(
+        id="abaya_1",
+        name="Abaya Orientale Chic",
+        description="Tissu fluide, finitions dorées.",
+        price_cents=9900,
+        stock_qty=6,
+        category="Abaya"
+    ))
+    products.add(Product(
+        id="abaya_2",
+        name="Abaya Noire Élégante",
+        description="Noir profond, coupe moderne.",
+        price_cents=10900,
+        stock_qty=4,
+        category="Abaya"
+    ))
+    products.add(Product(
+        id="abaya_3",
+        name="Abaya Blanche Pureté",
+        description="Blanc cassé, détails subtils.",
+        price_cents=11900,
+        stock_qty=3,
+        category="Abaya"
+    ))
+    products.add(Product(
+        id="karakou_1",
+        name="Karakou Vert Olive",
+        description="Velours vert, broderie dorée.",
+        price_cents=19900,
+        stock_qty=2,
+        category="Karakou"
+    ))
+    products.add(Product(
+        id="karakou_2",
+        name="Karakou Bordeaux Élégance",
+        description="Bordeaux profond, coupe raffinée.",
+        price_cents=20900,
+        stock_qty=3,
+        category="Karakou"
+    ))
+    products.add(Product(
+        id="karakou_3",
+        name="Karakou Tradition",
+        description="Motifs classiques, tissu premium.",
+        price_cents=18900,
+        stock_qty=2,
+        category="Karakou"
+    ))
+
+def _bind_create(create_fn):
+    """
+    create_order(user_id, items, total_cents, status) appelant create_fn avec l'ordre
+    d'arguments de sa signature, résolu une seule fois (plus d'essais sur TypeError).
+    """
+    try:
+        params = inspect.signature(create_fn).parameters.values()
+    except (TypeError, ValueError):  # signature illisible (builtin) : ordre usuel
+        params = None
+    if params is None or any(p.kind is p.VAR_POSITIONAL for p in params):
+        positional = ["user_id", "items", "total_cents"]
+    else:
+        positional = [p.name for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+
+    if positional and positional[0] in ("items", "lines", "cart_items"):
+        return lambda user_id, items, total_cents, status="PENDING": create_fn(items, user_id, total_cents)
+    if len(positional) >= 3:
+        return lambda user_id, items, total_cents, status="PENDING": create_fn(user_id, items, total_cents)
+    return lambda user_id, items, total_cents, status="PENDING": create_fn(user_id, items)
+
+
+class OrderAdapter:
+    """
+    API OrderBackend sur un service de commande aux noms de méthodes différents.
+    Les méthodes sont liées une fois, à la construction (voir _wrap_order_service).
+    """
+    def __init__(self, raw, create_fn, get_user_fn, get_one_fn, set_status_fn):
+        self._raw = raw
+        # expose underlying storage if present (helpful for debug)
+        self._orders = getattr(raw, "_orders", None)
+        self.create_order = _bind_create(create_fn)
+
+        if get_user_fn:
+            self.get_user_orders = get_user_fn
+        elif callable(getattr(raw, "list_orders", None)):
+            # list all and filter
+            self.get_user_orders = lambda user_id: [
+                o for o in raw.list_orders() if str(o.get("user_id")) == str(user_id)
+            ]
+        else:
+            self.get_user_orders = lambda user_id: []
+
+        self.get_order = get_one_fn or (lambda order_id: None)
+
+        if set_status_fn:
+            self.set_status = set_status_fn
+        elif self._orders is not None:
+            self.set_status = self._set_status_in_memory
+        else:
+            self.set_status = _unsupported("set_status not supported")
+
+    def _set_status_in_memory(self, order_id, status):
+        # best-effort mutate in-memory list
+        for o in self._orders:
+            if o.get("id") == order_id:
+                o["status"] = status
+                return o
+        raise RuntimeError("set_status not supported")
+
 
 def _wrap_order_service(raw):
     """
-    Retourne un adaptateur exposant create_order(user_id, items, total_cents),
+    Retourne un OrderBackend : create_order(user_id, items, total_cents),
     get_user_orders(user_id), get_order(order_id) et set_status(order_id, status).
-    Si raw fournit déjà ces méthodes on les délègue, sinon on tente des noms alternatifs,
-    sinon on fournit un fallback en mémoire (DevOrderService).
+    Si raw fournit déjà ces méthodes on le renvoie tel quel, sinon on lie une fois
+    ses méthodes aux noms alternatifs (OrderAdapter), sinon DevOrderService.
     """
     if not raw:
         return DevOrderService()
 
-    # helper to find an attribute among several possible names
-    def _find_attr(obj, names):
-        for n in names:
-            if hasattr(obj, n):
-                return getattr(obj, n)
-        return None
-
     # if raw already implements full API, return it
-    has_create = hasattr(raw, "create_order")
-    has_get_user = hasattr(raw, "get_user_orders")
-    has_get_one = hasattr(raw, "get_order")
-    has_set_status = hasattr(raw, "set_status")
-
-    if has_create and has_get_user and has_get_one:
+    if all(callable(getattr(raw, n, None)) for n in ("create_order", "get_user_orders", "get_order")):
         return raw
 
     # try to discover equivalent methods
-    create_fn = _find_attr(raw, ("create_order", "create", "place_order", "placeOrder", "createOrder", "make_order", "new_order"))
-    get_user_fn = _find_attr(raw, ("get_user_orders", "list_user_orders", "list_orders_for_user", "orders_for_user", "user_orders"))
-    get_one_fn = _find_attr(raw, ("get_order", "find_order", "order_by_id", "find_by_id"))
-    set_status_fn = _find_attr(raw, ("set_status", "update_status", "mark_paid", "setOrderStatus"))
+    _, create_fn = _find_attr(raw, ("create_order", "create", "place_order", "placeOrder", "createOrder", "make_order", "new_order"))
+    _, get_user_fn = _find_attr(raw, ("get_user_orders", "list_user_orders", "list_orders_for_user", "orders_for_user", "user_orders"))
+    _, get_one_fn = _find_attr(raw, ("get_order", "find_order", "order_by_id", "find_by_id"))
+    _, set_status_fn = _find_attr(raw, ("set_status", "update_status", "mark_paid", "setOrderStatus"))
 
     # if we found nothing for create, fallback to DevOrderService
     if not create_fn:
         return DevOrderService()
 
-    class OrderAdapter:
-        def __init__(self, raw, create_fn, get_user_fn, get_one_fn, set_status_fn):
-            self._raw = raw
-            self._create = create_fn
-            self._get_user = get_user_fn
-            self._get_one = get_one_fn
-            self._set_status = set_status_fn
-            # expose underlying storage if present (helpful for debug)
-            if hasattr(raw, "_orders"):
-                self._orders = getattr(raw, "_orders")
-
-        def create_order(self, user_id, items, total_cents, status="PENDING"):
-            # try to call create with common signatures
-            try:
-                return self._create(user_id, items, total_cents)
-            except TypeError:
-                # maybe signature is (items, user_id, total) or different — try permutations
-                try:
-                    return self._create(items, user_id, total_cents)
-                except Exception:
-                    return self._create(user_id, items)  # best-effort
-
-        def get_user_orders(self, user_id):
-            if self._get_user:
-                return self._get_user(user_id)
-            # try list all and filter if raw exposes list/get_all
-            if hasattr(self._raw, "list_orders"):
-                allo = self._raw.list_orders()
-                return [o for o in allo if str(o.get("user_id")) == str(user_id)]
-            return []
-
-        def get_order(self, order_id):
-            if self._get_one:
-                return self._get_one(order_id)
-            if hasattr(self._raw, "find_order"):
-                return self._raw.find_order(order_id)
-            return None
+    return OrderAdapter(raw, create_fn, get_user_fn, get_one_fn, set_status_fn)
+
+# ----- construction paresseuse -----
+# Rien n'est construit à l'import (app.domain n'est même pas importé) : repositories,
+# catalogue initial et tables de DevOrderService le sont au premier accès à un
+# service, une seule fois par processus (partagés par toutes les applications du
+# processus, comme les anciennes variables de module).
+
+_lock = threading.RLock()
+
+
+def _once(factory):
+    value = []
+
+    @wraps(factory)
+    def wrapper():
+        if not value:
+            with _lock:
+                if not value:
+                    value.append(factory())
+        return value[0]
+    wrapper.reset = value.clear
+    return wrapper
+
+
+@_once
+def repositories():
+    """Repositories du domaine (backend choisi par DOMAIN_BACKEND), restaurés et amorcés."""
+    from app.domain import OrderRepository
+    from app.repositories import create_repositories
+    repos = create_repositories()
+    # Persistance optionnelle des repositories en mémoire (instantané + journal)
+    if os.environ.get("DOMAIN_STORE_DIR") and isinstance(repos["orders"], OrderRepository):
+        from app.domain_store import DomainStore
+        store = DomainStore(
+            os.environ["DOMAIN_STORE_DIR"],
+            snapshot_every=int(os.environ.get("DOMAIN_STORE_SNAPSHOT_EVERY", 100_000)),
+        )
+        store.load_into(repos)
+        store.attach(repos)
+    if not repos["products"].list_all():
+        _seed_products(repos["products"])
+    return repos
+
+
+@_once
+def _sessions():
+    from app.domain import SessionManager
+    return SessionManager()
+
+
+@_once
+def _gateway():
+    from app.payment_gateway import StandInGateway
+    return StandInGateway(float(os.environ.get("PAYMENT_GATEWAY_LATENCY", 0) or 0))
+
+
+@_once
+def _auth():
+    # créer auth en passant users/sessions (conserver cette instance)
+    return AuthService(repositories()["users"], _sessions())
+
+
+@_once
+def _catalog():
+    from app.domain import CatalogService
+    return CatalogService(repositories()["products"])
+
+
+@_once
+def _cart():
+    from app.domain import CartService
+    repos = repositories()
+    return CartAdapter(CartService(repos["carts"], repos["products"]))
+
+
+@_once
+def _order():
+    from app.domain import BillingService, DeliveryService, OrderService
+    repos = repositories()
+    # tentative de création du service de commande, fallback sur DevOrderService en cas d'échec
+    try:
+        raw = OrderService(repos["orders"], repos["products"], repos["carts"], repos["payments"],
+                           repos["invoices"], BillingService(repos["invoices"]), DeliveryService(),
+                           _gateway(), repos["users"])
+    except Exception:
+        raw = DevOrderService()
+    # wrap the raw order service instance to guarantee the expected API
+    try:
+        return _wrap_order_service(raw)
+    except Exception:
+        return DevOrderService()
 
-        def set_status(self, order_id, status):
-            if self._set_status:
-                return self._set_status(order_id, status)
-            # best-effort mutate in-memory list if present
-            if hasattr(self, "_orders"):
-                for o in self._orders:
-                    if o.get("id") == order_id:
-                        o["status"] = status
-                        return o
-            raise RuntimeError("set_status not supported")
 
-    return OrderAdapter(raw, create_fn, get_user_fn, get_one_fn, set_status_fn)
+FACTORIES = {
+    "auth": _auth,
+    "products": lambda: repositories()["products"],
+    "catalog": _catalog,
+    "cart": _cart,
+    "order": _order,
+    "payment": _gateway,
+}
+
+
+class LazyServices(MutableMapping):
+    """
+    app.extensions["services"] : chaque service est construit au premier accès.
+    Un service posé explicitement (services["auth"] = ..., tests) remplace la fabrique.
+    """
+    def __init__(self, factories):
+        self._factories = dict(factories)
+        self._built = {}
+
+    def __getitem__(self, name):
+        if name not in self._built:
+            self._built[name] = self._factories[name]()
+        return self._built[name]
+
+    def __setitem__(self, name, value):
+        self._built[name] = value
+        self._factories.setdefault(name, None)
+
+    def __delitem__(self, name):
+        del self._factories[name]
+        self._built.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+
+def __getattr__(name):
+    # compatibilité : from app.services_init import products, catalog, auth...
+    if name in FACTORIES:
+        return FACTORIES[name]()
+    if name in ("users", "carts", "orders", "invoices", "payments", "threads"):
+        return repositories()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_service(name):
+    """Service de l'application courante (construit au premier appel)."""
+    from flask import current_app
+    return current_app.extensions["services"][name]
 
-# wrap the raw order service instance to guarantee the expected API
-try:
-    wrapped_order_svc = _wrap_order_service(order_svc)
-except Exception:
-    wrapped_order_svc = DevOrderService()
 
 def init_services(app):
-    services = {
-        "auth": auth,
-        "products": products,
-        "cart": CartAdapter(cart_svc),
-        "order": wrapped_order_svc,
-        "payment": gateway,
-    }
-    app.extensions = getattr(app, "extensions", {})
+    services = LazyServices(FACTORIES)
     app.extensions["services"] = services
     return services
@@ -0,0 +1,351 @@
+"""
+Sessions Flask stockées côté serveur.
+
+Par défaut Flask met tout le contenu de la session (panier, wishlist, paiement en
+attente...) dans le cookie signé : il est re-sérialisé, re-signé et renvoyé à chaque
+réponse, et dépasse la limite de taille pour les gros paniers. Ici le cookie ne
+contient plus qu'un identifiant signé ; les données sont dans un backend :
+
+- SQLiteSessionBackend     : table session_store d'un fichier SQLite (SESSION_SQLITE_PATH)
+- FileSystemSessionBackend : un fichier par session (SESSION_FILE_DIR)
+
+Les données ne sont lues qu'au premier accès à la session (chargement paresseux) et
+ne sont réécrites que si la session a été modifiée. Les sessions expirées sont
+supprimées par lots, toutes les SESSION_SWEEP_EVERY sauvegardes.
+
+Fixation de session : quand user_id ou is_admin change (connexion, déconnexion,
+changement de privilèges), la session reçoit un nouvel identifiant et l'ancienne
+entrée du backend est supprimée ; un sid posé avant la connexion ne vaut plus rien
+après. regenerate(session) force cette rotation depuis une vue.
+
+Activation : SESSION_BACKEND = "sqlite" ou "filesystem" (défaut "cookie" = comportement Flask).
+"""
+from pathlib import Path
+import os
+import pickle
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+
+COMPRESS_MIN_SIZE = 512
+_RAW, _ZLIB = b"\x00", b"\x01"
+
+
+def encode(data: dict) -> bytes:
+    """Encodage binaire compact : pickle (protocole 5), compressé au-delà de 512 octets."""
+    raw = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(raw) >= COMPRESS_MIN_SIZE:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return _ZLIB + packed
+    return _RAW + raw
+
+
+def decode(blob: bytes) -> dict:
+    if not blob:
+        return {}
+    flag, body = blob[:1], blob[1:]
+    if flag == _ZLIB:
+        body = zlib.decompress(body)
+    return pickle.loads(body)
+
+
+# clés dont le changement donne un nouvel identifiant de session
+PRIVILEGED_KEYS = frozenset({"user_id", "is_admin"})
+
+
+class ServerSideSession(SessionMixin):
+    """Session dont le contenu n'est chargé depuis le backend qu'au premier accès."""
+    def __init__(self, sid, loader=None, new=False):
+        self.sid = sid
+        self._loader = loader
+        self._data = {} if new else None
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        self.rotated_from = None
+
+    def rotate(self):
+        """Nouvel identifiant ; l'ancien sera supprimé du backend à la sauvegarde."""
+        self._load()
+        if self.rotated_from is None and not self.new:
+            self.rotated_from = self.sid
+        self.sid = secrets.token_hex(32)
+        self.new = True
+        self.modified = True
+
+    def _load(self):
+        self.accessed = True
+        if self._data is None:
+            self._data = (self._loader(self.sid) if self._loader else None) or {}
+        return self._data
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        data = self._load()
+        if key in PRIVILEGED_KEYS and data.get(key) != value:
+            self.rotate()
+        data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        data = self._load()
+        if key in PRIVILEGED_KEYS and key in data:
+            self.rotate()
+        del data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __contains__(self, key):
+        return key in self._load()
+
+    def clear(self):
+        if self._load():
+            self._data.clear()
+            self.modified = True
+
+
+class SQLiteSessionBackend:
+    def __init__(self, path):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_store (
+                sid TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_session_store_expires ON session_store (expires_at)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def load(self, sid):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT data FROM session_store WHERE sid = ? AND expires_at > ?", (sid, time.time())
+        ).fetchone()
+        conn.close()
+        return decode(row[0]) if row else None
+
+    def save(self, sid, data: dict, expires_at: float):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO session_store (sid, data, expires_at) VALUES (?, ?, ?)",
+            (sid, encode(data), expires_at),
+        )
+        conn.commit()
+        conn.close()
+
+    def delete(self, sid):
+        conn = self._connect()
+        conn.execute("DELETE FROM session_store WHERE sid = ?", (sid,))
+        conn.commit()
+        conn.close()
+
+    def sweep(self, batch=500):
+        """Supprime au plus `batch` sessions expirées ; retourne le nombre supprimé."""
+        conn = self._connect()
+        cur = conn.execute(
+            "DELETE FROM session_store WHERE sid IN "
+            "(SELECT sid FROM session_store WHERE expires_at <= ? LIMIT ?)",
+            (time.time(), batch),
+        )
+        conn.commit()
+        n = cur.rowcount
+        conn.close()
+        return n
+
+
+class FileSystemSessionBackend:
+    """
+    Un fichier par session : 8 octets d'expiration puis les données encodées.
+    Les fichiers sont répartis dans 256 sous-dossiers (2 premiers caractères du sid),
+    ce qui permet au balayage de reprendre où il s'était arrêté.
+    """
+    _HEADER = struct.Struct("<d")
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._next_shard = 0
+        self._lock = threading.Lock()
+
+    def _path(self, sid):
+        return self.directory / sid[:2] / sid
+
+    def load(self, sid):
+        try:
+            blob = self._path(sid).read_bytes()
+        except (FileNotFoundError, OSError):
+            return None
+        (expires_at,) = self._HEADER.unpack_from(blob)
+        if expires_at <= time.time():
+            return None
+        return decode(blob[self._HEADER.size:])
+
+    def save(self, sid, data: dict, expires_at: float):
+        path = self._path(sid)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f".{sid}.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_bytes(self._HEADER.pack(expires_at) + encode(data))
+        os.replace(tmp, path)  # écriture atomique
+
+    def delete(self, sid):
+        try:
+            self._path(sid).unlink()
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, batch=500):
+        """
+        Parcourt les sous-dossiers à partir du dernier visité et supprime au plus
+        `batch` sessions expirées ; le balayage suivant reprend là où il s'est arrêté.
+        """
+        removed = 0
+        now = time.time()
+        for _ in range(256):
+            with self._lock:
+                shard = f"{self._next_shard:02x}"
+            try:
+                entries = os.scandir(self.directory / shard)
+            except FileNotFoundError:
+                entries = None
+            if entries is not None:
+                with entries:
+                    for entry in entries:
+                        if removed >= batch:
+                            return removed
+                        try:
+                            with open(entry.path, "rb") as f:
+                                (expires_at,) = self._HEADER.unpack(f.read(self._HEADER.size))
+                            if expires_at <= now:
+                                os.unlink(entry.path)
+                                removed += 1
+                        except (OSError, struct.error):
+                            continue
+            with self._lock:
+                self._next_shard = (self._next_shard + 1) % 256
+        return removed
+
+
+class ServerSideSessionInterface(SessionInterface):
+    salt = "elegance-session"
+
+    def __init__(self, backend, sweep_every=1000, sweep_batch=500):
+        self.backend = backend
+        self.sweep_every = sweep_every
+        self.sweep_batch = sweep_batch
+        self._saves = 0
+        self._lock = threading.Lock()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("ascii")
+                return ServerSideSession(sid, loader=self.backend.load)
+            except BadSignature:
+                pass
+        return ServerSideSession(secrets.token_hex(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.rotated_from:
+            # identifiant remplacé (connexion, privilèges) : l'ancien ne doit plus rien ouvrir
+            self.backend.delete(session.rotated_from)
+        if not session.modified:
+            # rien n'a changé : ni écriture backend ni nouveau cookie
+            return
+        if not session.loaded or not len(session):
+            if not session.new or session.rotated_from:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        expires = self.get_expiration_time(app, session)
+        expires_at = expires.timestamp() if expires else time.time() + app.permanent_session_lifetime.total_seconds()
+        self.backend.save(session.sid, dict(session), expires_at)
+        self._maybe_sweep()
+
+        if session.new or session.permanent:
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid.encode("ascii")).decode("ascii"),
+                expires=expires,
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+    def _maybe_sweep(self):
+        with self._lock:
+            self._saves += 1
+            due = self._saves % self.sweep_every == 0
+        if due:
+            try:
+                self.backend.sweep(self.sweep_batch)
+            except Exception:
+                pass
+
+
+def regenerate(session):
+    """
+    Nouvel identifiant pour la session courante (après connexion ou changement de
+    privilèges). Sans effet sur les sessions cookie de Flask, qui n'ont pas d'identifiant.
+    """
+    rotate = getattr(session, "rotate", None)
+    if rotate is not None:
+        rotate()
+
+
+def init_app(app):
+    kind = app.config.get("SESSION_BACKEND", "cookie")
+    if kind == "cookie":
+        return None
+    instance = Path(__file__).resolve().parents[1] / "instance"
+    if kind == "sqlite":
+        backend = SQLiteSessionBackend(app.config.get("SESSION_SQLITE_PATH") or instance / "sessions.db")
+    elif kind == "filesystem":
+        backend = FileSystemSessionBackend(app.config.get("SESSION_FILE_DIR") or instance / "sessions")
+    else:
+        raise ValueError(f"SESSION_BACKEND inconnu: {kind}")
+    app.session_interface = ServerSideSessionInterface(
+        backend,
+        sweep_every=int(app.config.get("SESSION_SWEEP_EVERY", 1000)),
+        sweep_batch=int(app.config.get("SESSION_SWEEP_BATCH", 500)),
+    )
+    return app.session_interface
@@ -0,0 +1,350 @@
+"""
+Cache du catalogue partagé entre workers : fichier à disposition fixe, projeté en
+mémoire (mmap) par tous les processus.
+
+Disposition du fichier
+  en-tête (64 octets) : magic, génération (u64), version de disposition (u64),
+                        nombre de produits (u32), capacité (u32),
+                        génération du catalogue en base reproduite (u64)
+  enregistrements     : id (64 octets utf-8), prix en centimes (i64), stock (i64),
+                        product.version (i64), actif
+
+Écriture : n'importe quel processus, sous verrou exclusif flock sur le fichier. La
+génération est impaire pendant l'écriture et paire ensuite (seqlock) ; chaque écriture
+l'incrémente. La version de disposition ne change que si des produits sont ajoutés.
+
+Lecture : sans verrou ni copie (struct.unpack_from sur le mmap). Une lecture relit la
+génération avant et après : si elle a changé ou est impaire, on recommence. Un worker
+peut donc vérifier que ses données dérivées sont à jour en comparant un entier
+(`generation`) au lieu d'interroger SQLite ; une modification est visible dès la
+requête suivante dans tous les workers.
+
+Le fichier reproduit la base jusqu'à une génération du catalogue (catalogue_meta,
+app/product_versions.py) notée dans l'en-tête : sync_from_db() y reporte les
+produits notés depuis dans catalogue_log (tout le catalogue si le journal ne remonte
+plus assez loin), sous le verrou d'écriture et seulement vers une génération plus
+récente. Une fois le fichier configuré, catalogue_version() et product_version()
+le lisent au lieu d'interroger SQLite : ETag, clés du cache et instantané PRELOAD
+sont validés par une lecture en mémoire. Le fichier est resynchronisé après chaque
+commit SQLAlchemy qui touche un Product (visible dès la requête suivante dans tous
+les workers) et, pour les écrivains hors ORM (sqlite3 brut, scripts), au plus
+toutes les SHARED_CATALOGUE_SYNC secondes par worker (défaut 5, 0 pour désactiver),
+au début d'une requête.
+
+Activation : SHARED_CATALOGUE_PATH (config ou variable d'environnement).
+"""
+from collections import namedtuple
+import fcntl
+import mmap
+import os
+import struct
+import time
+
+from flask import current_app, has_app_context
+
+MAGIC = b"ELGCAT2\x00"
+_HEADER = struct.Struct("<8sQQIIQ")  # magic, generation, layout, count, capacity, source
+_HEADER_SIZE = 64
+_RECORD = struct.Struct("<64sqqq?7x")  # id, price_cents, stock_qty, version, active
+_GEN = struct.Struct("<Q")
+_GEN_OFFSET = 8
+_SOURCE_OFFSET = 32
+_SPIN = 1000
+
+SharedProduct = namedtuple("SharedProduct", "price_cents stock_qty active version")
+
+
+class SharedCatalogue:
+    def __init__(self, path, capacity=4096):
+        self.path = str(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            magic = os.pread(self._fd, len(MAGIC), 0)
+            if os.fstat(self._fd).st_size < _HEADER_SIZE or (magic != MAGIC and magic.startswith(b"ELGCAT")):
+                # fichier neuf ou d'une disposition antérieure : à remplir depuis la base
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, _HEADER_SIZE + capacity * _RECORD.size)
+                header = _HEADER.pack(MAGIC, 0, 0, 0, capacity, 0)
+                os.pwrite(self._fd, header, 0)
+            elif magic != MAGIC:
+                raise ValueError(f"{self.path} n'est pas un catalogue partagé")
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = None
+        self._capacity = 0
+        self._layout = None
+        self._index = {}
+        self._map()
+
+    # ----- projection / index -----
+
+    def _map(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+        self._capacity = _HEADER.unpack_from(self._mm)[4]
+
+    def _header(self):
+        _, generation, layout, count, capacity, _ = _HEADER.unpack_from(self._mm)
+        return generation, layout, count, capacity
+
+    def _sync_layout(self):
+        """Reprojette le fichier s'il a grandi et reconstruit l'index id -> position si besoin."""
+        _, layout, count, capacity = self._header()
+        if capacity != self._capacity:
+            self._map()
+        if layout != self._layout:
+            index = {}
+            for slot in range(count):
+                raw = _RECORD.unpack_from(self._mm, _HEADER_SIZE + slot * _RECORD.size)[0]
+                index[raw.rstrip(b"\x00").decode("utf-8")] = slot
+            self._index, self._layout = index, layout
+
+    @property
+    def generation(self) -> int:
+        return _GEN.unpack_from(self._mm, _GEN_OFFSET)[0]
+
+    @property
+    def catalogue_generation(self) -> int:
+        """Génération du catalogue en base reproduite par le fichier (0 : jamais rempli)."""
+        return self._read(lambda: _GEN.unpack_from(self._mm, _SOURCE_OFFSET)[0])
+
+    # ----- lecture -----
+
+    def _read(self, fn):
+        """Lecture cohérente (seqlock) ; repli sur un verrou partagé si un écrivain tarde."""
+        for _ in range(_SPIN):
+            before = self.generation
+            if before & 1:
+                continue
+            try:
+                self._sync_layout()
+                result = fn()
+            except (UnicodeDecodeError, struct.error, ValueError):
+                # lecture déchirée par une écriture concurrente : index à reconstruire
+                self._layout = None
+                continue
+            if self.generation == before:
+                return result
+        fcntl.flock(self._fd, fcntl.LOCK_SH)
+        try:
+            self._sync_layout()
+            return fn()
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _record(self, slot):
+        _, price, stock, version, active = _RECORD.unpack_from(self._mm, _HEADER_SIZE + slot * _RECORD.size)
+        return SharedProduct(price, stock, active, version)
+
+    def get(self, product_id):
+        def read():
+            slot = self._index.get(product_id)
+            return None if slot is None else self._record(slot)
+        return self._read(read)
+
+    def rows(self):
+        """Liste cohérente de (id, price_cents, stock_qty, active, version)."""
+        def read():
+            return [(pid, *self._record(slot)) for pid, slot in self._index.items()]
+        return self._read(read)
+
+    def __len__(self):
+        return self._header()[2]
+
+    # ----- écriture -----
+
+    def _write(self, fn):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            self._sync_layout()
+            generation = self.generation
+            _GEN.pack_into(self._mm, _GEN_OFFSET, generation | 1)
+            try:
+                fn()
+            finally:
+                _GEN.pack_into(self._mm, _GEN_OFFSET, (generation | 1) + 1)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        os.ftruncate(self._fd, _HEADER_SIZE + capacity * _RECORD.size)
+        struct.pack_into("<I", self._mm, 28, capacity)
+        self._map()
+
+    def _put(self, slot, product_id, price_cents, stock_qty, active, version=0):
+        key = product_id.encode("utf-8")
+        if len(key) > 64:
+            raise ValueError(f"identifiant produit trop long: {product_id}")
+        _RECORD.pack_into(self._mm, _HEADER_SIZE + slot * _RECORD.size,
+                          key, int(price_cents or 0), int(stock_qty or 0), int(version or 0), bool(active))
+
+    def _stale(self, catalogue_generation):
+        # une synchronisation plus récente est déjà passée : ne pas revenir en arrière
+        return catalogue_generation is not None and catalogue_generation <= _GEN.unpack_from(self._mm, _SOURCE_OFFSET)[0]
+
+    def _set_source(self, catalogue_generation):
+        if catalogue_generation is not None:
+            _GEN.pack_into(self._mm, _SOURCE_OFFSET, catalogue_generation)
+
+    def _set_layout(self, count):
+        _, layout, _, _ = self._header()
+        struct.pack_into("<QI", self._mm, 16, layout + 1, count)
+        self._sync_layout()
+
+    def publish(self, rows, catalogue_generation=None):
+        """
+        Remplace tout le contenu ; rows : (id, price_cents, stock_qty, active[, version]).
+        catalogue_generation : génération en base que reproduit le contenu (ignoré s'il
+        n'est pas plus récent que celui du fichier).
+        """
+        rows = list(rows)
+
+        def write():
+            if self._stale(catalogue_generation):
+                return
+            if len(rows) > self._capacity:
+                self._grow(len(rows))
+            for slot, row in enumerate(rows):
+                self._put(slot, *row)
+            self._set_layout(len(rows))
+            self._set_source(catalogue_generation)
+        self._write(write)
+
+    def upsert(self, rows, catalogue_generation=None):
+        """Met à jour (ou ajoute) les produits donnés, en une seule génération."""
+        rows = list(rows)
+
+        def write():
+            if self._stale(catalogue_generation):
+                return
+            count = len(self._index)
+            added = 0
+            for row in rows:
+                slot = self._index.get(row[0])
+                if slot is None:
+                    slot = count + added
+                    if slot >= self._capacity:
+                        self._grow(slot + 1)
+                    added += 1
+                self._put(slot, *row)
+            if added:
+                self._set_layout(count + added)
+            self._set_source(catalogue_generation)
+        self._write(write)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        os.close(self._fd)
+
+
+# ----- intégration Flask / SQLAlchemy -----
+
+_COLUMNS = "id, price_cents, stock_qty, COALESCE(active, 1), version"
+
+
+def publish_from_db(catalogue):
+    """Recopie tout le catalogue, avec la génération lue juste avant les lignes."""
+    from sqlalchemy import text
+    from app.models import db
+    with db.engine.connect() as connection:
+        generation = connection.execute(text("SELECT generation FROM catalogue_meta WHERE id = 1")).scalar() or 0
+        rows = connection.execute(text(f"SELECT {_COLUMNS} FROM product ORDER BY id")).all()
+    catalogue.publish(rows, generation)
+
+
+def sync_from_db(catalogue):
+    """Reporte les produits changés en base depuis la génération du fichier ; False s'il était à jour."""
+    from sqlalchemy import bindparam, text
+    from app.models import db
+    from app.product_versions import changes_since
+    known = catalogue.catalogue_generation
+    with db.engine.connect() as connection:
+        current, changes = changes_since(connection, known)
+        if current == known:
+            return False
+        if changes is None:  # journal trop court (ou fichier neuf) : tout recopier
+            rows = connection.execute(text(f"SELECT {_COLUMNS} FROM product ORDER BY id")).all()
+            catalogue.publish(rows, current)
+            return True
+        ids = {pid for pid, _, _ in changes}
+        rows = connection.execute(
+            text(f"SELECT {_COLUMNS} FROM product WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": sorted(ids)},
+        ).all()
+    # produits supprimés : gardés inactifs, version 0 (absents pour product_version)
+    found = {row[0] for row in rows}
+    rows = list(rows) + [(pid, 0, 0, False, 0) for pid in sorted(ids - found)]
+    catalogue.upsert(rows, current)
+    return True
+
+
+def get_shared_catalogue():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("shared_catalogue")
+
+
+def _collect_changes(session, flush_context):
+    from app.models import Product
+    if any(isinstance(obj, Product) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info["shared_catalogue_changed"] = True
+
+
+def _push_changes(session):
+    changed = session.info.pop("shared_catalogue_changed", None)
+    catalogue = get_shared_catalogue()
+    if changed and catalogue is not None:
+        sync_from_db(catalogue)
+
+
+def _drop_changes(session):
+    session.info.pop("shared_catalogue_changed", None)
+
+
+def _sync_before_request():
+    # écrivains hors ORM : au plus une lecture de catalogue_meta par intervalle et par worker
+    app = current_app._get_current_object()
+    state = app.extensions["shared_catalogue_sync"]
+    now = time.monotonic()
+    if now - state["at"] >= state["every"]:
+        state["at"] = now
+        try:
+            sync_from_db(app.extensions["shared_catalogue"])
+        except Exception:
+            app.logger.exception("catalogue partagé : synchronisation impossible")
+
+
+_listening = False
+
+
+def init_app(app):
+    global _listening
+    path = app.config.get("SHARED_CATALOGUE_PATH") or os.environ.get("SHARED_CATALOGUE_PATH")
+    if not path:
+        return None
+    catalogue = SharedCatalogue(path)
+    app.extensions["shared_catalogue"] = catalogue
+    with app.app_context():
+        try:
+            sync_from_db(catalogue)
+        except Exception:
+            pass  # table absente (base neuve) : rempli au premier commit
+    every = float(app.config.get("SHARED_CATALOGUE_SYNC", os.environ.get("SHARED_CATALOGUE_SYNC", 5)))
+    if every:
+        app.extensions["shared_catalogue_sync"] = {"every": every, "at": time.monotonic()}
+        app.before_request(_sync_before_request)
+    if not _listening:
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        event.listen(Session, "after_flush", _collect_changes)
+        event.listen(Session, "after_commit", _push_changes)
+        event.listen(Session, "after_rollback", _drop_changes)
+        _listening = True
+    return catalogue
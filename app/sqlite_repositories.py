@@ -0,0 +1,327 @@
+"""
+Repositories du domaine stockés dans SQLite (même interface que les repositories en
+mémoire de app/domain.py, voir les protocoles UserRepo, OrderRepo...).
+
+- les produits ont des colonnes réelles : la réservation de stock est un UPDATE
+  conditionnel atomique, sûr entre plusieurs workers
+- les autres entités (commande avec ses lignes et sa livraison, panier, facture...)
+  sont sérialisées en pickle dans une colonne `data`, avec à côté les colonnes
+  nécessaires aux index (utilisateur, statut, date)
+- une connexion par thread, en mode WAL et en autocommit ; transaction() regroupe
+  plusieurs écritures (BEGIN IMMEDIATE : verrou d'écriture pris dès le début, pas
+  d'échec de promotion au milieu) : la commande entière est validée ou annulée
+
+get() renvoie une copie : après modification, il faut appeler update()/save(),
+comme le font déjà les services du domaine.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import pickle
+import sqlite3
+import threading
+from typing import List, Optional
+
+from app.domain import Cart, MessageThread, Order, OrderStatus, Product, User
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS domain_user (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domain_product (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    price_cents INTEGER NOT NULL,
+    stock_qty INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    active INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domain_cart (
+    user_id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domain_order (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    status_seq INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_domain_order_user ON domain_order (user_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_domain_order_status ON domain_order (status, status_seq);
+CREATE INDEX IF NOT EXISTS ix_domain_order_seq ON domain_order (status_seq);
+CREATE INDEX IF NOT EXISTS ix_domain_order_created ON domain_order (created_at);
+CREATE TABLE IF NOT EXISTS domain_invoice (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domain_payment (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domain_thread (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    closed INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_domain_thread_user ON domain_thread (user_id);
+CREATE INDEX IF NOT EXISTS ix_domain_thread_closed ON domain_thread (closed);
+"""
+
+
+def _dump(entity) -> bytes:
+    return pickle.dumps(entity, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load(blob):
+    return pickle.loads(blob) if blob is not None else None
+
+
+class SQLiteDomainDatabase:
+    """Fichier SQLite partagé par les repositories ; une connexion par thread."""
+    def __init__(self, path):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.conn.executescript(_SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT sur la connexion du thread, ROLLBACK si le bloc lève."""
+        conn = self.conn
+        if conn.in_transaction:
+            yield conn  # bloc imbriqué : le bloc extérieur valide
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteUserRepository:
+    def __init__(self, db: SQLiteDomainDatabase):
+        self.db = db
+
+    def add(self, user: User):
+        self.db.conn.execute(
+            "INSERT OR REPLACE INTO domain_user (id, email, data) VALUES (?, ?, ?)",
+            (user.id, user.email.lower(), _dump(user)),
+        )
+
+    def get(self, user_id: str) -> Optional[User]:
+        row = self.db.conn.execute("SELECT data FROM domain_user WHERE id = ?", (user_id,)).fetchone()
+        return _load(row[0]) if row else None
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        row = self.db.conn.execute("SELECT data FROM domain_user WHERE email = ?", (email.lower(),)).fetchone()
+        return _load(row[0]) if row else None
+
+
+class SQLiteProductRepository:
+    _COLUMNS = "id, name, description, price_cents, stock_qty, category, active"
+
+    def __init__(self, db: SQLiteDomainDatabase):
+        self.db = db
+
+    @staticmethod
+    def _row(row) -> Product:
+        return Product(*row[:6], active=bool(row[6]))
+
+    def add(self, product: Product):
+        # upsert plutôt que REPLACE : conserve le rowid, donc l'ordre de list_all()
+        self.db.conn.execute(
+            f"INSERT INTO domain_product ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name, description = excluded.description, "
+            "price_cents = excluded.price_cents, stock_qty = excluded.stock_qty, "
+            "category = excluded.category, active = excluded.active",
+            (product.id, product.name, product.description, product.price_cents,
+             product.stock_qty, product.category, int(product.active)),
+        )
+
+    def get(self, product_id: str) -> Optional[Product]:
+        row = self.db.conn.execute(
+            f"SELECT {self._COLUMNS} FROM domain_product WHERE id = ?", (product_id,)
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def list_all(self) -> List[Product]:
+        rows = self.db.conn.execute(f"SELECT {self._COLUMNS} FROM domain_product ORDER BY rowid")
+        return [self._row(r) for r in rows]
+
+    def list_active(self) -> List[Product]:
+        rows = self.db.conn.execute(
+            f"SELECT {self._COLUMNS} FROM domain_product WHERE active = 1 ORDER BY rowid"
+        )
+        return [self._row(r) for r in rows]
+
+    def reserve_stock(self, product_id: str, qty: int):
+        # vérification et décrément dans la même requête : pas de survente entre workers
+        cur = self.db.conn.execute(
+            "UPDATE domain_product SET stock_qty = stock_qty - ? WHERE id = ? AND stock_qty >= ?",
+            (qty, product_id, qty),
+        )
+        if cur.rowcount != 1:
+            raise ValueError("Stock insuffisant.")
+
+    def release_stock(self, product_id: str, qty: int):
+        self.db.conn.execute(
+            "UPDATE domain_product SET stock_qty = stock_qty + ? WHERE id = ?", (qty, product_id)
+        )
+
+    def transaction(self):
+        return self.db.transaction()
+
+
+class SQLiteCartRepository:
+    def __init__(self, db: SQLiteDomainDatabase):
+        self.db = db
+
+    def add(self, cart: Cart):
+        self.save(cart)
+
+    def get_or_create(self, user_id: str) -> Cart:
+        row = self.db.conn.execute("SELECT data FROM domain_cart WHERE user_id = ?", (user_id,)).fetchone()
+        if row:
+            return _load(row[0])
+        cart = Cart(user_id=user_id)
+        self.save(cart)
+        return cart
+
+    def save(self, cart: Cart):
+        self.db.conn.execute(
+            "INSERT OR REPLACE INTO domain_cart (user_id, data) VALUES (?, ?)", (cart.user_id, _dump(cart))
+        )
+
+    def clear(self, user_id: str):
+        self.save(Cart(user_id=user_id))
+
+
+class SQLiteOrderRepository:
+    """
+    status_seq reproduit l'ordre d'arrivée dans un statut de l'index en mémoire :
+    il prend une nouvelle valeur (max + 1) à l'insertion et à chaque changement de statut.
+    """
+    def __init__(self, db: SQLiteDomainDatabase):
+        self.db = db
+
+    def add(self, order: Order):
+        self.update(order)
+
+    def get(self, order_id: str) -> Optional[Order]:
+        row = self.db.conn.execute("SELECT data FROM domain_order WHERE id = ?", (order_id,)).fetchone()
+        return _load(row[0]) if row else None
+
+    def update(self, order: Order):
+        self.db.conn.execute(
+            """
+            INSERT INTO domain_order (id, user_id, status, status_seq, created_at, data)
+            VALUES (?, ?, ?, (SELECT COALESCE(MAX(status_seq), 0) + 1 FROM domain_order), ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                data = excluded.data,
+                status = excluded.status,
+                status_seq = CASE WHEN domain_order.status = excluded.status
+                                  THEN domain_order.status_seq ELSE excluded.status_seq END
+            """,
+            (order.id, order.user_id, int(order.status), order.created_at, _dump(order)),
+        )
+
+    def list_by_user(self, user_id: str) -> List[Order]:
+        rows = self.db.conn.execute(
+            "SELECT data FROM domain_order WHERE user_id = ? ORDER BY rowid", (user_id,)
+        )
+        return [_load(r[0]) for r in rows]
+
+    def list_by_status(self, status: OrderStatus, limit: Optional[int] = None) -> List[Order]:
+        rows = self.db.conn.execute(
+            "SELECT data FROM domain_order WHERE status = ? ORDER BY status_seq LIMIT ?",
+            (int(status), -1 if limit is None else limit),
+        )
+        return [_load(r[0]) for r in rows]
+
+    def count_by_status(self, status: OrderStatus) -> int:
+        return self.db.conn.execute(
+            "SELECT COUNT(*) FROM domain_order WHERE status = ?", (int(status),)
+        ).fetchone()[0]
+
+    def list_created_between(self, start: float, end: float) -> List[Order]:
+        """Commandes créées dans [start, end), par date croissante."""
+        rows = self.db.conn.execute(
+            "SELECT data FROM domain_order WHERE created_at >= ? AND created_at < ? ORDER BY created_at, id",
+            (start, end),
+        )
+        return [_load(r[0]) for r in rows]
+
+
+class _SQLiteBlobRepository:
+    _table = ""
+
+    def __init__(self, db: SQLiteDomainDatabase):
+        self.db = db
+
+    def add(self, entity):
+        self.db.conn.execute(
+            f"INSERT OR REPLACE INTO {self._table} (id, data) VALUES (?, ?)", (entity.id, _dump(entity))
+        )
+
+    def get(self, entity_id: str):
+        row = self.db.conn.execute(f"SELECT data FROM {self._table} WHERE id = ?", (entity_id,)).fetchone()
+        return _load(row[0]) if row else None
+
+
+class SQLiteInvoiceRepository(_SQLiteBlobRepository):
+    _table = "domain_invoice"
+
+
+class SQLitePaymentRepository(_SQLiteBlobRepository):
+    _table = "domain_payment"
+
+
+class SQLiteThreadRepository:
+    def __init__(self, db: SQLiteDomainDatabase):
+        self.db = db
+
+    def add(self, thread: MessageThread):
+        self.update(thread)
+
+    def get(self, thread_id: str) -> Optional[MessageThread]:
+        row = self.db.conn.execute("SELECT data FROM domain_thread WHERE id = ?", (thread_id,)).fetchone()
+        return _load(row[0]) if row else None
+
+    def update(self, thread: MessageThread):
+        self.db.conn.execute(
+            "INSERT INTO domain_thread (id, user_id, closed, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET closed = excluded.closed, data = excluded.data",
+            (thread.id, thread.user_id, int(thread.closed), _dump(thread)),
+        )
+
+    def list_by_user(self, user_id: str) -> List[MessageThread]:
+        rows = self.db.conn.execute("SELECT data FROM domain_thread WHERE user_id = ? ORDER BY rowid", (user_id,))
+        return [_load(r[0]) for r in rows]
+
+    def list_open(self) -> List[MessageThread]:
+        rows = self.db.conn.execute("SELECT data FROM domain_thread WHERE closed = 0 ORDER BY rowid")
+        return [_load(r[0]) for r in rows]
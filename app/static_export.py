@@ -0,0 +1,281 @@
+"""
+Export statique des pages publiques (catalogue, catégories, fiches produit) en HTML
+précompressé, servi directement par le serveur web frontal.
+
+Chaque page est rendue par l'application elle-même (client de test : même HTML que
+les workers, sans partie personnelle grâce à app/fragments.py) puis écrite dans
+STATIC_EXPORT_DIR avec ses versions .gz / .br :
+
+    /catalogue            -> catalogue.html
+    /catalogue/<cat>      -> catalogue/<cat>.html
+    /product/<id>         -> product/<id>.html
+
+Exemple nginx (gzip_static / brotli_static servent les versions précompressées) :
+
+    location ~ ^/(catalogue|product)(/|$) {
+        root /srv/elegance/export;
+        gzip_static on;
+        try_files $uri.html @app;
+    }
+
+Mise à jour incrémentale : des triggers SQLite (installés par ensure_schema, que lance
+scripts/export_static.py avant chaque export) ajoutent
+une ligne au journal export_changelog à chaque insertion / modification / suppression
+d'un produit, quel que soit l'écrivain. export_changes() ne régénère que les pages
+touchées : fiche du produit, page de son ancienne et de sa nouvelle catégorie,
+/catalogue. Le dernier numéro traité est gardé dans <dossier>/.export-state.json et
+les lignes traitées sont supprimées du journal.
+
+Reconstruction complète : export_all() répartit les pages sur un pool de processus
+(fork : chaque worker hérite de l'application, ré-ouvre ses connexions).
+"""
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import re
+
+from sqlalchemy import text
+
+from app.assets import precompress
+from app.models import Product, db
+
+CHANGELOG_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS export_changelog (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id TEXT NOT NULL,
+        category TEXT
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS export_log_insert AFTER INSERT ON product
+    BEGIN
+        INSERT INTO export_changelog (product_id, category) VALUES (NEW.id, NEW.category);
+    END
+    """,
+    # la colonne version (app/product_versions.py) n'est pas listée : son incrément
+    # par trigger ne produit pas de seconde ligne
+    """
+    CREATE TRIGGER IF NOT EXISTS export_log_update
+    AFTER UPDATE OF id, name, description, price_cents, stock_qty, category, active ON product
+    BEGIN
+        INSERT INTO export_changelog (product_id, category)
+        SELECT OLD.id, OLD.category WHERE OLD.id IS NOT NEW.id OR OLD.category IS NOT NEW.category;
+        INSERT INTO export_changelog (product_id, category) VALUES (NEW.id, NEW.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS export_log_delete AFTER DELETE ON product
+    BEGIN
+        INSERT INTO export_changelog (product_id, category) VALUES (OLD.id, OLD.category);
+    END
+    """,
+)
+
+STATE_FILE = ".export-state.json"
+_SAFE_SEGMENT = re.compile(r"^[\w-][\w.-]*$")
+CHUNK = 500
+
+
+_JOURNAL = ("export_changelog", "export_log_insert", "export_log_update", "export_log_delete")
+
+
+def check_schema(connection):
+    """Éléments du journal absents de la base (table, triggers), sans rien modifier."""
+    if connection.dialect.name != "sqlite":
+        return []
+    found = {name for (name,) in connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    ))}
+    if "product" not in found:
+        return []  # base neuve : le journal sera installé avec le premier export
+    return [name for name in _JOURNAL if name not in found]
+
+
+def ensure_schema(connection):
+    """Crée le journal et ses triggers (sans effet si la table product n'existe pas encore)."""
+    if connection.dialect.name != "sqlite":
+        return False
+    if not connection.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product'")).first():
+        return False
+    for statement in CHANGELOG_SQL:
+        connection.execute(text(statement))
+    return True
+
+
+def page_file(out_dir, path):
+    """Fichier de sortie d'une page, ou None si le chemin n'est pas exportable."""
+    segments = path.strip("/").split("/")
+    if not all(_SAFE_SEGMENT.match(s) for s in segments):
+        return None
+    return Path(out_dir, *segments[:-1], segments[-1] + ".html")
+
+
+def catalogue_paths():
+    from app.routes.catalogue_routes import CATEGORIES
+    return ["/catalogue", *(f"/catalogue/{cat}" for cat in CATEGORIES)]
+
+
+def all_paths():
+    # comme la route, les fiches des produits inactifs restent affichées
+    ids = db.session.execute(db.select(Product.id).order_by(Product.id)).scalars()
+    return catalogue_paths() + [f"/product/{pid}" for pid in ids]
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    for suffix in ("", ".gz", ".br"):
+        try:
+            os.unlink(f"{path}{suffix}")
+        except FileNotFoundError:
+            pass
+
+
+def export_paths(app, out_dir, paths):
+    """Rend et écrit les pages ; une page qui ne répond plus 200 (produit supprimé)
+    est retirée de l'export. Renvoie (écrites, supprimées)."""
+    from app.cache import get_cache
+    written = removed = 0
+    with app.app_context():
+        # jamais de valeur d'un autre processus restée dans le cache mémoire
+        get_cache().clear()
+    client = app.test_client()
+    for path in paths:
+        target = page_file(out_dir, path)
+        if target is None:
+            continue
+        response = client.get(path)
+        if response.status_code == 200:
+            data = response.get_data()
+            _write(target, data)
+            for suffix, compressed in precompress(data):
+                _write(Path(f"{target}{suffix}"), compressed)
+            written += 1
+        else:
+            _remove(target)
+            removed += 1
+        response.close()
+    return written, removed
+
+
+# ----- pool de processus -----
+
+_worker = {}
+
+
+def _init_worker(out_dir):
+    app = _worker["app"]
+    with app.app_context():
+        db.engine.dispose(close=False)  # connexions du parent : ne pas les partager
+    _worker["out_dir"] = out_dir
+
+
+def _export_chunk(paths):
+    return export_paths(_worker["app"], _worker["out_dir"], paths)
+
+
+def _max_seq():
+    return db.session.execute(text("SELECT COALESCE(MAX(seq), 0) FROM export_changelog")).scalar()
+
+
+def _save_state(out_dir, seq):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    _write(out_dir / STATE_FILE, json.dumps({"last_seq": seq}).encode("utf-8"))
+    db.session.execute(text("DELETE FROM export_changelog WHERE seq <= :seq"), {"seq": seq})
+    db.session.commit()
+
+
+def load_state(out_dir):
+    try:
+        with open(Path(out_dir) / STATE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def export_all(app, out_dir, workers=None):
+    """Reconstruction complète ; renvoie (écrites, supprimées)."""
+    out_dir = Path(out_dir)
+    with app.app_context():
+        # changements arrivés pendant le rendu : repris par le prochain export_changes
+        seq = _max_seq()
+        paths = all_paths()
+        db.session.remove()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= CHUNK:
+        written, removed = export_paths(app, out_dir, paths)
+    else:
+        _worker["app"] = app
+        chunks = [paths[i:i + CHUNK] for i in range(0, len(paths), CHUNK)]
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"),
+                                 initializer=_init_worker, initargs=(out_dir,)) as pool:
+            results = list(pool.map(_export_chunk, chunks))
+        written, removed = (sum(r[i] for r in results) for i in (0, 1))
+    # pages de produits qui n'existent plus
+    expected = {page_file(out_dir, p) for p in paths}
+    for old in (out_dir / "product").glob("*.html"):
+        if old not in expected:
+            _remove(old)
+            removed += 1
+    with app.app_context():
+        _save_state(out_dir, seq)
+    return written, removed
+
+
+def changed_paths(rows):
+    """Pages touchées par des lignes (product_id, category) du journal."""
+    from app.routes.catalogue_routes import CATEGORIES
+    paths = {"/catalogue"} if rows else set()
+    for product_id, category in rows:
+        paths.add(f"/product/{product_id}")
+        if category in CATEGORIES:
+            paths.add(f"/catalogue/{category}")
+    return sorted(paths)
+
+
+def export_changes(app, out_dir):
+    """Régénère les pages des produits modifiés depuis le dernier export ; renvoie
+    (écrites, supprimées), ou None si aucun export complet n'a encore été fait."""
+    out_dir = Path(out_dir)
+    state = load_state(out_dir)
+    if state is None:
+        return None
+    with app.app_context():
+        rows = db.session.execute(text(
+            "SELECT seq, product_id, category FROM export_changelog WHERE seq > :seq ORDER BY seq"
+        ), {"seq": state["last_seq"]}).all()
+        db.session.remove()
+    if not rows:
+        return 0, 0
+    result = export_paths(app, out_dir, changed_paths([(pid, cat) for _, pid, cat in rows]))
+    with app.app_context():
+        _save_state(out_dir, rows[-1][0])
+    return result
+
+
+def init_app(app):
+    """STATIC_EXPORT_DIR configuré : vérifie (lecture seule) que le journal des changements est installé."""
+    if not (app.config.get("STATIC_EXPORT_DIR") or os.environ.get("STATIC_EXPORT_DIR")):
+        return False
+    with app.app_context():
+        try:
+            with db.engine.connect() as connection:
+                missing = check_schema(connection)
+        except Exception:
+            app.logger.exception("export statique : vérification du journal impossible")
+            return False
+    if missing:
+        app.logger.error(
+            "export statique : %s absent(s) de la base ; lancer python scripts/export_static.py --full",
+            ", ".join(missing),
+        )
+        return False
+    return True
@@ -0,0 +1,88 @@
+"""
+Cache de bytecode Jinja sur disque et mesure du temps de rendu des templates.
+
+Cache de bytecode (TEMPLATE_CACHE_DIR, défaut instance/jinja_cache ; None ou "" pour
+désactiver) : le code Python compilé de chaque template est écrit une fois puis
+relu par les workers suivants au lieu de recompiler le source. Jinja vérifie une
+empreinte du source à chaque chargement, un template modifié est donc recompilé.
+Le nom des fichiers contient une empreinte des extensions actives : un cache
+compilé avec TEMPLATE_STRIP_WHITESPACE (app/compression.py) n'est jamais relu
+sans, et inversement.
+
+Profilage (TEMPLATE_PROFILING, défaut désactivé) : les signaux Flask
+before_render_template / template_rendered encadrent chaque render_template ;
+nombre d'appels, temps cumulé et maximum par template sont gardés dans le processus
+(profile()) et exposés sur /metrics :
+
+    template_renders_total{template="cart.html"} 12
+    template_render_microseconds_total{template="cart.html"} 48210
+
+Le temps d'un template inclut les rendus imbriqués (fragments de personal_slot).
+Rapport : python scripts/profile_templates.py
+"""
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+from flask import before_render_template, template_rendered
+import jinja2
+from jinja2 import FileSystemBytecodeCache
+
+from app import metrics
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+_local = threading.local()
+_lock = threading.Lock()
+_profile = {}
+
+
+def cache_pattern(env) -> str:
+    """Motif des fichiers du cache, propre à la version de Jinja et aux extensions."""
+    flags = ",".join([jinja2.__version__, *sorted(env.extensions)])
+    return "__jinja2_" + hashlib.sha1(flags.encode("utf-8")).hexdigest()[:10] + "_%s.cache"
+
+
+def _started(sender, template, context, **extra):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(time.perf_counter())
+
+
+def _finished(sender, template, context, **extra):
+    stack = getattr(_local, "stack", None)
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    name = template.name or "<string>"
+    with _lock:
+        count, total, worst = _profile.get(name, (0, 0.0, 0.0))
+        _profile[name] = (count + 1, total + elapsed, max(worst, elapsed))
+    label = f'{{template="{name}"}}'
+    metrics.incr("template_renders_total" + label)
+    metrics.incr("template_render_microseconds_total" + label, int(elapsed * 1_000_000))
+
+
+def profile() -> dict:
+    """{template: (appels, secondes cumulées, pire rendu en secondes)}."""
+    with _lock:
+        return dict(_profile)
+
+
+def reset_profile():
+    with _lock:
+        _profile.clear()
+
+
+def init_app(app):
+    """À appeler après les autres extensions Jinja (le motif du cache en dépend)."""
+    app.config.setdefault("TEMPLATE_CACHE_DIR", str(PROJECT_ROOT / "instance" / "jinja_cache"))
+    directory = app.config["TEMPLATE_CACHE_DIR"]
+    if directory:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory, cache_pattern(app.jinja_env))
+    if app.config.get("TEMPLATE_PROFILING"):
+        before_render_template.connect(_started, app)
+        template_rendered.connect(_finished, app)
@@ -0,0 +1,78 @@
+"""
+Chargement de l'utilisateur connecté, une fois par requête.
+
+- current_user : proxy vers l'utilisateur de la session (None si anonyme), résolu
+  au premier accès puis mémorisé dans flask.g pour le reste de la requête
+- les instantanés utilisateur sont gardés dans un cache LRU du processus (app/cache.py,
+  étiquette user:<id>), invalidé par invalidate_user() lors d'une modification du
+  profil ; une vue authentifiée ne coûte donc normalement aucune requête SQL sur la
+  table user.
+
+Les instantanés sont en lecture seule : pour modifier un utilisateur, recharger
+le modèle SQLAlchemy puis appeler invalidate_user().
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import g, session
+from werkzeug.local import LocalProxy
+
+from app.cache import Cache, MemoryBackend
+from app.models import User, db
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    id: int
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    profile_image: Optional[str]
+    is_admin: bool
+    address: Optional[str]
+
+    @classmethod
+    def from_model(cls, u: User) -> "CachedUser":
+        return cls(
+            id=u.id, email=u.email, first_name=u.first_name, last_name=u.last_name,
+            profile_image=u.profile_image, is_admin=bool(u.is_admin), address=u.address,
+        )
+
+
+# instantanés propres au processus (LRU + durée de vie pour limiter l'écart entre
+# workers), invalidés par l'étiquette user:<id>
+user_cache = Cache(MemoryBackend(maxsize=1024), default_ttl=60.0, name="user")
+
+
+def load_user(user_id) -> Optional[CachedUser]:
+    if user_id is None:
+        return None
+    def load():
+        u = db.session.get(User, user_id)
+        return CachedUser.from_model(u) if u is not None else None
+    return user_cache.get_or_set(f"user:{user_id}", load, tags=(f"user:{user_id}",), cache_none=False)
+
+
+def invalidate_user(user_id):
+    if user_id is not None:
+        user_cache.invalidate_tags(f"user:{user_id}")
+    g.pop("_current_user", None)
+
+
+def get_current_user() -> Optional[CachedUser]:
+    if "_current_user" not in g:
+        g._current_user = load_user(session.get("user_id"))
+    return g._current_user
+
+
+current_user = LocalProxy(get_current_user)
+
+
+def init_app(app):
+    user_cache.backend.maxsize = int(app.config.get("USER_CACHE_SIZE", 1024))
+    user_cache.default_ttl = float(app.config.get("USER_CACHE_TTL", 60))
+
+    # proxy paresseux : aucune requête tant que le template n'utilise pas current_user
+    @app.context_processor
+    def _inject_current_user():
+        return {"current_user": current_user}
@@ -0,0 +1,9 @@
+"""
+Point d'entrée ASGI (uvicorn, hypercorn) :
+
+    uvicorn asgi:application --workers 4
+"""
+from app import create_app
+from app.asgi import WSGIToASGI
+
+application = WSGIToASGI(create_app())
@@ -0,0 +1,37 @@
+"""
+Migration : colonne product.version, table catalogue_meta (génération du
+catalogue), index ix_product_version et triggers associés.
+
+Usage:
+  python scripts/add_product_version_column.py [chemin/base.db]
+
+Par défaut, migre elegance.db à la racine du projet. Idempotent : relancer le
+script sur une base déjà migrée ne change rien. L'application ne fait pas cette
+migration au démarrage, elle signale seulement dans les logs qu'elle manque.
+"""
+import os, sys
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.product_versions import check_schema, ensure_schema  # noqa: E402
+
+db = sys.argv[1] if len(sys.argv) > 1 else os.path.join(PROJECT_ROOT, "elegance.db")
+engine = create_engine(f"sqlite:///{os.path.abspath(db)}")
+
+with engine.begin() as conn:
+    missing = check_schema(conn)
+    if not missing:
+        print("Colonne 'version', génération et triggers déjà présents.")
+    else:
+        print(f"Ajout : {', '.join(missing)}...")
+        ensure_schema(conn)
+print("Terminé.")
+
+print("\nProduits (id, price_cents, stock_qty, active, version) :")
+with engine.connect() as conn:
+    for row in conn.execute(text("SELECT id, price_cents, stock_qty, active, version FROM product")):
+        print(tuple(row))
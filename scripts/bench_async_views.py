@@ -0,0 +1,108 @@
+"""
+Vues sync / async sous le serveur de production : débit et latence face à une
+dépendance lente (passerelle de paiement, API transporteur).
+
+Usage:
+  python scripts/bench_async_views.py [--latency 0.2] [--threads 4] [--clients 16] [--requests 64]
+
+Un worker serve.PooledWSGIServer (--threads) sert quatre vues, --clients
+clients en parallèle :
+- sync      : un appel bloquant (time.sleep)
+- async     : un appel attendu sur la boucle partagée (app/aio.py)
+- sync x2   : deux appels bloquants à la suite
+- async x2  : deux appels en parallèle (asyncio.gather)
+Sous WSGI, le thread de la requête attend la coroutine : le débit d'une vue à
+un appel ne change pas, le gain vient des attentes qui se chevauchent.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from flask import Flask  # noqa: E402
+
+from app import aio  # noqa: E402
+from app.payment_gateway import StandInGateway  # noqa: E402
+from serve import PooledWSGIServer  # noqa: E402
+
+CARD = ("4242424242424242", 12, 2030, "123", 1000)
+
+
+def bench_app(latency):
+    app = Flask(__name__)
+    aio.init_app(app)
+    gateway = StandInGateway(latency)
+
+    @app.route("/sync")
+    def sync_one():
+        return gateway.charge_card(*CARD, "k")["transaction_id"]
+
+    @app.route("/async")
+    async def async_one():
+        return (await gateway.charge_card_async(*CARD, "k"))["transaction_id"]
+
+    @app.route("/sync2")
+    def sync_two():
+        gateway.charge_card(*CARD, "a")
+        return gateway.charge_card(*CARD, "b")["transaction_id"]
+
+    @app.route("/async2")
+    async def async_two():
+        a, b = await asyncio.gather(gateway.charge_card_async(*CARD, "a"),
+                                    gateway.charge_card_async(*CARD, "b"))
+        return b["transaction_id"]
+
+    return app
+
+
+def load(port, path, clients, requests):
+    def one(_):
+        start = time.perf_counter()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=60) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        times = sorted(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    server = PooledWSGIServer("127.0.0.1", port, bench_app(args.latency), listener.fileno(), threads=args.threads)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        print(f"latence {args.latency * 1000:.0f} ms, {args.threads} threads, {args.clients} clients, "
+              f"{args.requests} requêtes")
+        print(f"{'vue':<10} {'req/s':>8} {'médiane':>10} {'p95':>10}")
+        for label, path in (("sync", "/sync"), ("async", "/async"), ("sync x2", "/sync2"), ("async x2", "/async2")):
+            load(port, path, args.threads, args.threads)  # chauffe
+            rate, median, p95 = load(port, path, args.clients, args.requests)
+            print(f"{label:<10} {rate:>8.1f} {median * 1000:>8.0f}ms {p95 * 1000:>8.0f}ms")
+    finally:
+        server.stop()
+        listener.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Mémoire occupée par les commandes du domaine (tracemalloc).
+
+Usage:
+  python scripts/bench_domain_memory.py [nb_commandes] [lignes_par_commande]
+
+Compare les classes actuelles (slots=True, statut IntEnum, chaînes internées)
+avec l'ancienne forme (@dataclass classique avec __dict__, statut Enum).
+"""
+from dataclasses import make_dataclass, fields
+from enum import Enum, auto
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+import uuid
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.domain import Order, OrderItem, OrderStatus
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+LINES = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+# ancienne forme : mêmes champs, sans slots
+LegacyStatus = Enum("LegacyStatus", [s.name for s in OrderStatus])
+LegacyOrderItem = make_dataclass("LegacyOrderItem", [(f.name, f.type) for f in fields(OrderItem)])
+LegacyOrder = make_dataclass("LegacyOrder", [(f.name, f.type, f) for f in fields(Order)])
+
+PRODUCTS = [(f"product_{i}", f"Produit {i}", 1000 + i) for i in range(50)]
+
+
+def build(order_cls, item_cls, status):
+    orders = []
+    for n in range(N):
+        items = []
+        for k in range(LINES):
+            # chaînes recréées (comme après une lecture depuis la base ou le disque)
+            pid, name, price = PRODUCTS[(n + k) % len(PRODUCTS)]
+            items.append(item_cls(product_id="".join(pid), name="".join(name), unit_price_cents=price, quantity=1 + k))
+        orders.append(order_cls(id=str(uuid.uuid4()), user_id=f"user-{n % 1000}", items=items, status=status, created_at=time.time()))
+    return orders
+
+
+def measure(label, order_cls, item_cls, status):
+    tracemalloc.start()
+    orders = build(order_cls, item_cls, status)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:8} : {current / N:7.0f} octets / commande ({current / 2**20:.1f} Mio pour {N} commandes)")
+    del orders
+    return current
+
+
+before = measure("avant", LegacyOrder, LegacyOrderItem, LegacyStatus.PAYEE)
+after = measure("après", Order, OrderItem, OrderStatus.PAYEE)
+print(f"gain : {100 * (1 - after / before):.0f} %")
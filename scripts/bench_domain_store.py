@@ -0,0 +1,79 @@
+"""
+Persistance des repositories du domaine : débit d'écriture, instantané, redémarrage.
+
+Usage:
+  python scripts/bench_domain_store.py [nb_commandes] [dossier]
+
+Écrit nb_commandes commandes (défaut 1 000 000) dans un DomainStore, prend un
+instantané en arrière-plan (mesure le temps de blocage de l'appelant), ajoute 10 %
+de mises à jour dans le journal, puis mesure le temps de redémarrage (chargement
+de l'instantané + relecture de la fin du journal).
+"""
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.domain import Order, OrderItem, OrderRepository, OrderStatus
+from app.domain_store import DomainStore
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+DIRECTORY = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(tempfile.mkdtemp(prefix="domain_store_"))
+
+
+def size_mb(directory):
+    return sum(p.stat().st_size for p in directory.iterdir()) / 1e6
+
+
+def main():
+    repos = {"orders": OrderRepository()}
+    store = DomainStore(DIRECTORY)
+    store.load_into(repos)
+    store.attach(repos)
+
+    t0 = time.perf_counter()
+    for i in range(N):
+        repos["orders"].add(Order(
+            id=f"order_{i}",
+            user_id=f"user_{i % 5000}",
+            items=[OrderItem(f"product_{i % 50}", f"Produit {i % 50}", 1000 + i % 50, 1 + i % 3)],
+            status=OrderStatus.CREE,
+            created_at=float(i),
+        ))
+    write = time.perf_counter() - t0
+    print(f"écriture   : {N} commandes en {write:.2f}s ({N / write:,.0f} /s), journal {size_mb(DIRECTORY):.1f} Mo")
+
+    t0 = time.perf_counter()
+    store.snapshot(background=True)  # comme l'instantané automatique (snapshot_every)
+    pause = time.perf_counter() - t0
+    store._reap_child(block=True)
+    print(f"instantané : appelant bloqué {pause * 1000:.0f} ms, écrit en {time.perf_counter() - t0:.2f}s, "
+          f"{size_mb(DIRECTORY):.1f} Mo")
+
+    tail = N // 10
+    for i in range(tail):
+        order = repos["orders"].get(f"order_{i}")
+        order.status = OrderStatus.PAYEE
+        repos["orders"].update(order)
+    store.close()
+
+    repos = {"orders": OrderRepository()}
+    t0 = time.perf_counter()
+    store = DomainStore(DIRECTORY)
+    loaded = store.load_into(repos)
+    restart = time.perf_counter() - t0
+    store.close()
+    print(f"redémarrage: {loaded} commandes (+{tail} mises à jour du journal) en {restart:.2f}s")
+    assert repos["orders"].count_by_status(OrderStatus.PAYEE) == tail
+
+    if len(sys.argv) <= 2:
+        shutil.rmtree(DIRECTORY)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Mémoire des workers pré-forkés, avec et sans le mode PRELOAD (RSS / PSS / USS lus
+dans /proc/<pid>/smaps_rollup, Linux uniquement).
+
+Usage:
+  python scripts/bench_preload_memory.py [nb_produits] [nb_workers] [nb_requetes]
+
+Crée une base SQLite temporaire de nb_produits produits (défaut 20000), puis pour
+chaque mode lance un processus maître qui crée l'application et forke nb_workers
+workers (défaut 4) :
+- sans préchargement : chaque worker construit son cache du catalogue après le fork
+- PRELOAD=1          : le maître construit l'instantané puis gc.freeze() avant le fork
+Chaque worker sert nb_requetes requêtes /catalogue (défaut 3), déclenche un passage
+complet du ramasse-miettes, puis mesure sa mémoire pendant que les autres tournent.
+"""
+from pathlib import Path
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+CATEGORIES = ("Kabyle", "Abaya", "Caftan", "Karakou")
+
+
+def memory(pid="self"):
+    """Rss, Pss, Uss (Private_Clean + Private_Dirty) et Shared en Mo."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+    }
+
+
+def fmt(m):
+    return f"RSS {m['rss']:7.1f}  PSS {m['pss']:7.1f}  USS {m['uss']:7.1f}  partagé {m['shared']:7.1f} Mo"
+
+
+def build_database(path, count):
+    from app import create_app
+    from app.models import Product, db
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "PRELOAD": False})
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Product), [
+            {
+                "id": f"produit_{i:06d}",
+                "name": f"Produit traditionnel {i}",
+                "description": f"Tenue brodée à la main, modèle {i}, tissu léger et finitions dorées. " * 2,
+                "price_cents": 5000 + i % 20000,
+                "stock_qty": i % 7,
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "active": True,
+            }
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+def worker(app, preload, requests, report_fd, release_fd):
+    cache = None
+    if not preload:
+        # sans préchargement : chaque worker construit ses structures après le fork
+        from app.models import Product
+        with app.app_context():
+            cache = Product.query.all()
+    with app.test_client() as client:
+        for _ in range(requests):
+            assert client.get("/catalogue").status_code == 200
+    gc.collect()
+    os.write(report_fd, (json.dumps(memory()) + "\n").encode())
+    os.read(release_fd, 1)  # rester vivant tant que les autres mesurent (PSS)
+    del cache
+    os._exit(0)
+
+
+def run_mode(db_path, mode, workers, requests):
+    from app import create_app
+    preload = mode == "preload"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}", "PRELOAD": preload})
+    before = memory()
+    report_r, report_w = os.pipe()
+    release_r, release_w = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(report_r)
+            os.close(release_w)
+            worker(app, preload, requests, report_w, release_r)
+        pids.append(pid)
+    os.close(report_w)
+    os.close(release_r)
+    with os.fdopen(report_r) as reports:
+        results = [json.loads(reports.readline()) for _ in pids]
+    os.close(release_w)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    print(f"[{'PRELOAD=1' if preload else 'sans préchargement'}]")
+    print(f"  maître avant fork : {fmt(before)}")
+    for n, m in enumerate(results):
+        print(f"  worker {n}          : {fmt(m)}")
+    total_uss = sum(m["uss"] for m in results)
+    total_pss = sum(m["pss"] for m in results)
+    print(f"  total workers     : USS {total_uss:.1f} Mo, PSS {total_pss:.1f} Mo")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        _, _, mode, db_path, workers, requests = sys.argv
+        run_mode(db_path, mode, int(workers), int(requests))
+        return
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = sys.argv[2] if len(sys.argv) > 2 else "4"
+    requests = sys.argv[3] if len(sys.argv) > 3 else "3"
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "catalogue.db"
+        build_database(db_path, count)
+        print(f"{count} produits, {workers} workers, {requests} requêtes /catalogue par worker")
+        for mode in ("default", "preload"):
+            # un processus maître neuf par mode
+            subprocess.run([sys.executable, __file__, "--mode", mode, str(db_path), workers, requests], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare les backends de repositories du domaine (mémoire / SQLite) sur le même
+parcours : ajout au panier, commande, paiement, expédition, livraison.
+
+Usage:
+  python scripts/bench_repository_backends.py [nb_commandes] [backend ...]
+
+Par défaut 5000 commandes sur les backends "memory" et "sqlite" (fichier temporaire).
+"""
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.domain import (
+    AuthService, BillingService, CartService, DeliveryService, OrderService, PaymentGateway,
+    Product, SessionManager,
+)
+from app.repositories import create_repositories
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+BACKENDS = sys.argv[2:] or ["memory", "sqlite"]
+USERS = 200
+PRODUCTS = 50
+
+
+def setup(repos):
+    auth = AuthService(repos["users"], SessionManager())
+    admin = auth.register("admin@bench.fr", "pw", "A", "B", "1 rue", "Paris", "75000", is_admin=True)
+    clients = [
+        auth.register(f"client{i}@bench.fr", "pw", "C", str(i), f"{i} rue", "Lyon", "69000")
+        for i in range(USERS)
+    ]
+    for i in range(PRODUCTS):
+        repos["products"].add(Product(
+            id=f"product_{i}", name=f"Produit {i}", description="", price_cents=1000 + i,
+            stock_qty=N * 10, category="Bench",
+        ))
+    carts = CartService(repos["carts"], repos["products"])
+    orders = OrderService(
+        repos["orders"], repos["products"], repos["carts"], repos["payments"], repos["invoices"],
+        BillingService(repos["invoices"]), DeliveryService(), PaymentGateway(), repos["users"],
+    )
+    return admin, clients, carts, orders
+
+
+def run(backend, directory):
+    repos = create_repositories(backend, path=Path(directory) / f"{backend}.db")
+    admin, clients, carts, orders = setup(repos)
+    steps = {"panier": 0.0, "commande": 0.0, "paiement": 0.0, "expédition": 0.0, "livraison": 0.0}
+    start = time.perf_counter()
+    for i in range(N):
+        user = clients[i % USERS]
+        t0 = time.perf_counter()
+        carts.add_to_cart(user.id, f"product_{i % PRODUCTS}", 1)
+        carts.add_to_cart(user.id, f"product_{(i * 7) % PRODUCTS}", 2)
+        t1 = time.perf_counter()
+        order = orders.checkout(user.id)
+        t2 = time.perf_counter()
+        orders.pay_by_card(order.id, "4242424242424242", 12, 2030, "123")
+        t3 = time.perf_counter()
+        orders.backoffice_ship_order(admin.id, order.id)
+        t4 = time.perf_counter()
+        orders.backoffice_mark_delivered(admin.id, order.id)
+        t5 = time.perf_counter()
+        steps["panier"] += t1 - t0
+        steps["commande"] += t2 - t1
+        steps["paiement"] += t3 - t2
+        steps["expédition"] += t4 - t3
+        steps["livraison"] += t5 - t4
+    total = time.perf_counter() - start
+    detail = "  ".join(f"{k} {v / N * 1e6:.0f}µs" for k, v in steps.items())
+    print(f"{backend:<8} {N / total:>9,.0f} commandes/s   {detail}")
+
+
+def main():
+    print(f"{N} commandes, {USERS} clients, {PRODUCTS} produits")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in BACKENDS:
+            run(backend, directory)
+
+
+if __name__ == "__main__":
+    main()
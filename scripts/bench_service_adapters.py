@@ -0,0 +1,129 @@
+"""
+Surcoût par requête des adaptateurs de services (CartAdapter, OrderAdapter).
+
+Usage:
+  python scripts/bench_service_adapters.py [--number 100000] [--requests 500]
+
+Pour chaque forme de service panier (view / get_cart / list_items) et de service
+de commande (create_order(user_id, items, total) / create(items, user_id, total)),
+mesure le temps d'un appel via l'adaptateur et en direct sur le service : la
+différence est le coût de l'adaptateur. Mesure ensuite GET /cart et GET /checkout
+de l'application (client de test, panier de 3 lignes en session).
+Pour comparer avec une autre version, lancer le script depuis un git worktree.
+"""
+from pathlib import Path
+import argparse
+import sys
+import timeit
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services_init import CartAdapter, _wrap_order_service  # noqa: E402
+
+LINES = [{"product_id": f"p{i}", "quantity": 2, "price_cents": 1000 + i} for i in range(3)]
+
+
+class ViewCart:
+    def add(self, product_id, qty):
+        pass
+
+    def remove(self, product_id, qty):
+        pass
+
+    def view(self):
+        return LINES, 6006
+
+
+class GetCartCart:
+    def add_item(self, product_id, qty):
+        pass
+
+    def set_quantity(self, product_id, qty):
+        pass
+
+    def get_cart(self):
+        return {"items": LINES, "total_cents": 6006}
+
+
+class ListItemsCart:
+    def add_item(self, product_id, qty):
+        pass
+
+    def delete(self, product_id):
+        pass
+
+    def list_items(self):
+        return LINES
+
+
+class UserFirstOrders:
+    def create(self, user_id, items, total_cents):
+        return {"id": 1}
+
+    def list_user_orders(self, user_id):
+        return []
+
+
+class ItemsFirstOrders:
+    def place_order(self, items, user_id, total_cents):
+        return {"id": 1}
+
+
+def per_call(stmt, number):
+    """µs par appel (meilleure de 5 séries)."""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def bench_cart(number):
+    print(f"{'panier':<22} {'opération':<8} {'direct':>9} {'adaptateur':>11}")
+    for backend in (ViewCart(), GetCartCart(), ListItemsCart()):
+        adapter = CartAdapter(backend)
+        direct_view = getattr(backend, "view", None) or getattr(backend, "get_cart", None) or backend.list_items
+        add = getattr(backend, "add", None) or backend.add_item
+        rows = (
+            ("add", lambda: add("p1", 1), lambda: adapter.add("p1", 1)),
+            ("view", direct_view, adapter.view),
+        )
+        for op, direct, adapted in rows:
+            print(f"{type(backend).__name__:<22} {op:<8} {per_call(direct, number):>7.2f}µs "
+                  f"{per_call(adapted, number):>9.2f}µs")
+
+
+def bench_orders(number):
+    print(f"\n{'commandes':<22} {'opération':<8} {'direct':>9} {'adaptateur':>11}")
+    for backend, direct in ((UserFirstOrders(), lambda b: b.create(1, LINES, 6006)),
+                            (ItemsFirstOrders(), lambda b: b.place_order(LINES, 1, 6006))):
+        adapter = _wrap_order_service(backend)
+        print(f"{type(backend).__name__:<22} {'create':<8} {per_call(lambda: direct(backend), number):>7.2f}µs "
+              f"{per_call(lambda: adapter.create_order(1, LINES, 6006), number):>9.2f}µs")
+
+
+def bench_requests(requests):
+    from app import create_app
+
+    app = create_app({"TESTING": True})
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = 1
+        sess["cart"] = {"robe_kabyle": 1, "caftan_1": 2, "abaya_1": 1}
+    print(f"\n{'requête':<22} {'µs/requête':>11}")
+    for path in ("/cart", "/checkout"):
+        client.get(path)  # chauffe (services construits, templates compilés)
+        seconds = min(timeit.repeat(lambda: client.get(path), number=requests, repeat=3))
+        print(f"GET {path:<18} {seconds / requests * 1e6:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100_000, help="appels par mesure")
+    parser.add_argument("--requests", type=int, default=500, help="requêtes HTTP par mesure")
+    args = parser.parse_args()
+    bench_cart(args.number)
+    bench_orders(args.number)
+    bench_requests(args.requests)
+
+
+if __name__ == "__main__":
+    main()
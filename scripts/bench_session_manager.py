@@ -0,0 +1,59 @@
+"""
+Benchmark de domain.SessionManager : create/get depuis 32 threads.
+
+Usage:
+  python scripts/bench_session_manager.py [threads] [ops_par_thread]
+
+Compare un seul verrou (shards=1) et les verrous répartis (shards=16),
+puis mesure la purge de sessions expirées.
+"""
+from pathlib import Path
+import sys
+import threading
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.domain import SessionManager
+
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+OPS = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+
+def run(manager):
+    barrier = threading.Barrier(THREADS + 1)
+
+    def worker(n):
+        barrier.wait()
+        for i in range(OPS):
+            token = manager.create_session(f"user-{n}-{i}")
+            manager.get_user_id(token)
+            manager.get_user_id(token)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0
+
+
+for shards in (1, 16):
+    elapsed = run(SessionManager(shards=shards))
+    ops = THREADS * OPS * 3
+    print(f"shards={shards:<3} {THREADS} threads : {ops / elapsed:,.0f} ops/s ({elapsed:.2f} s)")
+
+# purge : 1 session expirée sur 10
+clock = [0.0]
+mgr = SessionManager(clock=lambda: clock[0])
+for i in range(200_000):
+    mgr.ttl = 100 if i % 10 == 0 else 10_000
+    mgr.create_session(str(i))
+clock[0] = 150.0
+t0 = time.perf_counter()
+removed = mgr.sweep()
+print(f"purge : {removed} sessions expirées supprimées sur {removed + len(mgr)} en {(time.perf_counter() - t0) * 1000:.1f} ms")
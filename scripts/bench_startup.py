@@ -0,0 +1,95 @@
+"""
+Démarrage à froid : import + create_app(), première requête, modules les plus lents.
+
+Usage:
+  python scripts/bench_startup.py [--runs 7] [--tree CHEMIN]
+
+Chaque mesure est faite dans un interpréteur neuf (médiane sur --runs). --tree
+mesure une autre copie du projet (ex. un git worktree de la version précédente)
+pour comparer. L'interpréteur nu (python -c pass) est mesuré aussi : c'est le
+plancher, la différence est le coût de l'application et de ses dépendances.
+Le détail par module vient de python -X importtime.
+"""
+from pathlib import Path
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+MEASURE = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app import create_app
+app = create_app()
+t1 = time.perf_counter()
+app.test_client().get("/catalogue")
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+def _python(args, cwd):
+    return subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True, check=True)
+
+
+def wall(args, cwd, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _python(args, cwd)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def importtime(root):
+    """[(cumul µs, profondeur, module)] d'après python -X importtime."""
+    code = f"import sys; sys.path.insert(0, {str(root)!r}); from app import create_app; create_app()"
+    err = _python(["-X", "importtime", "-c", code], root).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # ligne d'en-tête
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--tree", default=str(PROJECT_ROOT))
+    args = parser.parse_args()
+    root = Path(args.tree).resolve()
+
+    startup, first = [], []
+    for _ in range(args.runs):
+        out = _python(["-c", MEASURE.format(root=str(root))], root).stdout.split()
+        startup.append(float(out[0]))
+        first.append(float(out[1]))
+    bare = wall(["-c", "pass"], root, args.runs)
+    total = wall(["-c", f"import sys; sys.path.insert(0, {str(root)!r}); from app import create_app; create_app()"], root, args.runs)
+
+    print(f"arbre : {root}")
+    print(f"interpréteur nu             {1000 * bare:8.1f} ms")
+    print(f"processus import+create_app {1000 * total:8.1f} ms")
+    print(f"  dont import + create_app  {1000 * statistics.median(startup):8.1f} ms")
+    print(f"première requête /catalogue {1000 * statistics.median(first):8.1f} ms")
+
+    rows = importtime(root)
+    top = [(us, name) for us, depth, name in rows if depth <= 1]
+    print("\nimports les plus lents, deux premiers niveaux (cumul) :")
+    for us, name in sorted(top, reverse=True)[:12]:
+        print(f"  {name:<40} {us / 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
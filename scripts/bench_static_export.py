@@ -0,0 +1,72 @@
+"""
+Durée de l'export statique complet puis d'une mise à jour incrémentale.
+
+Usage:
+  python scripts/bench_static_export.py [nb_produits] [workers ...]
+
+Crée une base SQLite temporaire de nb_produits produits (défaut 20000) et exporte
+toutes les pages avec chaque taille de pool (défaut : 1 et le nombre de CPU), puis
+modifie 10 produits et mesure l'export incrémental.
+"""
+from pathlib import Path
+import os
+import sys
+import tempfile
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import create_app, static_export
+from app.models import Product, db
+
+CATEGORIES = ("Kabyle", "Abaya", "Caftan", "Karakou")
+
+
+def build_app(path, count):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Product), [
+            {
+                "id": f"produit_{i:06d}",
+                "name": f"Produit traditionnel {i}",
+                "description": f"Tenue brodée à la main, modèle {i}.",
+                "price_cents": 5000 + i % 20000,
+                "stock_qty": i % 7,
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "active": True,
+            }
+            for i in range(count)
+        ])
+        db.session.commit()
+        with db.engine.begin() as connection:
+            static_export.ensure_schema(connection)
+    return app
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    pools = [int(w) for w in sys.argv[2:]] or sorted({1, os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(Path(directory) / "export.db", count)
+        print(f"{count} produits")
+        for workers in pools:
+            out = Path(directory) / f"export_{workers}"
+            started = time.perf_counter()
+            written, _ = static_export.export_all(app, out, workers)
+            elapsed = time.perf_counter() - started
+            print(f"  complet, {workers:2d} processus : {written} pages en {elapsed:.1f} s "
+                  f"({written / elapsed:.0f} pages/s)")
+        with app.app_context():
+            for product in db.session.execute(db.select(Product).limit(10)).scalars():
+                product.price_cents += 100
+            db.session.commit()
+        started = time.perf_counter()
+        written, _ = static_export.export_changes(app, out)
+        print(f"  incrémental (10 produits modifiés) : {written} pages en {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Construit les ressources statiques : noms empreintés par le contenu, versions .gz
+(et .br si le module brotli est installé), manifeste lu par static_url().
+
+Usage:
+  python scripts/build_assets.py [--fetch] [dossier_sortie]
+
+--fetch : télécharge d'abord Bootstrap et les polices Google Fonts (app.assets.VENDOR)
+          dans app/static/vendor, les url() du CSS des polices étant réécrites vers
+          les fichiers locaux ; à lancer une fois sur une machine avec accès réseau,
+          puis versionner app/static/vendor pour les déploiements hors ligne.
+Dossier par défaut : ASSETS_DIR (app/static/dist). À relancer à chaque
+modification d'une ressource.
+"""
+from pathlib import Path
+import posixpath
+import re
+import sys
+import urllib.request
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import assets
+
+# sans agent récent, Google Fonts renvoie des polices TTF au lieu de woff2
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def download(url) -> bytes:
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def fetch_vendor():
+    for name, url in assets.VENDOR.items():
+        path = assets.STATIC_DIR / name
+        data = download(url)
+        if name.endswith("fonts.css"):
+            text = data.decode("utf-8")
+            for remote in sorted(set(re.findall(r"url\((https://[^)]+)\)", text))):
+                local = posixpath.basename(remote.split("?")[0])
+                (path.parent / local).parent.mkdir(parents=True, exist_ok=True)
+                (path.parent / local).write_bytes(download(remote))
+                text = text.replace(remote, local)
+            data = text.encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        print(f"vendorisé : {name} ({len(data) / 1024:.0f} Ko)")
+
+
+def main():
+    args = sys.argv[1:]
+    if "--fetch" in args:
+        args.remove("--fetch")
+        fetch_vendor()
+    if args:
+        out = Path(args[0])
+    else:
+        from app import create_app
+        out = Path(create_app().config["ASSETS_DIR"])
+
+    missing = [n for n in assets.ASSETS if not (assets.STATIC_DIR / n).is_file()]
+    for name in missing:
+        print(f"absent (servi depuis le CDN, voir --fetch) : {name}")
+    manifest = assets.build(out)
+    print(f"{len(manifest)} ressources dans {out}" + ("" if assets.brotli else " (module brotli absent : gzip seulement)"))
+    for name, hashed in sorted(manifest.items()):
+        path = out / hashed
+        sizes = [f"{path.stat().st_size / 1024:7.1f} Ko"]
+        for suffix, encoding in assets.ENCODINGS:
+            compressed = path.with_name(path.name + suffix)
+            if compressed.exists():
+                sizes.append(f"{encoding} {compressed.stat().st_size / 1024:6.1f} Ko")
+        print(f"  {hashed:<55} " + "  ".join(sizes))
+
+
+if __name__ == "__main__":
+    main()
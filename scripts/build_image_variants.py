@@ -0,0 +1,63 @@
+"""
+Pré-génère les variantes redimensionnées (vignette, carte, zoom en JPEG et WebP) de
+toutes les photos de app/static/images, puis affiche le poids des images de la page
+catalogue avant / après. Nécessite Pillow.
+
+Usage:
+  python scripts/build_image_variants.py [dossier_sortie]
+
+Dossier par défaut : IMAGE_VARIANTS_DIR (app/static/images/variants). Seules les
+variantes manquantes sont encodées ; celles d'une ancienne version d'une photo sont
+supprimées.
+"""
+from pathlib import Path
+import sys
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import create_app, images
+from app.models import Product, db
+
+
+def catalogue_weight(product_ids, size="card"):
+    """Octets téléchargés par les images du catalogue : originaux, variante JPEG, variante WebP."""
+    original = jpeg = webp = 0
+    for pid in product_ids:
+        path = images.source_path(pid)
+        if not path.exists():
+            continue
+        original += path.stat().st_size
+        jpeg += len(images.render(pid, size, "jpg"))
+        webp += len(images.render(pid, size, "webp"))
+    return original, jpeg, webp
+
+
+def main():
+    if not images.available():
+        sys.exit("Pillow n'est pas installé (pip install pillow)")
+    app = create_app()
+    out = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(app.config["IMAGE_VARIANTS_DIR"])
+
+    started = time.perf_counter()
+    results = images.generate_all(out)
+    created = sum(1 for _, _, c in results if c)
+    total = sum(size for _, size, _ in results)
+    print(f"{len(results)} variantes dans {out} ({created} générées, {total / 1024:.0f} Ko) "
+          f"en {time.perf_counter() - started:.1f} s")
+
+    with app.app_context():
+        ids = list(db.session.execute(db.select(Product.id).where(Product.active.isnot(False))).scalars())
+    for size in ("card", "zoom"):
+        original, jpeg, webp = catalogue_weight(ids, size)
+        if not original:
+            continue
+        print(f"catalogue ({len(ids)} produits, taille {size}) : originaux {original / 1024:.0f} Ko, "
+              f"JPEG {jpeg / 1024:.0f} Ko (-{100 - 100 * jpeg / original:.0f} %), "
+              f"WebP {webp / 1024:.0f} Ko (-{100 - 100 * webp / original:.0f} %)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Calibre le coût du hachage des mots de passe pour une latence cible.
+
+Usage:
+  python scripts/calibrate_password_hash.py [target_ms] [scrypt|pbkdf2]
+
+Affiche la méthode werkzeug à exporter dans PASSWORD_HASH_METHOD.
+Les hashs existants sont mis à niveau automatiquement à la prochaine connexion.
+"""
+from pathlib import Path
+import sys
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.password_hashing import calibrate, _time_method
+
+target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+algorithm = sys.argv[2] if len(sys.argv) > 2 else "scrypt"
+
+method = calibrate(target_ms, algorithm)
+print(f"Méthode retenue : {method} ({_time_method(method, 3):.0f} ms par hash, cible {target_ms:.0f} ms)")
+print(f"export PASSWORD_HASH_METHOD={method}")
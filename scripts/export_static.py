@@ -0,0 +1,64 @@
+"""
+Export statique des pages publiques (voir app/static_export.py).
+
+Usage:
+  python scripts/export_static.py [--full] [--workers N] [--watch SECONDES] [dossier_sortie]
+
+Installe d'abord le journal export_changelog et ses triggers s'ils manquent
+(l'application ne fait que vérifier leur présence au démarrage).
+Sans --full : ne régénère que les pages des produits modifiés depuis le dernier
+export (journal export_changelog) ; export complet si aucun n'a encore été fait.
+--workers : taille du pool de processus de l'export complet (défaut : nb de CPU).
+--watch   : reste actif et traite le journal toutes les SECONDES.
+Dossier par défaut : STATIC_EXPORT_DIR, sinon instance/export.
+"""
+import argparse
+import os
+from pathlib import Path
+import sys
+import time
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import create_app, static_export
+from app.models import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export statique du catalogue")
+    parser.add_argument("out_dir", nargs="?")
+    parser.add_argument("--full", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--watch", type=float, default=None)
+    args = parser.parse_args()
+
+    app = create_app()
+    out = Path(args.out_dir or app.config.get("STATIC_EXPORT_DIR")
+               or os.environ.get("STATIC_EXPORT_DIR") or PROJECT_ROOT / "instance" / "export")
+
+    with app.app_context(), db.engine.begin() as connection:
+        if static_export.ensure_schema(connection) is False:
+            sys.exit("table product absente : rien à exporter")
+
+    started = time.perf_counter()
+    result = None if args.full else static_export.export_changes(app, out)
+    if result is None:
+        result = static_export.export_all(app, out, args.workers)
+        kind = "complet"
+    else:
+        kind = "incrémental"
+    print(f"export {kind} : {result[0]} pages écrites, {result[1]} supprimées dans {out} "
+          f"en {time.perf_counter() - started:.1f} s")
+
+    while args.watch:
+        time.sleep(args.watch)
+        started = time.perf_counter()
+        written, removed = static_export.export_changes(app, out)
+        if written or removed:
+            print(f"{written} pages écrites, {removed} supprimées en {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Temps de rendu par template et gain du cache de bytecode Jinja.
+
+Usage:
+  python scripts/profile_templates.py [répétitions]
+
+Demande plusieurs fois (défaut 50) l'accueil, le catalogue, une fiche produit, le
+contact et le panier (rempli de 3 produits) avec TEMPLATE_PROFILING activé, puis
+affiche appels, temps moyen et pire rendu par template, du plus coûteux au moins
+coûteux. Mesure ensuite la compilation de tous les templates par un processus neuf,
+sans cache puis avec un cache de bytecode déjà rempli.
+"""
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import create_app, templating
+from app.models import Product, db
+
+COLD_COMPILE = """
+import sys, time
+sys.path.insert(0, {root!r})
+from app import create_app
+app = create_app({{"TEMPLATE_CACHE_DIR": {cache!r}}})
+env = app.jinja_env
+start = time.perf_counter()
+for name in env.list_templates(extensions=["html"]):
+    env.get_template(name)
+print(time.perf_counter() - start)
+"""
+
+
+def cold_compile(cache_dir):
+    code = COLD_COMPILE.format(root=str(PROJECT_ROOT), cache=cache_dir)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main(repeat):
+    app = create_app({"TEMPLATE_PROFILING": True})
+    with app.app_context():
+        ids = db.session.execute(db.select(Product.id).order_by(Product.id).limit(3)).scalars().all()
+    client = app.test_client()
+    for pid in ids:
+        client.post(f"/cart/add/{pid}", data={"quantity": "1"})
+    paths = ["/", "/catalogue", "/contact", "/cart"] + ([f"/product/{ids[0]}"] if ids else [])
+
+    templating.reset_profile()
+    for _ in range(repeat):
+        for path in paths:
+            client.get(path)
+
+    rows = sorted(templating.profile().items(), key=lambda kv: kv[1][1], reverse=True)
+    print(f"{'template':<28} {'appels':>7} {'moyenne ms':>11} {'pire ms':>8}")
+    for name, (count, total, worst) in rows:
+        print(f"{name:<28} {count:>7} {1000 * total / count:>11.2f} {1000 * worst:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        without = cold_compile("")
+        cold_compile(tmp)  # remplit le cache
+        warm = cold_compile(tmp)
+    print(f"\ncompilation de tous les templates, processus neuf : "
+          f"{1000 * without:.1f} ms sans cache, {1000 * warm:.1f} ms avec le cache de bytecode")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,50 @@
+"""
+Octets transférés par page : HTML brut, sans indentation, puis gzip / brotli.
+
+Usage:
+  python scripts/report_compression.py [chemin ...]
+
+Chemins par défaut : /, /catalogue, /contact et la première fiche produit. Chaque
+page est rendue deux fois (TEMPLATE_STRIP_WHITESPACE désactivé puis activé) et
+demandée avec chaque Accept-Encoding ; brotli n'apparaît que si le module est installé.
+"""
+from pathlib import Path
+import sys
+
+# ajouter la racine du projet au PYTHONPATH
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import create_app, compression
+from app.models import Product, db
+
+
+def fetch(app, path, accept_encoding=None):
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    response = app.test_client().get(path, headers=headers)
+    return response.status_code, len(response.get_data())
+
+
+def main(paths):
+    raw_app = create_app({"TEMPLATE_STRIP_WHITESPACE": False})
+    app = create_app()
+    if not paths:
+        with app.app_context():
+            first = db.session.execute(db.select(Product.id).order_by(Product.id)).scalar()
+        paths = ["/", "/catalogue", "/contact"] + ([f"/product/{first}"] if first else [])
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+
+    print(f"{'page':<28} {'brut':>8} {'espaces':>8}" + "".join(f" {e:>8}" for e in encodings) + "  gain")
+    for path in paths:
+        status, raw = fetch(raw_app, path)
+        if status != 200:
+            print(f"{path:<28} HTTP {status}")
+            continue
+        _, stripped = fetch(app, path)
+        sizes = [fetch(app, path, e)[1] for e in encodings]
+        gain = 100 * (1 - min([stripped] + sizes) / raw)
+        print(f"{path:<28} {raw:>8} {stripped:>8}" + "".join(f" {s:>8}" for s in sizes) + f"  {gain:.0f} %")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
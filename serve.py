@@ -0,0 +1,442 @@
+"""
+Serveur de production : un maître et des workers pré-forkés (Linux, bibliothèque
+standard + werkzeug, aucun service externe).
+
+Usage:
+  python serve.py [--bind 127.0.0.1:8000] [--workers 2] [--threads 8]
+                  [--max-requests 0] [--max-requests-jitter 0] [--preload]
+                  [--graceful-timeout 30] [--pidfile PATH] [--access-log]
+                  [--app "app:create_app()"]
+
+Valeurs par défaut reprises de l'environnement : SERVE_BIND, SERVE_WORKERS,
+SERVE_THREADS, SERVE_MAX_REQUESTS, SERVE_MAX_REQUESTS_JITTER, PRELOAD.
+
+- le maître ouvre la socket d'écoute puis forke les workers, qui l'acceptent tous ;
+  chaque worker sert les requêtes avec un pool de --threads threads et n'accepte
+  une connexion que si l'un d'eux est libre (comme le worker gthread de gunicorn) :
+  les autres restent dans la file d'attente du noyau, pour un autre worker
+- --preload : l'application est construite dans le maître avant le fork (PRELOAD=1,
+  voir app/preload.py) ; chaque worker ré-ouvre ses connexions SQLAlchemy. Sans
+  --preload, chaque worker importe l'application lui-même : le maître n'importe
+  jamais le code du projet
+- --max-requests : un worker qui a servi ce nombre de requêtes (plus un tirage dans
+  --max-requests-jitter, pour ne pas les recycler tous ensemble) termine les
+  requêtes en cours et est remplacé ; la croissance mémoire reste bornée
+- signal de disponibilité : quand tous les workers écoutent, le maître écrit
+  --pidfile, journalise "prêt" et envoie READY=1 à systemd (Type=notify) si
+  NOTIFY_SOCKET est défini
+
+Signaux du maître :
+  SIGHUP           rechargement gracieux : une nouvelle génération de workers est
+                   démarrée (nouveau code sans --preload ; avec --preload,
+                   l'application est reconstruite dans le maître, données et
+                   templates à jour mais pas le code Python), puis les anciens
+                   workers terminent leurs requêtes et s'arrêtent
+  SIGTERM, SIGINT  arrêt gracieux (SIGKILL après --graceful-timeout secondes)
+
+Exemple d'unité systemd :
+  [Service]
+  Type=notify
+  NotifyAccess=main
+  ExecStart=/srv/elegance/venv/bin/python serve.py --workers 4 --preload --max-requests 10000
+  ExecReload=/bin/kill -HUP $MAINPID
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+log = logging.getLogger("serve")
+
+KEEPALIVE_TIMEOUT = 5
+
+
+def load_app(spec):
+    """"module:application", ou "module:fabrique()" pour appeler une fabrique."""
+    module, _, attr = spec.partition(":")
+    factory = attr.endswith("()")
+    obj = getattr(importlib.import_module(module), attr.removesuffix("()") or "app")
+    return obj() if factory else obj
+
+
+def sd_notify(state):
+    """Message à systemd (sd_notify) ; sans NOTIFY_SOCKET, rien."""
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.connect(address)
+        sock.sendall(state.encode("ascii"))
+    return True
+
+
+# ----- worker -----
+
+class _Handler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT  # connexion keep-alive inactive : le thread est libéré
+
+    def run_wsgi(self):
+        self.server.count_request()
+        super().run_wsgi()
+        if self.server.stopping:
+            self.close_connection = True
+
+    def log_request(self, *args, **kwargs):
+        if self.server.access_log:
+            super().log_request(*args, **kwargs)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Serveur werkzeug sur une socket héritée, requêtes traitées par un pool de threads."""
+    multithread = True
+
+    def __init__(self, host, port, app, fd, threads=8, max_requests=0, access_log=False):
+        super().__init__(host, port, app, handler=_Handler, fd=fd)
+        # plusieurs workers sur la même socket : jamais bloqué dans accept()
+        self.socket.setblocking(False)
+        self._pool = ThreadPoolExecutor(threads, thread_name_prefix="http")
+        # un jeton par thread, pris avant accept() et rendu en fin de connexion
+        self._slots = threading.BoundedSemaphore(threads)
+        self._submitted = False
+        self._lock = threading.Lock()
+        self.max_requests = max_requests
+        self.access_log = access_log
+        self.handled = 0
+        self.stopping = False
+
+    def count_request(self):
+        with self._lock:
+            self.handled += 1
+            limit = self.max_requests and self.handled >= self.max_requests
+        if limit:
+            self.stop()
+
+    def stop(self):
+        """Arrêt gracieux : plus d'accept(), les requêtes en cours se terminent."""
+        if not self.stopping:
+            self.stopping = True
+            # shutdown() attend la fin de serve_forever : jamais depuis sa boucle
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def _handle_request_noblock(self):
+        # tous les threads occupés : pas d'accept(), serve_forever réessaie ensuite
+        if not self._slots.acquire(timeout=0.5):
+            return
+        self._submitted = False
+        try:
+            super()._handle_request_noblock()  # accept(), puis process_request
+        finally:
+            if not self._submitted:  # connexion prise par un autre worker, ou refusée
+                self._slots.release()
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process, request, client_address)
+        self._submitted = True
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        # aussi appelée par BaseWSGIServer.__init__, avant la création du pool
+        pool = getattr(self, "_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=True)
+        super().server_close()
+
+
+# ----- maître -----
+
+class Worker:
+    __slots__ = ("pid", "generation", "ready", "stopping_since")
+
+    def __init__(self, pid, generation):
+        self.pid = pid
+        self.generation = generation
+        self.ready = False
+        self.stopping_since = None
+
+
+class Arbiter:
+    def __init__(self, options):
+        self.options = options
+        self.workers = {}
+        self.generation = 0
+        self.app = None
+        self.listener = None
+        self._signals = []
+        self._stopping = False
+        self._announced = False
+        self._boot_failures = 0
+        self.exit_code = 0
+
+    # -- démarrage --
+
+    def _listen(self):
+        host, _, port = self.options.bind.rpartition(":")
+        self.listener = socket.create_server((host or "0.0.0.0", int(port)), backlog=2048)
+        self.host, self.port = self.listener.getsockname()[:2]
+
+    def _build_app(self):
+        if self.options.preload:
+            os.environ["PRELOAD"] = "1"
+            self.app = load_app(self.options.app)
+
+    def run(self):
+        self._listen()
+        self._build_app()
+        self.ready_r, self.ready_w = os.pipe()
+        self.wake_r, self.wake_w = os.pipe()
+        for fd in (self.ready_r, self.wake_r, self.wake_w):
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self.wake_w)
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, self._on_signal)
+        log.info("maître %s en écoute sur http://%s:%s (%s workers x %s threads)",
+                 os.getpid(), self.host, self.port, self.options.workers, self.options.threads)
+        try:
+            while not self._stopping:
+                self._spawn_missing()
+                self._wait()
+                self._handle_signals()
+                self._reap()
+                self._retire_old()
+        finally:
+            self._shutdown()
+        return self.exit_code
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def _wait(self):
+        try:
+            readable, _, _ = select.select([self.ready_r, self.wake_r], [], [], 1.0)
+        except InterruptedError:
+            return
+        if self.wake_r in readable:
+            _drain(self.wake_r)
+        if self.ready_r in readable:
+            for line in _drain(self.ready_r).split():
+                worker = self.workers.get(int(line))
+                if worker is not None:
+                    worker.ready = True
+            self._check_ready()
+
+    def _handle_signals(self):
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                self._stopping = True
+            elif signum == signal.SIGHUP:
+                self._reload()
+
+    # -- workers --
+
+    def _current(self):
+        return [w for w in self.workers.values() if w.generation == self.generation]
+
+    def _spawn_missing(self):
+        missing = self.options.workers - len(self._current())
+        for _ in range(max(0, missing)):
+            self._spawn()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = Worker(pid, self.generation)
+            return
+        code = 1
+        try:
+            code = self._worker_main()
+        except BaseException:
+            log.exception("worker %s : erreur fatale", os.getpid())
+        finally:
+            os._exit(code)
+
+    def _worker_main(self):
+        signal.set_wakeup_fd(-1)
+        for fd in (self.ready_r, self.wake_r, self.wake_w):
+            os.close(fd)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C : le maître arrête les workers
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        random.seed()  # sinon même tirage de jitter dans tous les workers
+        if self.app is not None:
+            app = self.app
+            _after_fork(app)
+        else:
+            app = load_app(self.options.app)
+        max_requests = self.options.max_requests
+        if max_requests and self.options.max_requests_jitter:
+            max_requests += random.randint(0, self.options.max_requests_jitter)
+        server = PooledWSGIServer(self.host, self.port, app, fd=self.listener.fileno(),
+                                  threads=self.options.threads, max_requests=max_requests,
+                                  access_log=self.options.access_log)
+        self.listener.close()
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        os.write(self.ready_w, f"{os.getpid()}\n".encode("ascii"))
+        server.serve_forever(poll_interval=0.5)
+        return 0
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if not worker.ready and code != 0:
+                # l'application ne démarre pas : ne pas forker en boucle
+                self._boot_failures += 1
+                log.error("worker %s arrêté au démarrage (code %s)", pid, code)
+                if self._boot_failures >= 5:
+                    log.error("5 échecs de démarrage consécutifs : arrêt")
+                    self._stopping = True
+                    self.exit_code = 1
+                time.sleep(min(self._boot_failures, 5))
+            elif not self._stopping and worker.stopping_since is None and worker.generation == self.generation:
+                log.info("worker %s remplacé (code %s)", pid, code)
+            if worker.ready:
+                self._boot_failures = 0
+
+    def _reload(self):
+        log.info("SIGHUP : nouvelle génération de workers")
+        sd_notify("RELOADING=1")
+        if self.options.preload:
+            try:
+                self._build_app()
+            except Exception:
+                log.exception("rechargement impossible : les workers actuels restent en place")
+                sd_notify("READY=1")
+                return
+        self.generation += 1
+        self._announced = False
+
+    def _retire_old(self):
+        old = [w for w in self.workers.values() if w.generation < self.generation]
+        if not old:
+            return
+        ready = sum(1 for w in self._current() if w.ready)
+        now = time.monotonic()
+        for worker in old:
+            if worker.stopping_since is None and ready >= self.options.workers:
+                worker.stopping_since = now
+                _kill(worker.pid, signal.SIGTERM)
+            elif worker.stopping_since is not None and now - worker.stopping_since > self.options.graceful_timeout:
+                _kill(worker.pid, signal.SIGKILL)
+
+    def _check_ready(self):
+        current = self._current()
+        if self._announced or len(current) < self.options.workers or not all(w.ready for w in current):
+            return
+        self._announced = True
+        if self.options.pidfile:
+            tmp = f"{self.options.pidfile}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="ascii") as f:
+                f.write(f"{os.getpid()}\n")
+            os.replace(tmp, self.options.pidfile)
+        sd_notify(f"READY=1\nMAINPID={os.getpid()}")
+        log.info("prêt : %s workers (génération %s)", len(current), self.generation)
+
+    # -- arrêt --
+
+    def _shutdown(self):
+        sd_notify("STOPPING=1")
+        for worker in self.workers.values():
+            _kill(worker.pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.options.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for worker in self.workers.values():
+            _kill(worker.pid, signal.SIGKILL)
+        while self.workers:
+            self._reap()
+            time.sleep(0.01)
+        if self.options.pidfile:
+            try:
+                os.unlink(self.options.pidfile)
+            except FileNotFoundError:
+                pass
+        self.listener.close()
+        log.info("arrêté")
+
+
+def _after_fork(app):
+    """Application construite dans le maître : connexions SQLAlchemy propres au worker."""
+    ext = getattr(app, "extensions", {}).get("sqlalchemy")
+    if ext is None:
+        return
+    with app.app_context():
+        for engine in ext.engines.values():
+            engine.dispose(close=False)
+
+
+def _drain(fd):
+    data = b""
+    while True:
+        try:
+            chunk = os.read(fd, 4096)
+        except BlockingIOError:
+            return data
+        if not chunk:
+            return data
+        data += chunk
+
+
+def _kill(pid, sig):
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Serveur pré-forké de l'application")
+    parser.add_argument("--bind", default=env("SERVE_BIND", "127.0.0.1:8000"), help="hôte:port")
+    parser.add_argument("--workers", type=int, default=int(env("SERVE_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--threads", type=int, default=int(env("SERVE_THREADS", 8)))
+    parser.add_argument("--max-requests", type=int, default=int(env("SERVE_MAX_REQUESTS", 0)))
+    parser.add_argument("--max-requests-jitter", type=int, default=int(env("SERVE_MAX_REQUESTS_JITTER", 0)))
+    parser.add_argument("--preload", action="store_true",
+                        default=env("PRELOAD", "").lower() in {"1", "true", "yes", "on"})
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    parser.add_argument("--pidfile")
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--app", default="app:create_app()", help='module:application ou "module:fabrique()"')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(message)s")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    return Arbiter(parse_args(argv)).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from flask import request
+
+from app import aio
+from app.asgi import WSGIToASGI
+from app.payment_gateway import StandInGateway
+
+
+def test_async_view_runs_on_shared_loop_with_request_context(app, client):
+    @app.route("/_aio_probe")
+    async def probe():
+        await asyncio.sleep(0)
+        return {"thread": threading.current_thread().name, "arg": request.args["q"]}
+
+    first = client.get("/_aio_probe?q=a").get_json()
+    second = client.get("/_aio_probe?q=b").get_json()
+    assert first == {"thread": "aio-loop", "arg": "a"}
+    assert second["arg"] == "b"
+    assert aio.get_loop() is aio.get_loop()
+
+
+@pytest.fixture
+def json_server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/missing"):
+                self.send_error(404)
+                return
+            body = json.dumps({"path": self.path, "ua": self.headers.get("User-Agent")}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_json_params_headers_and_errors(json_server):
+    data = aio.run(aio.fetch_json(f"{json_server}/track", params={"n": "TR1"}, headers={"User-Agent": "t/1"}))
+    assert data == {"path": "/track?n=TR1", "ua": "t/1"}
+    with pytest.raises(aio.FetchError):
+        aio.run(aio.fetch_json(f"{json_server}/missing"))
+
+
+def test_stand_in_gateway_waits_without_blocking_the_loop():
+    gateway = StandInGateway(latency=0.2)
+
+    async def two_charges():
+        return await asyncio.gather(
+            gateway.charge_card_async("4242424242424242", 12, 2030, "123", 100, "a"),
+            gateway.charge_card_async("4000000000000000", 12, 2030, "123", 100, "b"),
+        )
+
+    loop = asyncio.new_event_loop()
+    try:
+        start = loop.time()
+        ok, declined = loop.run_until_complete(two_charges())
+        assert loop.time() - start < 0.35
+    finally:
+        loop.close()
+    assert ok["success"] and not declined["success"]
+
+
+def test_pay_with_declined_card_redirects_back(client):
+    with client.session_transaction() as sess:
+        sess["user_id"] = 1
+        sess["pending_payment"] = {"order_id": 1, "amount_cents": 1000}
+    resp = client.post("/checkout/pay", data={"card_number": "4000 0000 0000 0000", "exp_month": "12",
+                                              "exp_year": "2030", "cvc": "123"})
+    assert resp.status_code == 302
+    assert resp.headers["Location"].endswith("/checkout/pay")
+    with client.session_transaction() as sess:
+        assert sess["pending_payment"]["order_id"] == 1
+
+
+def test_asgi_adapter_streams_wsgi_response():
+    def wsgi_app(environ, start_response):
+        body = environ["wsgi.input"].read()
+        start_response("201 Created", [("Content-Type", "text/plain"), ("X-Path", environ["PATH_INFO"])])
+        return [b"echo:", body, environ["QUERY_STRING"].encode(), environ["HTTP_X_TOKEN"].encode()]
+
+    scope = {"type": "http", "method": "POST", "path": "/écho", "query_string": b"a=1",
+             "headers": [(b"x-token", b"t"), (b"content-type", b"text/plain")]}
+    incoming = [{"type": "http.request", "body": b"ab", "more_body": True},
+                {"type": "http.request", "body": b"c"}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(WSGIToASGI(wsgi_app, max_workers=1)(scope, receive, send))
+    start, *bodies = sent
+    assert start["status"] == 201
+    assert (b"x-path", "/écho".encode("utf-8")) in start["headers"]
+    assert b"".join(m["body"] for m in bodies) == b"echo:abca=1t"
+    assert bodies[-1]["more_body"] is False
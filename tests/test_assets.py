@@ -0,0 +1,65 @@
+import gzip
+
+import pytest
+
+from app import assets, create_app
+
+CSS = "body { font-family: Poppins; } @font-face { src: url(fonts/poppins.woff2) format('woff2'); } " * 20
+
+
+@pytest.fixture
+def source(tmp_path):
+    directory = tmp_path / "static"
+    (directory / "fonts").mkdir(parents=True)
+    (directory / "site.css").write_text(CSS)
+    (directory / "fonts" / "poppins.woff2").write_bytes(b"wOF2" + bytes(200))
+    (directory / "logo.svg").write_text("<svg>" + "<g/>" * 200 + "</svg>")
+    return directory
+
+
+def test_build_fingerprints_rewrites_and_precompresses(source, tmp_path):
+    out = tmp_path / "dist"
+    manifest = assets.build(out, names=("site.css", "logo.svg", "absent.js"), source_dir=source)
+    assert set(manifest) == {"site.css", "logo.svg", "fonts/poppins.woff2"}
+    assert manifest["fonts/poppins.woff2"].startswith("fonts/poppins.")
+    css = (out / manifest["site.css"]).read_text()
+    assert f"url({manifest['fonts/poppins.woff2']})" in css
+    assert gzip.decompress((out / (manifest["site.css"] + ".gz")).read_bytes()).decode() == css
+    assert not (out / (manifest["fonts/poppins.woff2"] + ".gz")).exists()
+    assert assets.load_manifest(out) == manifest
+
+    (source / "site.css").write_text(CSS + "p { color: red; }")
+    rebuilt = assets.build(out, names=("site.css", "logo.svg"), source_dir=source)
+    assert rebuilt["site.css"] != manifest["site.css"]
+    assert rebuilt["logo.svg"] == manifest["logo.svg"]
+    assert not (out / manifest["site.css"]).exists()
+
+
+def test_asset_route_negotiates_encoding(source, tmp_path):
+    out = tmp_path / "dist"
+    manifest = assets.build(out, names=("site.css",), source_dir=source)
+    app = create_app({"TESTING": True, "ASSETS_DIR": str(out),
+                      "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'assets.db'}"})
+    client = app.test_client()
+    url = f"/assets/{manifest['site.css']}"
+
+    resp = client.get(url, headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(resp.data).decode() == (out / manifest["site.css"]).read_text()
+    assert resp.mimetype == "text/css"
+    assert "immutable" in resp.headers["Cache-Control"] and "max-age=31536000" in resp.headers["Cache-Control"]
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    resp.close()
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers and plain.data.startswith(b"body")
+    plain.close()
+    assert client.get("/assets/manifest.json").status_code == 404
+    assert client.get("/assets/../site.css").status_code == 404
+
+    with app.test_request_context():
+        assert assets.static_url("site.css") == url
+        assert assets.static_url("style.css") == "/static/style.css"
+        bootstrap = "vendor/bootstrap/bootstrap.min.css"
+        if not (assets.STATIC_DIR / bootstrap).exists():
+            assert assets.static_url(bootstrap) == assets.VENDOR[bootstrap]
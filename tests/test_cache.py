@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from app import metrics
+from app.cache import Cache, MemoryBackend, MmapBackend, SQLiteBackend
+
+@pytest.fixture(params=["memory", "sqlite", "mmap"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(maxsize=100)
+    if request.param == "sqlite":
+        return SQLiteBackend(tmp_path / "cache.db")
+    return MmapBackend(tmp_path / "cache.bin", slots=64, slot_size=1024, tag_slots=64)
+
+def test_get_set_ttl_and_tags(backend):
+    cache = Cache(backend, default_ttl=60, name="test")
+    cache.set("product:p1", {"price": 1000}, tags=("product:p1", "catalogue"))
+    cache.set("short", "x", ttl=0.01)
+    assert cache.get("product:p1") == {"price": 1000}
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+    cache.invalidate_tags("catalogue")
+    assert cache.get("product:p1") is None
+    cache.set("product:p1", {"price": 900}, tags=("product:p1", "catalogue"))
+    assert cache.get("product:p1") == {"price": 900}
+    cache.delete("product:p1")
+    assert cache.get("product:p1", "absent") == "absent"
+
+def test_invalidation_during_load_is_not_cached(backend):
+    cache = Cache(backend, name="test")
+    def load():
+        cache.invalidate_tags("product:p1")  # modification concurrente pendant le chargement
+        return "ancienne valeur"
+    assert cache.get_or_set("k", load, tags=("product:p1",)) == "ancienne valeur"
+    assert cache.get("k") is None
+
+def test_single_flight_coalesces_concurrent_misses(backend):
+    metrics.reset()
+    cache = Cache(backend, name="sf")
+    calls = []
+    gate = threading.Event()
+    def load():
+        calls.append(1)
+        gate.wait(1)
+        return "valeur"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set("hot", load))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == ["valeur"] * 8
+    assert len(calls) == 1
+    assert metrics.get("sf_cache_misses_total") == 1
+    assert metrics.get("sf_cache_coalesced_total") == 7
+
+def test_memory_lru_eviction_metrics():
+    metrics.reset()
+    cache = Cache(MemoryBackend(maxsize=2), name="lru")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # évince "b", le moins récemment utilisé
+    assert cache.get("b") is None and cache.get("a") == 1
+    assert metrics.get("lru_cache_evictions_total") == 1
+    assert metrics.get("lru_cache_hits_total") == 2
+
+def test_mmap_entries_and_tags_shared_between_mappings(tmp_path):
+    a = Cache(MmapBackend(tmp_path / "c.bin", slots=16, slot_size=512, tag_slots=16))
+    b = Cache(MmapBackend(tmp_path / "c.bin"))
+    a.set("catalogue:grouped", [1, 2, 3], tags=("catalogue",))
+    assert b.get("catalogue:grouped") == [1, 2, 3]
+    b.invalidate_tags("catalogue")
+    assert a.get("catalogue:grouped") is None
+
+def test_product_detail_is_cached_and_invalidated_on_commit(tmp_path):
+    from app import create_app
+    from app.models import Product, db
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shop.db'}"})
+    with app.app_context():
+        db.create_all()
+        db.session.add(Product(id="caftan_x", name="Caftan X", description="", price_cents=12300, stock_qty=2, category="Caftan"))
+        db.session.commit()
+    client = app.test_client()
+    assert b"123.00" in client.get("/product/caftan_x").data
+    assert b"Caftan X" in client.get("/catalogue").data
+    with app.app_context():
+        db.session.get(Product, "caftan_x").price_cents = 9900
+        db.session.commit()
+    assert b"99.00" in client.get("/product/caftan_x").data
+    assert client.get("/product/inconnu").status_code == 302
+
+def test_other_workers_and_raw_writes_never_serve_stale_pages(tmp_path):
+    import sqlite3
+    from app import create_app
+    from app.models import Product, db
+    url = f"sqlite:///{tmp_path / 'shop.db'}"
+    # backend "memory" : chaque worker a son propre cache
+    first, second = (create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": url}) for _ in range(2))
+    with first.app_context():
+        db.create_all()
+        db.session.add(Product(id="karakou_x", name="Karakou X", description="", price_cents=20000, stock_qty=1, category="Karakou"))
+        db.session.commit()
+    clients = [first.test_client(), second.test_client()]
+    for client in clients:
+        assert b"200.00" in client.get("/product/karakou_x").data
+        assert b"Karakou X" in client.get("/catalogue").data
+    with second.app_context():  # commit dans l'autre worker
+        db.session.get(Product, "karakou_x").price_cents = 18000
+        db.session.commit()
+    assert b"180.00" in clients[0].get("/product/karakou_x").data
+    conn = sqlite3.connect(tmp_path / "shop.db")  # écrivain hors ORM
+    conn.execute("UPDATE product SET name = 'Karakou Y' WHERE id = 'karakou_x'")
+    conn.commit()
+    conn.close()
+    for client in clients:
+        assert b"Karakou Y" in client.get("/catalogue").data
+        assert b"Karakou Y" in client.get("/product/karakou_x").data
@@ -0,0 +1,105 @@
+import gzip
+import zlib
+
+from flask import Flask, Response
+
+from app import create_app
+from app.compression import CompressionMiddleware, choose_encoding, strip_whitespace
+
+
+def _app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+
+    @app.route("/big")
+    def big():
+        response = Response("<p>élégance</p>\n" * 200, mimetype="text/html")
+        response.set_etag("abc")
+        return response
+
+    @app.route("/small")
+    def small():
+        return "court"
+
+    @app.route("/image")
+    def image():
+        return Response(b"\x00" * 2000, mimetype="image/png")
+
+    @app.route("/encoded")
+    def encoded():
+        return Response(gzip.compress(b"x" * 2000), mimetype="text/css", headers={"Content-Encoding": "gzip"})
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"<li>{i}</li>\n" for i in range(100)), mimetype="text/html")
+
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, min_size=500)
+    return app
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding(None) is None
+
+
+def test_large_html_is_gzipped_with_weak_etag():
+    client = _app().test_client()
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == 'W/"abc"'
+    body = response.get_data()
+    assert int(response.headers["Content-Length"]) == len(body)
+    assert gzip.decompress(body).decode("utf-8") == "<p>élégance</p>\n" * 200
+
+
+def test_identity_when_not_accepted_but_vary_set():
+    response = _app().test_client().get("/big")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"abc"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_small_binary_and_already_encoded_are_untouched():
+    client = _app().test_client()
+    headers = {"Accept-Encoding": "gzip"}
+    assert "Content-Encoding" not in client.get("/small", headers=headers).headers
+    assert "Content-Encoding" not in client.get("/image", headers=headers).headers
+    response = client.get("/encoded", headers=headers)
+    assert gzip.decompress(response.get_data()) == b"x" * 2000
+
+
+def test_streamed_response_is_compressed_chunk_by_chunk():
+    client = _app().test_client()
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    chunks = list(response.response)
+    response.close()
+    assert len(chunks) > 1  # flush après chaque morceau
+    body = zlib.decompress(b"".join(chunks), 31).decode("utf-8")
+    assert body == "".join(f"<li>{i}</li>\n" for i in range(100))
+
+
+def test_strip_whitespace_keeps_pre_and_newlines():
+    source = "<div>\n    <p>a</p>\n\n\n    <pre>  x\n    y</pre>\n  <script>\n    // c\n    f()\n  </script>\n</div>"
+    out = strip_whitespace(source)
+    assert "<pre>  x\n    y</pre>" in out
+    assert "<div>\n<p>a</p>\n" in out
+    assert "// c\nf()" in out
+    assert "\n\n" not in out
+
+
+def test_catalogue_gzipped_and_revalidated_with_weak_etag():
+    app = create_app({"TESTING": True})
+    client = app.test_client()
+    first = client.get("/catalogue", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert b"</html>" in gzip.decompress(first.get_data())
+    etag = first.headers["ETag"]
+    assert etag.startswith("W/")
+    second = client.get("/catalogue", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert second.status_code == 304
+    assert "Content-Encoding" not in second.headers
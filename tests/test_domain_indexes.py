@@ -0,0 +1,36 @@
+from app.domain import MessageThread, Order, OrderRepository, OrderStatus, ThreadRepository
+
+def _order(oid, user, created_at, status=OrderStatus.CREE):
+    return Order(id=oid, user_id=user, items=[], status=status, created_at=created_at)
+
+def test_status_index_follows_updates_in_arrival_order():
+    repo = OrderRepository()
+    for i in range(5):
+        repo.add(_order(f"o{i}", "u1", float(i)))
+    assert [o.id for o in repo.list_by_status(OrderStatus.CREE)] == ["o0", "o1", "o2", "o3", "o4"]
+    for oid in ("o3", "o1"):
+        o = repo.get(oid)
+        o.status = OrderStatus.PAYEE
+        repo.update(o)
+    assert [o.id for o in repo.list_by_status(OrderStatus.PAYEE)] == ["o3", "o1"]
+    assert repo.count_by_status(OrderStatus.CREE) == 3
+    assert [o.id for o in repo.list_by_status(OrderStatus.CREE, limit=2)] == ["o0", "o2"]
+
+def test_date_and_user_indexes():
+    repo = OrderRepository()
+    repo.add(_order("late", "u2", 30.0))
+    repo.add(_order("early", "u1", 10.0))
+    repo.add(_order("mid", "u1", 20.0))
+    assert [o.id for o in repo.list_created_between(10.0, 30.0)] == ["early", "mid"]
+    assert [o.id for o in repo.list_by_user("u1")] == ["early", "mid"]
+
+def test_thread_indexes():
+    repo = ThreadRepository()
+    repo.add(MessageThread(id="t1", user_id="u1", order_id=None, subject="a"))
+    repo.add(MessageThread(id="t2", user_id="u2", order_id=None, subject="b"))
+    repo.add(MessageThread(id="t3", user_id="u1", order_id=None, subject="c"))
+    assert [t.id for t in repo.list_by_user("u1")] == ["t1", "t3"]
+    t = repo.get("t1")
+    t.closed = True
+    repo.update(t)
+    assert [t.id for t in repo.list_open()] == ["t2", "t3"]
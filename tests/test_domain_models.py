@@ -0,0 +1,19 @@
+from app.domain import Delivery, Order, OrderItem, OrderStatus, Payment, Product
+
+def test_domain_entities_are_slotted():
+    p = Product(id="caftan_1", name="Caftan", description="", price_cents=100, category="".join("Caftan"))
+    assert not hasattr(p, "__dict__")
+    assert p.active is True
+    assert p.category is Product(id="x", name="x", description="", price_cents=1, category="".join("Caftan")).category
+
+def test_order_status_is_small_int_and_api_unchanged():
+    o = Order(id="o1", user_id="u1", items=[OrderItem("p1", "Robe", 1500, 2)], status=OrderStatus.CREE, created_at=0.0)
+    assert o.status == OrderStatus.CREE and o.status == 1
+    assert o.total_cents() == 3000
+    o.status = OrderStatus.PAYEE
+    assert o.status.name == "PAYEE"
+
+def test_optional_interned_fields_accept_none():
+    assert Product(id="p", name="n", description="", price_cents=1, category=None).category is None
+    assert Payment("pay1", "o1", "u1", 100, None, None, True, 0.0).provider is None
+    assert Delivery("d1", "o1", None, None, "adresse", "PREPAREE").carrier is None
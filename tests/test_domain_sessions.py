@@ -0,0 +1,53 @@
+import threading
+from app.domain import SessionManager
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_session_expires_after_ttl():
+    clock = Clock()
+    mgr = SessionManager(ttl=10, sliding=False, clock=clock)
+    token = mgr.create_session("u1")
+    clock.now = 9
+    assert mgr.get_user_id(token) == "u1"
+    clock.now = 10
+    assert mgr.get_user_id(token) is None
+
+def test_sliding_expiration_and_sweep_only_removes_expired():
+    clock = Clock()
+    mgr = SessionManager(ttl=10, sliding=True, shards=4, clock=clock)
+    active = mgr.create_session("active")
+    idle = [mgr.create_session(f"idle{i}") for i in range(5)]
+    clock.now = 8
+    assert mgr.get_user_id(active) == "active"  # repoussée à 18
+    clock.now = 12
+    assert mgr.sweep() == 5
+    assert len(mgr) == 1
+    assert mgr.get_user_id(active) == "active"
+    assert all(mgr.get_user_id(t) is None for t in idle)
+
+def test_destroy_session():
+    mgr = SessionManager()
+    token = mgr.create_session("u1")
+    mgr.destroy_session(token)
+    assert mgr.get_user_id(token) is None
+    assert mgr.sweep() == 0
+
+def test_concurrent_create_get():
+    mgr = SessionManager(shards=8)
+    errors = []
+    def worker(n):
+        for i in range(500):
+            token = mgr.create_session(f"{n}-{i}")
+            if mgr.get_user_id(token) != f"{n}-{i}":
+                errors.append(token)
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(mgr) == 16 * 500
@@ -0,0 +1,133 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.domain import (
+    CartRepository, Order, OrderItem, OrderRepository, OrderStatus, Product, ProductRepository, User,
+    UserRepository,
+)
+from app.domain_store import DomainStore
+
+def _repos():
+    return {"products": ProductRepository(), "orders": OrderRepository(), "carts": CartRepository()}
+
+def _fill(repos):
+    repos["products"].add(Product(id="p1", name="Robe", description="", price_cents=1000, stock_qty=5, category="Kabyle"))
+    repos["products"].reserve_stock("p1", 2)
+    order = Order(id="o1", user_id="u1", items=[OrderItem("p1", "Robe", 1000, 2)],
+                  status=OrderStatus.CREE, created_at=1.0)
+    repos["orders"].add(order)
+    order.status = OrderStatus.PAYEE
+    repos["orders"].update(order)
+    cart = repos["carts"].get_or_create("u1")
+    cart.add(repos["products"].get("p1"), 1)
+    repos["carts"].save(cart)
+
+def _restart(directory):
+    repos = _repos()
+    store = DomainStore(directory)
+    store.load_into(repos)
+    store.attach(repos)
+    return store, repos
+
+def test_restart_replays_journal_and_snapshot(tmp_path):
+    store, repos = _restart(tmp_path)
+    _fill(repos)
+    store.close()
+
+    store, repos = _restart(tmp_path)
+    assert repos["products"].get("p1").stock_qty == 3
+    assert repos["orders"].list_by_status(OrderStatus.PAYEE)[0].id == "o1"
+    assert repos["carts"].get_or_create("u1").items["p1"].quantity == 1
+
+    # instantané puis nouvelles écritures dans le segment suivant
+    store.snapshot()
+    repos["products"].release_stock("p1", 1)
+    store.close()
+    assert len(list(tmp_path.glob("snapshot.*.pkl"))) == 1
+    assert len(list(tmp_path.glob("journal.*.log"))) == 1
+
+    store, repos = _restart(tmp_path)
+    assert repos["products"].get("p1").stock_qty == 4
+    assert repos["orders"].count_by_status(OrderStatus.PAYEE) == 1
+    store.close()
+
+def test_torn_tail_is_ignored_and_truncated(tmp_path):
+    store, repos = _restart(tmp_path)
+    _fill(repos)
+    store.close()
+    log = next(tmp_path.glob("journal.*.log"))
+    size = log.stat().st_size
+    with open(log, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial")  # écriture interrompue
+
+    store, repos = _restart(tmp_path)
+    assert log.stat().st_size == size
+    assert repos["products"].get("p1").stock_qty == 3
+    store.close()
+
+def test_auto_snapshot_runs_in_background(tmp_path):
+    repos = _repos()
+    store = DomainStore(tmp_path, snapshot_every=3)
+    store.load_into(repos)
+    store.attach(repos)
+    for i in range(4):
+        repos["products"].add(Product(id=f"p{i}", name="Robe", description="", price_cents=1, stock_qty=1))
+    assert store._child is not None or store._thread is not None
+    store.close()  # attend l'écriture en arrière-plan
+    assert len(list(tmp_path.glob("snapshot.*.pkl"))) == 1
+
+    store, repos = _restart(tmp_path)
+    assert len(repos["products"].list_all()) == 4
+    store.close()
+
+def test_snapshot_child_is_reaped_by_the_next_write(tmp_path):
+    import time
+    store, repos = _restart(tmp_path)
+    _fill(repos)
+    store.snapshot(background=True)
+    pid = store._child[0]
+    deadline = time.monotonic() + 5
+    while store._child is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+        repos["products"].release_stock("p1", 0)
+    assert store._child is None
+    with pytest.raises(ChildProcessError):
+        os.waitpid(pid, os.WNOHANG)  # plus de zombie
+    assert [p.name for p in tmp_path.glob("journal.*.log")] == ["journal.00000001.log"]
+    store.close()
+
+def test_profile_update_is_journaled(tmp_path):
+    repos = {"users": UserRepository()}
+    store = DomainStore(tmp_path)
+    store.load_into(repos)
+    store.attach(repos)
+    repos["users"].add(User(id="u1", email="a@example.com", password_hash="x", first_name="Amel",
+                            last_name="K", address=""))
+    repos["users"].update_profile("u1", city="Tizi Ouzou", is_admin=True)
+    store.close()
+
+    repos = {"users": UserRepository()}
+    store = DomainStore(tmp_path)
+    store.load_into(repos)
+    user = repos["users"].get("u1")
+    assert user.city == "Tizi Ouzou" and user.is_admin is False
+    store.close()
+
+def test_store_directory_has_a_single_writer_process(tmp_path):
+    store, repos = _restart(tmp_path)
+    code = (
+        "import sys; from app.domain_store import DomainStore\n"
+        f"try: DomainStore({str(tmp_path)!r}, lock_timeout=0.2).load_into({{}})\n"
+        "except RuntimeError: sys.exit(3)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 3
+
+    store._owner = -1  # objet hérité d'un fork
+    with pytest.raises(RuntimeError):
+        repos["products"].add(Product(id="px", name="Robe", description="", price_cents=1))
+    store._owner = os.getpid()
+    store.close()
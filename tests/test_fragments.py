@@ -0,0 +1,43 @@
+from app import create_app
+from app.models import db
+
+
+def test_shared_page_is_identical_for_every_visitor(client):
+    anonymous = client.get("/catalogue")
+    with client.session_transaction() as sess:
+        sess["user_id"] = 42
+        sess["cart"] = {"caftan_1": 2, "abaya_1": 1}
+        sess["_flashes"] = [("success", "Bienvenue Amina")]
+    logged_in = client.get("/catalogue")
+    assert logged_in.data == anonymous.data
+    assert logged_in.headers["ETag"] == anonymous.headers["ETag"]
+    assert "Cookie" not in logged_in.headers.get("Vary", "")
+    page = logged_in.get_data(as_text=True)
+    assert 'data-personal="account"' in page and "Déconnexion" not in page
+    assert "Bienvenue Amina" not in page
+
+    data = client.get("/fragment/personal").get_json()
+    assert data["cart_count"] == 3 and data["logged_in"] is True
+    assert "Déconnexion" in data["parts"]["account"] and ">3<" in data["parts"]["account"]
+    assert "Bienvenue Amina" in data["parts"]["flashes"]
+    # messages consommés par le fragment
+    assert "Bienvenue Amina" not in client.get("/fragment/flashes").get_data(as_text=True)
+
+
+def test_private_pages_render_personal_parts_inline(client):
+    with client.session_transaction() as sess:
+        sess["user_id"] = 42
+    page = client.get("/cart").get_data(as_text=True)
+    assert "data-personal" not in page and "Déconnexion" in page
+    assert client.get("/fragment/inconnu").status_code == 404
+
+
+def test_esi_mode(tmp_path):
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'esi.db'}",
+                      "FRAGMENTS_MODE": "esi"})
+    with app.app_context():
+        db.create_all()
+    page = app.test_client().get("/catalogue").get_data(as_text=True)
+    assert '<esi:include src="/fragment/account"/>' in page
+    assert '<esi:include src="/fragment/flashes"/>' in page
+    assert "/fragment/personal" not in page
@@ -0,0 +1,118 @@
+import sqlite3
+
+import pytest
+
+from app import create_app, metrics
+from app.models import Product, db
+from app.routes import catalogue_routes
+
+
+@pytest.fixture
+def product(app, ctx):
+    p = Product(id="caftan_test", name="Caftan", description="Brodé", price_cents=18900,
+                stock_qty=3, category="Caftan", active=True)
+    db.session.add(p)
+    db.session.commit()
+    return p
+
+
+def test_catalogue_answers_304_without_running_the_view(client, product, monkeypatch):
+    first = client.get("/catalogue")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Last-Modified"]
+    assert "max-age=0" in first.headers["Cache-Control"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("vue appelée malgré l'ETag")
+    monkeypatch.setattr(catalogue_routes, "_grouped", fail)
+    metrics.reset()
+    resp = client.get("/catalogue", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.data == b""
+    assert resp.headers["ETag"] == etag
+    assert metrics.get("http_not_modified_total") == 1
+
+    resp = client.get("/catalogue", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert resp.status_code == 304
+
+
+def test_product_change_gives_new_etag(client, product):
+    catalogue = client.get("/catalogue").headers["ETag"]
+    detail = client.get("/product/caftan_test").headers["ETag"]
+    api = client.get("/api/products/caftan_test")
+    assert api.get_json()["price_cents"] == 18900
+    assert client.get("/api/products/caftan_test", headers={"If-None-Match": api.headers["ETag"]}).status_code == 304
+
+    product.price_cents = 17900
+    db.session.commit()
+    resp = client.get("/product/caftan_test", headers={"If-None-Match": detail})
+    assert resp.status_code == 200 and resp.headers["ETag"] != detail
+    assert client.get("/catalogue", headers={"If-None-Match": catalogue}).status_code == 200
+    assert client.get("/api/products/caftan_test", headers={"If-None-Match": api.headers["ETag"]}).get_json()["price_cents"] == 17900
+    assert [p["id"] for p in client.get("/api/products").get_json()] == ["caftan_test"]
+
+
+def test_personalized_pages_keep_per_user_etag(tmp_path):
+    # sans politique publique, la page affiche compte et messages elle-même
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'perso.db'}",
+                      "CACHE_POLICIES": {"catalogue": None}})
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    anonymous = client.get("/catalogue").headers["ETag"]
+    with client.session_transaction() as sess:
+        sess["user_id"] = 42
+    resp = client.get("/catalogue", headers={"If-None-Match": anonymous})
+    assert resp.status_code == 200 and resp.headers["ETag"] != anonymous
+    assert "private" in resp.headers["Cache-Control"] and "Déconnexion" in resp.get_data(as_text=True)
+
+    with client.session_transaction() as sess:
+        sess["_flashes"] = [("success", "Produit ajouté")]
+    resp = client.get("/catalogue", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 200 and "ETag" not in resp.headers
+    assert "Produit ajouté" in resp.get_data(as_text=True)
+
+
+def test_etag_follows_database_across_workers_and_raw_writes(tmp_path):
+    # deux workers (backend de cache "memory", donc rien de partagé) sur la même base
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    workers = [create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": url}) for _ in range(2)]
+    with workers[0].app_context():
+        db.create_all()
+        db.session.add(Product(id="robe", name="Robe", price_cents=9900, stock_qty=2, category="Kabyle"))
+        db.session.commit()
+    first, second = (w.test_client() for w in workers)
+    for path in ("/catalogue", "/product/robe", "/api/products/robe"):
+        etag = first.get(path).headers["ETag"]
+        assert second.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    detail = first.get("/product/robe").headers["ETag"]
+    listing = first.get("/catalogue").headers["ETag"]
+    conn = sqlite3.connect(tmp_path / "shared.db")  # écrivain hors ORM
+    conn.execute("UPDATE product SET price_cents = 8900 WHERE id = 'robe'")
+    conn.commit()
+    assert second.get("/product/robe", headers={"If-None-Match": detail}).status_code == 200
+    assert first.get("/catalogue", headers={"If-None-Match": listing}).status_code == 200
+    listing = first.get("/catalogue").headers["ETag"]
+    conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                 "VALUES ('caftan', 'Caftan', 100, 1, 'Caftan', 1)")
+    conn.commit()
+    conn.close()
+    assert second.get("/catalogue", headers={"If-None-Match": listing}).status_code == 200
+
+
+def test_catalogue_etag_changes_on_delete_then_insert(client, product):
+    # même nombre de lignes, même somme des versions, rowid réutilisé par SQLite
+    path = db.engine.url.database
+    listing = client.get("/catalogue").headers["ETag"]
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM product WHERE id = 'caftan_test'")
+        conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                     "VALUES ('abaya_test', 'Abaya', 100, 1, 'Abaya', 1)")
+    resp = client.get("/catalogue", headers={"If-None-Match": listing})
+    assert resp.status_code == 200 and b"Abaya" in resp.data
+    listing = resp.headers["ETag"]
+    with sqlite3.connect(path) as conn:  # même id supprimé puis recréé
+        conn.execute("DELETE FROM product WHERE id = 'abaya_test'")
+        conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                     "VALUES ('abaya_test', 'Abaya', 100, 1, 'Abaya', 1)")
+    assert client.get("/catalogue", headers={"If-None-Match": listing}).status_code == 200
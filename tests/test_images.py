@@ -0,0 +1,114 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image
+
+from app import create_app, images, metrics
+
+
+def _save_source(directory, name, size=(900, 600), color=(200, 30, 60, 255)):
+    # certaines photos du dépôt sont des PNG RGBA nommés .jpg
+    Image.new("RGBA", size, color).save(directory / f"{name}.jpg", "PNG")
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    directory = tmp_path / "images"
+    directory.mkdir()
+    monkeypatch.setattr(images, "SOURCE_DIR", directory)
+    _save_source(directory, "robe_test")
+    _save_source(directory, "petite", size=(200, 100))
+    return directory
+
+
+@pytest.fixture
+def image_app(tmp_path, sources):
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'images.db'}",
+        "IMAGE_VARIANTS_DIR": str(tmp_path / "variants"),
+        "IMAGE_CACHE_DIR": str(tmp_path / "cache"),
+    })
+
+
+def test_variant_names_follow_source_content(sources):
+    card = images.variant("robe_test", "card", "webp")
+    assert card.width == 480 and card.height == 320
+    assert images.parse(card.filename)[:2] == ("robe_test", "card")
+    assert images.variant("robe_test", "card", "webp") == card
+    assert images.variant("robe_test", "card", "jpg").filename != card.filename
+
+    _save_source(sources, "robe_test", color=(10, 10, 10, 255))
+    os.utime(sources / "robe_test.jpg", ns=(1, 1))  # mtime différent même sur un FS grossier
+    assert images.variant("robe_test", "card", "webp").filename != card.filename
+
+
+def test_render_resizes_without_upscaling(sources):
+    with Image.open(io.BytesIO(images.render("robe_test", "thumb", "webp"))) as im:
+        assert im.format == "WEBP" and im.size == (240, 160)
+    with Image.open(io.BytesIO(images.render("petite", "zoom", "jpg"))) as im:
+        assert im.format == "JPEG" and im.size == (200, 100) and im.mode == "RGB"
+    assert images.variant("missing", "card", "jpg") is None
+    assert images.variant("../secret", "card", "jpg") is None
+
+
+def test_endpoint_generates_caches_and_redirects_stale(image_app, tmp_path):
+    metrics.reset()
+    client = image_app.test_client()
+    with image_app.test_request_context():
+        filename = images.variant("robe_test", "card", "webp").filename
+
+    resp = client.get(f"/img/{filename}")
+    assert resp.status_code == 200
+    assert resp.mimetype == "image/webp"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert (tmp_path / "cache" / filename).exists()
+    resp.close()
+    client.get(f"/img/{filename}").close()
+    assert metrics.get("image_cache_misses_total") == 1
+    assert metrics.get("image_cache_hits_total") == 1
+
+    name, size, digest, ext = images.parse(filename)
+    stale = client.get(f"/img/{name}.{size}.{'0' * 10}.{ext}")
+    assert stale.status_code == 302 and stale.headers["Location"].endswith(filename)
+    assert client.get("/img/robe_test.huge.0000000000.webp").status_code == 404
+    assert client.get("/img/inconnu.card.0000000000.webp").status_code == 404
+
+
+def test_prebuilt_variants_are_served_first(image_app, tmp_path):
+    results = images.generate_all(tmp_path / "variants")
+    assert len(results) == 2 * len(images.SIZES) * len(images.FORMATS)
+    assert all(created for _, _, created in results)
+    assert not any(created for _, _, created in images.generate_all(tmp_path / "variants"))
+
+    metrics.reset()
+    resp = image_app.test_client().get(f"/img/{results[0][0]}")
+    assert resp.status_code == 200
+    resp.close()
+    assert metrics.get("image_variant_prebuilt_total") == 1
+    assert not (tmp_path / "cache").exists()
+
+
+def test_disk_cache_evicts_least_recently_read(tmp_path):
+    cache = images.DiskCache(tmp_path / "cache", max_bytes=350)
+    for i, name in enumerate(("a", "b", "c")):
+        cache.put(name, b"x" * 100)
+        os.utime(tmp_path / "cache" / name, ns=(i * 10**9, i * 10**9))
+    assert cache.get("a") is not None  # relu : devient le plus récent
+    cache.put("d", b"x" * 100)
+    assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["a", "c", "d"]
+    assert cache.size() <= 350
+
+
+def test_responsive_img_markup(image_app):
+    with image_app.test_request_context():
+        html = str(images.responsive_img("robe_test", "Robe <test>", sizes="33vw", css_class="card-img-top"))
+        fallback = str(images.responsive_img("inconnu", "Absente"))
+    assert html.startswith("<picture>") and 'type="image/webp"' in html
+    assert " 240w, " in html and " 480w, " in html and " 900w" in html
+    assert 'sizes="33vw"' in html and 'width="480" height="320"' in html
+    assert "Robe &lt;test&gt;" in html
+    assert fallback.startswith("<img") and "/static/images/inconnu.jpg" in fallback
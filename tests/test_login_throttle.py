@@ -0,0 +1,96 @@
+from app import metrics
+from app.login_throttle import LoginThrottle, MemoryWindow, SQLiteWindow
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def _check_store(store):
+    clock = FakeClock()
+    t = LoginThrottle(store, max_per_email=3, max_per_ip=100, window=60, clock=clock)
+    for _ in range(3):
+        assert t.attempt("a@example.com", "1.2.3.4") == (True, 0)
+    allowed, retry_after = t.attempt("A@example.com", "1.2.3.4")
+    assert allowed is False and 0 < retry_after <= 61
+    # autre email, même IP : autorisé
+    assert t.attempt("b@example.com", "1.2.3.4")[0] is True
+    # la fenêtre glisse
+    clock.now += 61
+    assert t.attempt("a@example.com", "1.2.3.4")[0] is True
+    t.reset("a@example.com")
+    assert all(t.attempt("a@example.com", "1.2.3.4")[0] for _ in range(3))
+
+def test_memory_window_throttles_per_email():
+    _check_store(MemoryWindow())
+
+def test_sqlite_window_shared_between_instances(tmp_path):
+    db = tmp_path / "throttle.db"
+    _check_store(SQLiteWindow(db))
+    clock = FakeClock()
+    a = LoginThrottle(SQLiteWindow(db), max_per_email=100, max_per_ip=2, window=60, clock=clock)
+    b = LoginThrottle(SQLiteWindow(db), max_per_email=100, max_per_ip=2, window=60, clock=clock)
+    assert a.attempt("x@example.com", "9.9.9.9")[0] is True
+    assert b.attempt("y@example.com", "9.9.9.9")[0] is True
+    assert a.attempt("z@example.com", "9.9.9.9")[0] is False
+
+def test_login_route_rejects_before_hashing(app, client):
+    calls = []
+    class FakeAuth:
+        def login(self, email, password):
+            calls.append(email)
+            return None
+    app.extensions["services"]["auth"] = FakeAuth()
+    app.extensions["login_throttle"] = LoginThrottle(max_per_email=2, max_per_ip=100, window=60)
+    before = metrics.get("login_throttled_total")
+    for _ in range(4):
+        client.post("/login", data={"email": "victim@example.com", "password": "x"})
+    assert len(calls) == 2
+    assert metrics.get("login_throttled_total") == before + 2
+
+def _burst(throttles, n=24):
+    import threading
+    barrier = threading.Barrier(n)
+    results = []
+
+    def one(i):
+        barrier.wait()
+        results.append(throttles[i % len(throttles)].attempt(f"u{i}@example.com", "5.5.5.5")[0])
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_burst_never_exceeds_limit(tmp_path):
+    store = MemoryWindow()
+    assert _burst([LoginThrottle(store, max_per_ip=5)]).count(True) == 5
+    db = tmp_path / "burst.db"
+    shared = [LoginThrottle(SQLiteWindow(db), max_per_ip=5) for _ in range(3)]
+    assert _burst(shared).count(True) == 5
+
+def test_metrics_require_admin_or_token(app, client):
+    # le client de test arrive de 127.0.0.1, comme tout le trafic derrière le proxy local
+    assert client.get("/metrics").status_code == 404
+    app.config["METRICS_TOKEN"] = "s3cret"
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    with client.session_transaction() as sess:
+        sess["is_admin"] = True
+    assert client.get("/metrics").status_code == 200
+
+def test_forwarded_for_used_only_with_trusted_proxies(db_file):
+    from flask import request
+    from run import create_app
+
+    def remote_addr(trusted):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_file}",
+                          "TRUSTED_PROXIES": trusted})
+        app.add_url_rule("/_ip", "_ip", lambda: request.remote_addr)
+        return app.test_client().get("/_ip", headers={"X-Forwarded-For": "203.0.113.7"}).get_data(as_text=True)
+
+    assert remote_addr(0) == "127.0.0.1"
+    assert remote_addr(1) == "203.0.113.7"
@@ -0,0 +1,45 @@
+import hashlib
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+from app.password_hashing import PasswordHashPool, calibrate, needs_rehash, is_legacy_hash
+
+FAST = "pbkdf2:sha256:1000"
+
+def test_inline_pool_hash_and_verify():
+    pool = PasswordHashPool(max_workers=0, method=FAST)
+    h = pool.hash("Secret123!")
+    assert h.startswith(FAST + "$")
+    assert pool.verify(h, "Secret123!") is True
+    assert pool.verify(h, "wrong") is False
+
+def test_process_pool_hash_and_verify():
+    pool = PasswordHashPool(max_workers=1, method=FAST)
+    try:
+        h = pool.hash("Secret123!")
+        assert pool.verify(h, "Secret123!") is True
+    finally:
+        pool.shutdown()
+
+def test_legacy_sha256_verified_and_flagged_for_rehash():
+    legacy = hashlib.sha256(b"secret").hexdigest()
+    pool = PasswordHashPool(max_workers=0, method=FAST)
+    assert is_legacy_hash(legacy)
+    assert pool.verify(legacy, "secret") is True
+    assert pool.verify(legacy, "other") is False
+    assert pool.needs_rehash(legacy) is True
+
+def test_needs_rehash_when_parameters_change():
+    pool = PasswordHashPool(max_workers=0, method=FAST)
+    h = pool.hash("x")
+    assert needs_rehash(h, FAST) is False
+    assert needs_rehash(h, "pbkdf2:sha256:2000") is True
+
+def test_needs_rehash_accepts_werkzeug_short_method_names():
+    assert needs_rehash("scrypt:32768:8:1$sel$abc", "scrypt") is False
+    assert needs_rehash("scrypt:16384:8:1$sel$abc", "scrypt") is True
+    assert needs_rehash(f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}$sel$abc", "pbkdf2") is False
+    assert needs_rehash(f"pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}$sel$abc", "pbkdf2:sha512") is False
+
+def test_calibrate_returns_werkzeug_method():
+    method = calibrate(target_ms=1, algorithm="pbkdf2", samples=1)
+    assert method.startswith("pbkdf2:sha256:")
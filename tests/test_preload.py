@@ -0,0 +1,84 @@
+import gc
+
+from app.preload import CatalogueSnapshot
+
+ROWS = [
+    ("caftan_1", "Caftan Or", "Ornements dorés", 18900, 2, "Caftan", True),
+    ("robe_1", "Robe Kabyle", None, 15900, 0, "Kabyle", False),
+    ("caftan_2", "Caftan Bleu", "Velours — broderie", 17900, 3, "Caftan", None),
+]
+
+def test_snapshot_views_and_categories():
+    snap = CatalogueSnapshot(ROWS)
+    assert len(snap) == 3
+    p = snap.get("caftan_2")
+    assert (p.name, p.description, p.price_cents, p.stock_qty, p.active) == ("Caftan Bleu", "Velours — broderie", 17900, 3, True)
+    assert snap.get("robe_1").description == "" and not snap.get("robe_1").active
+    assert snap.get("absent") is None
+    assert [v.id for v in snap.in_category("Caftan")] == ["caftan_1", "caftan_2"]
+    assert [v.id for v in snap] == ["caftan_1", "robe_1", "caftan_2"]
+
+def test_update_in_place_or_ask_for_rebuild():
+    snap = CatalogueSnapshot([row + (1,) for row in ROWS])
+    assert snap.update([("caftan_1", "Caftan Or", "Ornements dorés", 17900, 0, "Caftan", True, 2),
+                        ("robe_1", "Robe Kabyle", None, 15900, 4, "Kabyle", True, 2)])
+    assert snap.get("caftan_1")[3:5] == (17900, 0)
+    assert snap.get("robe_1").stock_qty == 4 and snap.get("robe_1").active
+    assert not snap.update([("nouveau", "Nouveau", "", 1, 1, "Caftan", True, 4)])
+    # texte modifié : rien n'est appliqué, reconstruction demandée
+    assert not snap.update([("caftan_2", "Caftan Bleu", "Velours — broderie", 1, 3, "Caftan", None, 2),
+                            ("caftan_1", "Caftan Argent", "Ornements dorés", 1, 0, "Caftan", True, 3)])
+    assert snap.get("caftan_2").price_cents == 17900
+
+def test_preload_snapshot_follows_other_writers(tmp_path, monkeypatch):
+    import sqlite3
+    from app import create_app
+    from app.models import Product, db
+    url = f"sqlite:///{tmp_path / 'shop.db'}"
+    with create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": url}).app_context():
+        db.create_all()
+        db.session.add(Product(id="caftan_p", name="Caftan P", price_cents=10000, stock_qty=1, category="Caftan"))
+        db.session.add(Product(id="abaya_p", name="Abaya P", price_cents=5000, stock_qty=1, category="Abaya"))
+        db.session.commit()
+    monkeypatch.setattr(gc, "freeze", lambda: None)
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": url, "PRELOAD": True})
+    master = app.extensions["catalogue_snapshot"]
+    client = app.test_client()
+    assert client.get("/api/products/caftan_p").get_json()["price_cents"] == 10000
+
+    conn = sqlite3.connect(tmp_path / "shop.db")  # autre worker / écrivain hors ORM
+    conn.execute("UPDATE product SET price_cents = 9000 WHERE id = 'caftan_p'")
+    conn.commit()
+    assert client.get("/api/products/caftan_p").get_json()["price_cents"] == 9000
+    assert app.extensions["catalogue_snapshot"] is master  # modifié en place
+
+    conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                 "VALUES ('karakou_p', 'Karakou P', 30000, 1, 'Karakou', 1)")
+    conn.execute("DELETE FROM product WHERE id = 'abaya_p'")
+    conn.commit()
+    conn.close()
+    ids = [p["id"] for p in client.get("/api/products").get_json()]
+    assert ids == ["caftan_p", "karakou_p"]  # ordre des catégories : Kabyle, Abaya, Caftan, Karakou
+    assert client.get("/api/products/abaya_p").status_code == 404
+
+    with sqlite3.connect(tmp_path / "shop.db") as conn:  # supprimé puis recréé : même texte
+        conn.execute("DELETE FROM product WHERE id = 'karakou_p'")
+        conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                     "VALUES ('karakou_p', 'Karakou P', 25000, 1, 'Karakou', 1)")
+    assert client.get("/api/products/karakou_p").get_json()["price_cents"] == 25000
+    with sqlite3.connect(tmp_path / "shop.db") as conn:
+        conn.execute("DELETE FROM product WHERE id = 'karakou_p'")
+    assert [p["id"] for p in client.get("/api/products").get_json()] == ["caftan_p"]
+
+def test_create_app_preload_freezes_gc(monkeypatch):
+    from app import create_app
+    frozen = []
+    monkeypatch.setattr(gc, "freeze", lambda: frozen.append(True))
+    app = create_app({"TESTING": True, "PRELOAD": True})
+    assert frozen
+    snap = app.extensions["catalogue_snapshot"]
+    with app.test_client() as client:
+        resp = client.get("/catalogue")
+    assert resp.status_code == 200
+    for p in snap.in_category("Caftan"):
+        assert p.name.encode() in resp.data
@@ -0,0 +1,151 @@
+import sqlite3
+
+from sqlalchemy import create_engine, event
+
+from app import models
+from app.models import Product, db
+from app.product_versions import changes_since, check_schema, ensure_schema, init_app, revalidate_lines
+
+def _add_products(n=3):
+    for i in range(n):
+        db.session.add(Product(id=f"pv_{i}", name=f"Produit {i}", price_cents=1000 + i, stock_qty=5, category="Abaya"))
+    db.session.commit()
+
+def _version(pid):
+    return db.session.execute(db.select(Product.version).where(Product.id == pid)).scalar_one()
+
+def test_trigger_bumps_version_on_real_changes_only(app, ctx):
+    _add_products(1)
+    seen = [_version("pv_0")]
+    p = db.session.get(Product, "pv_0")
+    p.stock_qty = 5  # valeur inchangée
+    db.session.commit()
+    assert _version("pv_0") == seen[-1]
+    p.stock_qty = 4
+    db.session.commit()
+    seen.append(_version("pv_0"))
+    db.session.execute(db.text("UPDATE product SET price_cents = 1 WHERE id = 'pv_0'"))
+    db.session.commit()
+    seen.append(_version("pv_0"))
+    p.name = "Nouveau nom"  # affiché par le catalogue et le panier
+    db.session.commit()
+    seen.append(_version("pv_0"))
+    assert seen == sorted(set(seen))  # strictement croissante
+
+def test_reinserted_product_never_reuses_a_version(app, ctx):
+    _add_products(1)
+    cart = {"pv_0": 1}
+    lines, _ = revalidate_lines(cart, {})
+    old = _version("pv_0")
+    db.session.delete(db.session.get(Product, "pv_0"))
+    db.session.commit()
+    db.session.execute(db.text("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                               "VALUES ('pv_0', 'Produit 0', 999, 5, 'Abaya', 1)"))
+    db.session.commit()
+    assert _version("pv_0") > old
+    lines, stale = revalidate_lines(cart, {"pv_0": old})
+    assert stale == ["pv_0"] and lines["pv_0"][1] == 999
+
+def test_changes_since_lists_deleted_moved_and_reinserted_products(app, ctx):
+    _add_products(2)
+    with db.engine.connect() as c:
+        start, _ = changes_since(c, 0)
+    db.session.execute(db.text("UPDATE product SET category = 'Caftan' WHERE id = 'pv_0'"))
+    db.session.execute(db.text("DELETE FROM product WHERE id = 'pv_1'"))
+    db.session.execute(db.text("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                               "VALUES ('pv_1', 'Produit 1', 5, 1, 'Karakou', 1)"))
+    db.session.commit()
+    with db.engine.connect() as c:
+        current, changes = changes_since(c, start)
+        assert current == start + 3
+        assert changes == [("pv_0", "Abaya", "Caftan"), ("pv_1", "Abaya", "Karakou"), ("pv_1", None, "Karakou")]
+        assert changes_since(c, current) == (current, [])
+        c.execute(db.text("DELETE FROM catalogue_log WHERE generation <= :g"), {"g": start + 1})
+        assert changes_since(c, start) == (current, None)  # journal tronqué
+
+def test_ensure_schema_migrates_existing_table(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE product (id TEXT PRIMARY KEY, name TEXT, description TEXT, price_cents INTEGER, stock_qty INTEGER, category TEXT, active BOOLEAN)")
+    conn.execute("INSERT INTO product VALUES ('a', 'A', '', 100, 1, 'Abaya', 1)")
+    conn.commit()
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as c:
+        assert ensure_schema(c)
+    conn.execute("UPDATE product SET stock_qty = 0 WHERE id = 'a'")
+    conn.execute("INSERT INTO product VALUES ('b', 'B', '', 100, 1, 'Abaya', 1, 1)")
+    assert conn.execute("SELECT id, version FROM product ORDER BY id").fetchall() == [("a", 2), ("b", 3)]
+
+def test_init_app_only_checks_schema(tmp_path, caplog):
+    from flask import Flask
+
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE product (id TEXT PRIMARY KEY, name TEXT, description TEXT, price_cents INTEGER, stock_qty INTEGER, category TEXT, active BOOLEAN)")
+    conn.commit()
+    before = conn.execute("SELECT type, name, sql FROM sqlite_master").fetchall()
+    old = Flask(__name__)
+    old.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(old)
+    assert init_app(old) is False
+    assert "add_product_version_column.py" in caplog.text
+    assert conn.execute("SELECT type, name, sql FROM sqlite_master").fetchall() == before
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as c:
+        assert check_schema(c) == ["colonne version", "table catalogue_meta", "table catalogue_log",
+                                   "index ix_product_version", "trigger product_version_insert", "trigger product_version_bump",
+                                   "trigger product_generation_delete"]
+        ensure_schema(c)
+        assert check_schema(c) == []
+    assert init_app(old) is True
+
+def test_ensure_schema_replaces_outdated_trigger(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE product (id TEXT PRIMARY KEY, name TEXT, description TEXT, price_cents INTEGER, "
+                 "stock_qty INTEGER, category TEXT, active BOOLEAN, version INTEGER NOT NULL DEFAULT 1)")
+    conn.execute("CREATE TRIGGER product_version_bump AFTER UPDATE OF price_cents ON product "
+                 "BEGIN UPDATE product SET version = OLD.version + 1 WHERE id = NEW.id; END")
+    conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, active) VALUES ('a', 'A', 100, 1, 1)")
+    conn.commit()
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as c:
+        assert check_schema(c) == ["table catalogue_meta", "table catalogue_log", "index ix_product_version",
+                                   "trigger product_version_insert", "trigger product_version_bump à jour",
+                                   "trigger product_generation_delete"]
+        ensure_schema(c)
+        assert check_schema(c) == []
+    conn.execute("UPDATE product SET name = 'B' WHERE id = 'a'")
+    assert conn.execute("SELECT version FROM product WHERE id = 'a'").fetchone()[0] == 2
+
+def test_revalidate_fetches_only_changed_lines(app, ctx):
+    _add_products(3)
+    cart = {"pv_0": 1, "pv_1": 2, "pv_2": 1, "disparu": 1}
+    lines, stale = revalidate_lines(cart, {})
+    assert stale == ["pv_0", "pv_1", "pv_2"]
+    assert lines["pv_1"][1:] == [1001, 5, "Produit 1"] and "disparu" not in lines
+
+    db.session.get(Product, "pv_1").price_cents = 900
+    db.session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *a: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        lines, stale = revalidate_lines(cart, {pid: line[0] for pid, line in lines.items()})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert stale == ["pv_1"]
+    assert lines["pv_1"][1] == 900
+    assert len(statements) == 2  # SELECT id, version + relecture de la seule ligne modifiée
+
+def test_cart_api_uses_revalidated_lines(app, client, ctx):
+    _add_products(2)
+    with client.session_transaction() as s:
+        s["cart"] = {"pv_0": 1}
+    data = client.post("/cart/api/update/pv_1", json={"qty": 2}).get_json()
+    assert data["subtotal_cents"] == 2002
+    assert data["cart_total_cents"] == 1000 + 2002
+    with client.session_transaction() as s:
+        # versions seulement, pas prix / nom
+        assert s["cart_lines"] == {"pv_0": _version("pv_0"), "pv_1": _version("pv_1")}
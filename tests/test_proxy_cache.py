@@ -0,0 +1,118 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import threading
+import time
+
+import pytest
+
+from app import create_app, metrics
+from app.models import Product, db
+
+
+@pytest.fixture
+def purge_server():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_PURGE(self):
+            received.append(self.headers["Surrogate-Key"])
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/", received
+    server.shutdown()
+
+
+@pytest.fixture
+def proxy_app(tmp_path, purge_server):
+    metrics.reset()
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'proxy.db'}",
+        "CACHE_PURGE_URL": purge_server[0],
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Product(id="abaya_test", name="Abaya", price_cents=9900, stock_qty=2,
+                               category="Abaya", active=True))
+        db.session.commit()
+    return app
+
+
+def test_policies_and_surrogate_keys(proxy_app):
+    client = proxy_app.test_client()
+    resp = client.get("/product/abaya_test")
+    assert resp.headers["Cache-Control"].startswith("public") and "s-maxage=300" in resp.headers["Cache-Control"]
+    assert resp.headers["Surrogate-Key"].split() == ["category-Abaya", "product-abaya_test"]
+    assert "category-Caftan" in client.get("/catalogue").headers["Surrogate-Key"].split()
+    assert client.get("/cart").headers["Cache-Control"] == "private, no-store"
+
+    # page sans contenu personnel (fragments) : la même pour un utilisateur connecté
+    with client.session_transaction() as sess:
+        sess["user_id"] = 7
+    resp = client.get("/product/abaya_test")
+    assert resp.headers["Cache-Control"].startswith("public") and "Cookie" not in resp.headers.get("Vary", "")
+    assert client.get("/fragment/personal").headers["Cache-Control"] == "private, no-store"
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_product_commit_sends_purge(proxy_app, purge_server):
+    _, received = purge_server
+    # création du produit par la fixture
+    _wait_for(lambda: metrics.get("cache_purge_requests_total") == 1)
+    assert received == ["category-Abaya product-abaya_test"]
+    received.clear()
+    with proxy_app.app_context():
+        product = db.session.get(Product, "abaya_test")
+        product.category = "Caftan"
+        product.price_cents = 8900
+        db.session.commit()
+        _wait_for(lambda: metrics.get("cache_purge_requests_total") == 2)
+        assert received == ["category-Abaya category-Caftan product-abaya_test"]
+
+        product.name = "Abaya brodée"
+        db.session.rollback()
+        time.sleep(0.05)
+        assert len(received) == 1
+    assert metrics.get("cache_purge_requests_total") == 2
+
+
+def test_poll_purges_writes_outside_the_orm(proxy_app, tmp_path):
+    import fcntl
+    import sqlite3
+    from app.proxy_cache import PurgeNotifier
+    lock = str(tmp_path / "poll.lock")
+    first = PurgeNotifier("http://unused/", app=proxy_app, poll=5, lock_path=lock)
+    other = PurgeNotifier("http://unused/", app=proxy_app, poll=5, lock_path=lock)
+    assert first.changed_keys() == set()  # relevé de référence
+    conn = sqlite3.connect(tmp_path / "proxy.db")
+    conn.execute("UPDATE product SET category = 'Caftan' WHERE id = 'abaya_test'")
+    conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                 "VALUES ('robe_test', 'Robe', 100, 1, 'Kabyle', 1)")
+    conn.commit()
+    assert other.changed_keys() == set()  # un seul processus relève
+    assert first.changed_keys() == {"product-abaya_test", "category-Abaya", "category-Caftan",
+                                    "product-robe_test", "category-Kabyle"}
+    # supprimé puis recréé dans une autre catégorie entre deux relevés
+    conn.execute("DELETE FROM product WHERE id = 'robe_test'")
+    conn.execute("INSERT INTO product (id, name, price_cents, stock_qty, category, active) "
+                 "VALUES ('robe_test', 'Robe', 100, 1, 'Chaoui', 1)")
+    conn.commit()
+    assert first.changed_keys() == {"product-robe_test", "category-Kabyle", "category-Chaoui"}
+    assert first.changed_keys() == set()
+
+    # le détenteur s'arrête : l'autre reprend à la génération notée dans le verrou
+    fcntl.flock(first._lock_fd, fcntl.LOCK_UN)
+    conn.execute("DELETE FROM product WHERE id = 'robe_test'")
+    conn.commit()
+    conn.close()
+    assert other.changed_keys() == {"product-robe_test", "category-Chaoui"}
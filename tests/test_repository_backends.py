@@ -0,0 +1,86 @@
+import pytest
+
+from app import domain
+from app.domain import (
+    AuthService, BillingService, CartService, CustomerService, DeliveryService, OrderService,
+    OrderStatus, PaymentGateway, Product, SessionManager,
+)
+from app.repositories import create_repositories
+
+PROTOCOLS = {
+    "users": domain.UserRepo, "products": domain.ProductRepo, "carts": domain.CartRepo,
+    "orders": domain.OrderRepo, "invoices": domain.InvoiceRepo, "payments": domain.PaymentRepo,
+    "threads": domain.ThreadRepo,
+}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repos(request, tmp_path):
+    return create_repositories(request.param, path=tmp_path / "domain.db")
+
+def test_backends_implement_protocols(repos):
+    for name, proto in PROTOCOLS.items():
+        assert isinstance(repos[name], proto), name
+
+def test_checkout_pay_ship_deliver(repos):
+    auth = AuthService(repos["users"], SessionManager())
+    admin = auth.register("admin@x.fr", "pw", "A", "B", "1 rue", "Paris", "75000", is_admin=True)
+    client = auth.register("client@x.fr", "pw", "C", "D", "2 rue", "Lyon", "69000")
+    repos["products"].add(Product(id="p1", name="Robe", description="", price_cents=1500, stock_qty=3))
+    carts = CartService(repos["carts"], repos["products"])
+    orders = OrderService(
+        repos["orders"], repos["products"], repos["carts"], repos["payments"], repos["invoices"],
+        BillingService(repos["invoices"]), DeliveryService(), PaymentGateway(), repos["users"],
+    )
+
+    carts.add_to_cart(client.id, "p1", 2)
+    assert carts.cart_total(client.id) == 3000
+    order = orders.checkout(client.id)
+    assert repos["products"].get("p1").stock_qty == 1
+    assert not repos["carts"].get_or_create(client.id).items
+
+    orders.pay_by_card(order.id, "4242424242424242", 12, 2030, "123")
+    assert [o.id for o in orders.backoffice_queue(admin.id, OrderStatus.PAYEE)] == [order.id]
+    orders.backoffice_ship_order(admin.id, order.id)
+    orders.backoffice_mark_delivered(admin.id, order.id)
+
+    stored = repos["orders"].get(order.id)
+    assert stored.status == OrderStatus.LIVREE
+    assert stored.delivery.status == "LIVREE"
+    assert repos["invoices"].get(stored.invoice_id).total_cents == 3000
+    assert repos["payments"].get(stored.payment_id).succeeded
+    assert repos["orders"].count_by_status(OrderStatus.PAYEE) == 0
+    assert [o.id for o in orders.view_orders(client.id)] == [order.id]
+
+    with pytest.raises(ValueError):
+        repos["products"].reserve_stock("p1", 2)
+
+def test_failed_checkout_keeps_stock_and_cart(repos):
+    auth = AuthService(repos["users"], SessionManager())
+    client = auth.register("client@x.fr", "pw", "C", "D", "2 rue", "Lyon", "69000")
+    repos["products"].add(Product(id="p1", name="Robe", description="", price_cents=1500, stock_qty=3))
+    repos["products"].add(Product(id="p2", name="Caftan", description="", price_cents=9000, stock_qty=1))
+    carts = CartService(repos["carts"], repos["products"])
+    orders = OrderService(
+        repos["orders"], repos["products"], repos["carts"], repos["payments"], repos["invoices"],
+        BillingService(repos["invoices"]), DeliveryService(), PaymentGateway(), repos["users"],
+    )
+    carts.add_to_cart(client.id, "p1", 2)
+    carts.add_to_cart(client.id, "p2", 1)
+    repos["products"].reserve_stock("p2", 1)  # vendu ailleurs entre-temps
+    with pytest.raises(ValueError):
+        orders.checkout(client.id)
+    assert repos["products"].get("p1").stock_qty == 3  # réservation de la première ligne annulée
+    assert len(repos["carts"].get_or_create(client.id).items) == 2
+    assert orders.view_orders(client.id) == []
+
+def test_threads(repos):
+    auth = AuthService(repos["users"], SessionManager())
+    admin = auth.register("admin@x.fr", "pw", "A", "B", "1 rue", "Paris", "75000", is_admin=True)
+    cs = CustomerService(repos["threads"], repos["users"])
+    t1 = cs.open_thread(admin.id, "a")
+    t2 = cs.open_thread(admin.id, "b")
+    cs.post_message(t1.id, None, "bonjour")
+    cs.close_thread(t2.id, admin.id)
+    assert [t.id for t in repos["threads"].list_by_user(admin.id)] == [t1.id, t2.id]
+    assert [t.id for t in repos["threads"].list_open()] == [t1.id]
+    assert repos["threads"].get(t1.id).messages[0].body == "bonjour"
@@ -0,0 +1,158 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+APP = """
+import os
+import time
+
+def app(environ, start_response):
+    if environ["PATH_INFO"] == "/slow":
+        time.sleep(0.5)
+    body = f"{os.getpid()} {VERSION}".encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+VERSION = "v1"
+"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(path, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "tiny_app.py").write_text(APP, encoding="utf-8")
+    port = _free_port()
+    pidfile = tmp_path / "serve.pid"
+    notify = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    notify.bind(str(tmp_path / "notify.sock"))
+    notify.settimeout(15)
+    env = dict(os.environ, PYTHONPATH=str(tmp_path), NOTIFY_SOCKET=str(tmp_path / "notify.sock"))
+    proc = subprocess.Popen(
+        [sys.executable, str(PROJECT_ROOT / "serve.py"), "--app", "tiny_app:app",
+         "--bind", f"127.0.0.1:{port}", "--workers", "2", "--threads", "2",
+         "--max-requests", "3", "--graceful-timeout", "5", "--pidfile", str(pidfile)],
+        env=env, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        assert _wait_for(pidfile), "serveur jamais prêt"
+        yield proc, port, pidfile, notify, tmp_path
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        notify.close()
+
+
+def _get(port, path="/"):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", headers={"Connection": "close"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        pid, version = response.read().decode().split()
+        return int(pid), version
+
+
+def test_ready_signal_and_max_requests_recycling(server):
+    proc, port, pidfile, notify, _ = server
+    assert int(pidfile.read_text()) == proc.pid
+    assert notify.recv(256).startswith(b"READY=1")
+    pids = {_get(port)[0] for _ in range(12)}
+    # 2 workers, 3 requêtes chacun au plus : au moins 4 processus différents
+    assert len(pids) >= 4
+    assert proc.pid not in pids
+
+
+def test_sighup_starts_new_generation_without_dropping_requests(server):
+    proc, port, pidfile, notify, tmp_path = server
+    notify.recv(256)
+    (tmp_path / "tiny_app.py").write_text(APP.replace('"v1"', '"v2"'), encoding="utf-8")
+    os.kill(proc.pid, signal.SIGHUP)
+    versions = []
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline and versions[-3:] != ["v2"] * 3:
+        versions.append(_get(port)[1])
+    assert versions[-3:] == ["v2"] * 3
+    assert b"READY=1" in notify.recv(256) or b"READY=1" in notify.recv(256)
+
+
+def test_sigterm_finishes_inflight_request(server):
+    proc, port, pidfile, notify, _ = server
+    import threading
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("r", _get(port, "/slow")))
+    thread.start()
+    time.sleep(0.2)
+    os.kill(proc.pid, signal.SIGTERM)
+    thread.join(10)
+    assert result["r"][1] == "v1"
+    assert proc.wait(10) == 0
+    assert not pidfile.exists()
+
+
+def test_busy_worker_stops_accepting(tmp_path):
+    import threading
+    sys.path.insert(0, str(PROJECT_ROOT))
+    from serve import PooledWSGIServer
+
+    release = threading.Event()
+
+    def app(environ, start_response):
+        release.wait(5)
+        start_response("200 OK", [("Content-Length", "2")])
+        return [b"ok"]
+
+    class CountingServer(PooledWSGIServer):
+        accepted = 0
+
+        def get_request(self):
+            request = super().get_request()
+            self.accepted += 1
+            return request
+
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    server = CountingServer("127.0.0.1", port, app, fd=listener.fileno(), threads=1)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    results = []
+    clients = [threading.Thread(target=lambda: results.append(_get_text(port))) for _ in range(2)]
+    try:
+        for client in clients:
+            client.start()
+        time.sleep(0.5)
+        assert server.accepted == 1  # le second client attend dans la file du noyau
+        release.set()
+        for client in clients:
+            client.join(10)
+        assert results == ["ok", "ok"] and server.accepted == 2
+    finally:
+        release.set()
+        server.shutdown()
+        server.server_close()
+        listener.close()
+
+
+def _get_text(port):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/", headers={"Connection": "close"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read().decode()
@@ -0,0 +1,96 @@
+import pytest
+
+from app.services_init import CartAdapter, OrderAdapter, _wrap_order_service, normalize_lines
+
+
+class GetCartCart:
+    def __init__(self):
+        self.lines = {}
+        self.calls = []
+
+    def add_item(self, product_id, qty):
+        self.lines[product_id] = self.lines.get(product_id, 0) + qty
+
+    def set_quantity(self, product_id, qty):
+        self.calls.append(("set_quantity", product_id, qty))
+        self.lines.pop(product_id, None)
+
+    def get_cart(self):
+        return {"items": [{"product_id": p, "quantity": q, "price_cents": 500} for p, q in self.lines.items()]}
+
+
+def test_cart_adapter_binds_backend_methods_once():
+    backend = GetCartCart()
+    cart = CartAdapter(backend)
+    assert cart.add == backend.add_item
+    cart.add("robe", 2)
+    items, total = cart.view()
+    assert items == [{"product_id": "robe", "product": {"id": "robe", "name": "robe", "price_cents": 500},
+                      "quantity": 2, "price_cents": 500, "subtotal_cents": 1000}]
+    assert total == 1000
+    cart.remove("robe", 1)
+    assert backend.calls == [("set_quantity", "robe", 0)]
+    assert cart.view() == ([], 0)
+
+
+def test_cart_adapter_without_operations_raises_at_call():
+    class ReadOnly:
+        def list_items(self):
+            return [{"product_id": "a", "quantity": 3, "price_cents": 100}]
+
+    cart = CartAdapter(ReadOnly())
+    assert cart.view()[1] == 300
+    with pytest.raises(RuntimeError):
+        cart.add("a", 1)
+    with pytest.raises(RuntimeError):
+        cart.remove("a", 0)
+
+
+def test_normalize_lines_accepts_objects():
+    class Product:
+        id, name, price_cents = "k1", "Karakou", 2000
+
+    class Line:
+        product, quantity = Product(), 2
+
+    lines, total = normalize_lines([Line()])
+    assert lines[0]["product"] == {"id": "k1", "name": "Karakou", "price_cents": 2000}
+    assert total == 4000
+
+
+def test_order_adapter_follows_create_signature():
+    class ItemsFirst:
+        def __init__(self):
+            self._orders = []
+
+        def place_order(self, items, user_id, total_cents):
+            order = {"id": len(self._orders) + 1, "user_id": user_id, "items": items, "total_cents": total_cents}
+            self._orders.append(order)
+            return order
+
+        def list_orders(self):
+            return self._orders
+
+    orders = _wrap_order_service(ItemsFirst())
+    assert isinstance(orders, OrderAdapter)
+    order = orders.create_order(7, ["ligne"], 1500)
+    assert (order["user_id"], order["items"], order["total_cents"]) == (7, ["ligne"], 1500)
+    assert orders.get_user_orders("7") == [order]
+    assert orders.get_order(1) is None
+    orders.set_status(1, "PAID")
+    assert order["status"] == "PAID"
+
+
+def test_wrap_order_service_keeps_complete_backend():
+    class Complete:
+        def create_order(self, user_id, items, total_cents, status="PENDING"):
+            return {}
+
+        def get_user_orders(self, user_id):
+            return []
+
+        def get_order(self, order_id):
+            return None
+
+    backend = Complete()
+    assert _wrap_order_service(backend) is backend
@@ -0,0 +1,94 @@
+import time
+import pytest
+from app import create_app, models
+from app.session_store import FileSystemSessionBackend, SQLiteSessionBackend, decode, encode
+
+@pytest.fixture(params=["sqlite", "filesystem"])
+def server_app(request, tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test-secret-key",
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "SESSION_BACKEND": request.param,
+        "SESSION_SQLITE_PATH": str(tmp_path / "sessions.db"),
+        "SESSION_FILE_DIR": str(tmp_path / "sessions"),
+    })
+    with app.app_context():
+        models.db.create_all()
+    return app
+
+def test_encode_roundtrip_and_compression():
+    big = {"cart": {f"product_{i}": i for i in range(500)}}
+    blob = encode(big)
+    assert decode(blob) == big
+    assert len(blob) < len(repr(big))
+    assert decode(encode({"a": 1})) == {"a": 1}
+
+def test_cart_lives_server_side_and_saves_only_when_modified(server_app):
+    client = server_app.test_client()
+    saves = []
+    backend = server_app.session_interface.backend
+    orig_save = backend.save
+    backend.save = lambda *a: (saves.append(a[0]), orig_save(*a))
+
+    for i in range(60):
+        client.post(f"/cart/api/update/product_{i}", json={"qty": 2})
+    cookie = client.get_cookie("session")
+    assert cookie is not None and len(cookie.value) < 120  # seulement l'identifiant signé
+    assert len(saves) == 60
+
+    r = client.get("/about")  # la page ne modifie pas la session
+    assert "Set-Cookie" not in r.headers
+    assert len(saves) == 60
+
+    with client.session_transaction() as s:
+        assert len(s["cart"]) == 60
+
+def test_tampered_cookie_starts_new_session(server_app):
+    client = server_app.test_client()
+    client.set_cookie("session", "not-a-signed-id")
+    with client.session_transaction() as s:
+        assert dict(s) == {}
+
+@pytest.mark.parametrize("kind", ["sqlite", "filesystem"])
+def test_sweep_removes_expired_in_batches(tmp_path, kind):
+    backend = SQLiteSessionBackend(tmp_path / "s.db") if kind == "sqlite" else FileSystemSessionBackend(tmp_path / "s")
+    past, future = time.time() - 10, time.time() + 3600
+    for i in range(5):
+        backend.save(f"aa{i:062x}", {"i": i}, past)
+    backend.save("aa" + "f" * 62, {"keep": True}, future)
+    assert backend.load(f"aa{0:062x}") is None
+    removed = backend.sweep(batch=3)
+    assert removed == 3
+    while backend.sweep(batch=3):
+        pass
+    assert backend.load("aa" + "f" * 62) == {"keep": True}
+
+def test_login_rotates_planted_sid(server_app):
+    class FakeAuth:
+        def login(self, email, password):
+            return {"user": {"id": 7, "is_admin": True}}
+
+    server_app.extensions["services"]["auth"] = FakeAuth()
+    backend = server_app.session_interface.backend
+    client = server_app.test_client()
+    client.post("/cart/api/update/robe", json={"qty": 1})  # session anonyme (sid « planté »)
+    planted = client.get_cookie("session").value
+    planted_sid = server_app.session_interface._signer(server_app).unsign(planted).decode()
+
+    client.post("/login", data={"email": "a@example.com", "password": "x"})
+    cookie = client.get_cookie("session").value
+    assert cookie != planted
+    assert backend.load(planted_sid) is None
+    with client.session_transaction() as s:
+        assert s["user_id"] == 7 and s["is_admin"] is True
+        assert s["cart"] == {"robe": 1}  # le contenu suit le nouvel identifiant
+
+    # l'ancien cookie n'ouvre plus la session authentifiée
+    attacker = server_app.test_client()
+    attacker.set_cookie("session", planted)
+    with attacker.session_transaction() as s:
+        assert "user_id" not in s
+
+    client.get("/logout")
+    assert client.get_cookie("session").value != cookie
@@ -0,0 +1,107 @@
+import multiprocessing
+
+from app.shared_catalogue import SharedCatalogue
+
+ROWS = [("caftan_1", 18900, 2, True), ("robe_1", 15900, 0, False)]
+
+def test_publish_and_read_from_another_mapping(tmp_path):
+    path = tmp_path / "catalogue.bin"
+    writer = SharedCatalogue(path)
+    reader = SharedCatalogue(path)  # autre projection, comme un autre worker
+    writer.publish(ROWS)
+    assert len(reader) == 2
+    assert reader.get("caftan_1") == (18900, 2, True, 0)
+    assert reader.get("absent") is None
+
+    generation = reader.generation
+    writer.upsert([("caftan_1", 17900, 1, True)])
+    assert reader.generation > generation and reader.generation % 2 == 0
+    assert reader.get("caftan_1").price_cents == 17900
+    assert sorted(reader.rows()) == [("caftan_1", 17900, 1, True, 0), ("robe_1", 15900, 0, False, 0)]
+
+def test_upsert_grows_file_seen_by_readers(tmp_path):
+    path = tmp_path / "catalogue.bin"
+    writer = SharedCatalogue(path, capacity=2)
+    reader = SharedCatalogue(path)
+    writer.publish(ROWS)
+    writer.upsert([(f"p{i}", i, i, True) for i in range(10)])
+    assert len(reader) == 12
+    assert reader.get("p9") == (9, 9, True, 0)
+
+def _bump(path, n):
+    catalogue = SharedCatalogue(path)
+    for i in range(n):
+        catalogue.upsert([("caftan_1", 18900, i, True)])
+
+def test_writes_from_other_process_are_consistent(tmp_path):
+    path = tmp_path / "catalogue.bin"
+    reader = SharedCatalogue(path)
+    reader.publish(ROWS)
+    proc = multiprocessing.get_context("fork").Process(target=_bump, args=(path, 200))
+    proc.start()
+    while proc.is_alive():
+        entry = reader.get("caftan_1")
+        assert entry.price_cents == 18900 and entry.active
+    proc.join()
+    assert reader.get("caftan_1").stock_qty == 199
+
+def test_newer_sync_is_never_overwritten(tmp_path):
+    catalogue = SharedCatalogue(tmp_path / "catalogue.bin")
+    catalogue.publish(ROWS, catalogue_generation=5)
+    catalogue.upsert([("caftan_1", 1, 1, True, 4)], catalogue_generation=4)  # lue avant la précédente
+    assert catalogue.get("caftan_1").price_cents == 18900 and catalogue.catalogue_generation == 5
+
+def _shop(tmp_path, **config):
+    from app import create_app
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shop.db'}",
+        "SHARED_CATALOGUE_PATH": str(tmp_path / "catalogue.bin"),
+        **config,
+    })
+
+def test_orm_commit_updates_shared_catalogue(tmp_path):
+    from app.models import Product, db
+    from app.product_versions import catalogue_version, product_version
+    app = _shop(tmp_path)
+    other_worker = SharedCatalogue(tmp_path / "catalogue.bin")
+    with app.app_context():
+        db.create_all()
+        db.session.add(Product(id="karakou_1", name="Karakou", price_cents=25000, stock_qty=3, category="Karakou"))
+        db.session.commit()
+        entry = other_worker.get("karakou_1")
+        assert entry[:3] == (25000, 3, True) and entry.version == product_version("karakou_1")
+        assert other_worker.catalogue_generation == catalogue_version() == entry.version
+        db.session.get(Product, "karakou_1").stock_qty = 2
+        db.session.rollback()
+        assert other_worker.get("karakou_1").stock_qty == 3
+        db.session.get(Product, "karakou_1").stock_qty = 1
+        db.session.commit()
+        assert other_worker.get("karakou_1").stock_qty == 1
+        assert catalogue_version() == db.session.execute(db.text("SELECT generation FROM catalogue_meta")).scalar()
+        db.session.delete(db.session.get(Product, "karakou_1"))
+        db.session.commit()
+        assert not other_worker.get("karakou_1").active and product_version("karakou_1") is None
+
+def test_writes_outside_the_orm_are_synced_before_requests(tmp_path):
+    import sqlite3
+    import time
+    from app.models import Product, db
+    app = _shop(tmp_path, SHARED_CATALOGUE_SYNC=0.05)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Product(id="karakou_1", name="Karakou", price_cents=25000, stock_qty=3, category="Karakou"))
+        db.session.commit()
+    client = app.test_client()
+    etag = client.get("/catalogue").headers["ETag"]
+    with sqlite3.connect(tmp_path / "shop.db") as conn:
+        conn.execute("UPDATE product SET active = 0 WHERE id = 'karakou_1'")
+    time.sleep(0.1)
+    assert client.get("/catalogue", headers={"If-None-Match": etag}).status_code == 200
+    assert not app.extensions["shared_catalogue"].get("karakou_1").active
+
+    # article inactif (ou supprimé) : le panier ne prend pas son prix dans le catalogue partagé
+    app.extensions["shared_catalogue"].upsert([("ancien_1", 9900, 1, False, 0)])
+    with client.session_transaction() as sess:
+        sess["cart"] = {"ancien_1": 1}
+    assert client.post("/cart/api/update/ancien_1", json={"qty": 2}).get_json()["cart_total_cents"] == 0
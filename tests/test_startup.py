@@ -0,0 +1,65 @@
+import pkgutil
+import subprocess
+import sys
+from pathlib import Path
+
+from flask import Blueprint
+
+import app.routes as routes
+from app import create_app
+from app.services_init import LazyServices
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_registry_lists_every_blueprint_module():
+    declared = {module for module, _ in routes.BLUEPRINTS}
+    for info in pkgutil.iter_modules(routes.__path__):
+        module = __import__(f"app.routes.{info.name}", fromlist=["_"])
+        if any(isinstance(obj, Blueprint) for obj in vars(module).values()):
+            assert info.name in declared, f"{info.name} absent de app.routes.BLUEPRINTS"
+
+
+def test_registry_order_keeps_home_on_root():
+    app = create_app({"TESTING": True})
+    rule = next(r for r in app.url_map.iter_rules() if r.rule == "/")
+    assert rule.endpoint == "home.index"
+    assert routes.blueprints() is routes.blueprints()
+
+
+def test_lazy_services_build_on_first_access_only():
+    calls = []
+    services = LazyServices({"a": lambda: calls.append(1) or object()})
+    assert "a" in services and "b" not in services
+    assert calls == []
+    first = services["a"]
+    assert services.get("a") is first
+    assert calls == [1]
+    assert services.get("b") is None
+    services["b"] = "remplacé"
+    assert services["b"] == "remplacé"
+
+
+def test_create_app_does_not_build_services_or_import_domain():
+    code = (
+        "import sys; from app import create_app; create_app(); "
+        "print(sorted(m for m in ('app.domain', 'requests', 'PIL') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_disabled_features_are_not_imported():
+    code = (
+        "import sys; from app import create_app; create_app(); "
+        "print(sorted(m for m in ('app.static_export', 'app.session_store', 'urllib.request') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_services_available_on_demand():
+    app = create_app({"TESTING": True})
+    services = app.extensions["services"]
+    assert services["products"].get("robe_kabyle") is not None
+    assert hasattr(services["cart"], "view")
@@ -0,0 +1,86 @@
+import gzip
+import sqlite3
+
+import pytest
+
+from app import create_app, static_export
+from app.models import Product, db
+
+
+@pytest.fixture
+def export_app(tmp_path):
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'export.db'}"})
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Product(id="caftan_a", name="Caftan A", price_cents=18900, stock_qty=2, category="Caftan", active=True),
+            Product(id="caftan_b", name="Caftan B", price_cents=15900, stock_qty=1, category="Caftan", active=True),
+            Product(id="abaya_a", name="Abaya A", price_cents=9900, stock_qty=4, category="Abaya", active=True),
+        ])
+        db.session.commit()
+        with db.engine.begin() as connection:
+            static_export.ensure_schema(connection)  # fait par scripts/export_static.py
+    return app
+
+
+def test_init_app_only_checks_the_journal(tmp_path, caplog):
+    db_uri = f"sqlite:///{tmp_path / 'check.db'}"
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": db_uri})
+    with app.app_context():
+        db.create_all()
+    app.config["STATIC_EXPORT_DIR"] = str(tmp_path / "export")
+    assert static_export.init_app(app) is False
+    assert "export_changelog, export_log_insert" in caplog.text
+    with app.app_context(), db.engine.connect() as connection:
+        assert static_export.check_schema(connection) == list(static_export._JOURNAL)  # rien créé
+    with app.app_context(), db.engine.begin() as connection:
+        static_export.ensure_schema(connection)
+    assert static_export.init_app(app) is True
+
+
+def test_full_export_writes_pages_and_compressed_variants(export_app, tmp_path):
+    out = tmp_path / "export"
+    written, removed = static_export.export_all(export_app, out, workers=1)
+    assert written == 1 + 4 + 3 and removed == 0
+    page = (out / "product" / "caftan_a.html").read_text()
+    assert "Caftan A" in page and "Déconnexion" not in page
+    assert gzip.decompress((out / "catalogue.html.gz").read_bytes()).decode() == (out / "catalogue.html").read_text()
+    category = (out / "catalogue" / "Caftan.html").read_text()
+    assert "Caftan B" in category and "Abaya A" not in category
+    assert static_export.load_state(out) == {"last_seq": 0}
+
+
+def test_incremental_export_regenerates_only_changed_pages(export_app, tmp_path):
+    out = tmp_path / "export"
+    static_export.export_all(export_app, out, workers=1)
+    assert static_export.export_changes(export_app, out) == (0, 0)
+    untouched = (out / "product" / "caftan_b.html").stat().st_mtime_ns
+
+    with export_app.app_context():
+        db.session.get(Product, "caftan_a").price_cents = 17500
+        db.session.commit()
+    # écrivain hors ORM : le trigger journalise aussi
+    conn = sqlite3.connect(tmp_path / "export.db")
+    conn.execute("UPDATE product SET category = 'Abaya' WHERE id = 'caftan_a'")
+    conn.execute("DELETE FROM product WHERE id = 'abaya_a'")
+    conn.commit()
+    conn.close()
+
+    with export_app.app_context():
+        rows = db.session.execute(db.text("SELECT product_id, category FROM export_changelog")).all()
+    assert static_export.changed_paths(rows) == [
+        "/catalogue", "/catalogue/Abaya", "/catalogue/Caftan", "/product/abaya_a", "/product/caftan_a",
+    ]
+    written, removed = static_export.export_changes(export_app, out)
+    assert (written, removed) == (4, 1)
+    assert "175.00" in (out / "product" / "caftan_a.html").read_text()
+    assert not (out / "product" / "abaya_a.html").exists()
+    assert "Caftan A" in (out / "catalogue" / "Abaya.html").read_text()
+    assert (out / "product" / "caftan_b.html").stat().st_mtime_ns == untouched
+    with export_app.app_context():
+        assert db.session.execute(db.text("SELECT COUNT(*) FROM export_changelog")).scalar() == 0
+
+
+def test_unsafe_paths_are_not_exported(tmp_path):
+    assert static_export.page_file(tmp_path, "/product/../etc") is None
+    assert static_export.page_file(tmp_path, "/product/robe_1") == tmp_path / "product" / "robe_1.html"
@@ -0,0 +1,47 @@
+from app import create_app, metrics, templating
+
+
+def test_bytecode_cache_written_and_namespaced_by_extensions(tmp_path):
+    stripped = tmp_path / "stripped"
+    raw = tmp_path / "raw"
+    create_app({"TESTING": True, "TEMPLATE_CACHE_DIR": str(stripped)}).test_client().get("/contact")
+    create_app({"TESTING": True, "TEMPLATE_CACHE_DIR": str(raw),
+                "TEMPLATE_STRIP_WHITESPACE": False}).test_client().get("/contact")
+    stripped_files = {p.name for p in stripped.glob("__jinja2_*.cache")}
+    raw_files = {p.name for p in raw.glob("__jinja2_*.cache")}
+    assert stripped_files and raw_files
+    assert not stripped_files & raw_files
+
+
+def test_bytecode_cache_reused_by_new_app(tmp_path):
+    config = {"TESTING": True, "TEMPLATE_CACHE_DIR": str(tmp_path)}
+    first = create_app(config).test_client().get("/contact").get_data()
+    files = {p: p.stat().st_mtime_ns for p in tmp_path.iterdir()}
+    second = create_app(config).test_client().get("/contact").get_data()
+    assert first == second
+    assert {p: p.stat().st_mtime_ns for p in tmp_path.iterdir()} == files
+
+
+def test_cache_can_be_disabled():
+    app = create_app({"TESTING": True, "TEMPLATE_CACHE_DIR": None})
+    assert app.jinja_env.bytecode_cache is None
+
+
+def test_profiling_records_render_counts_and_time(tmp_path):
+    metrics.reset()
+    templating.reset_profile()
+    app = create_app({"TESTING": True, "TEMPLATE_CACHE_DIR": str(tmp_path), "TEMPLATE_PROFILING": True})
+    client = app.test_client()
+    client.get("/contact")
+    client.get("/contact")
+    count, total, worst = templating.profile()["contact.html"]
+    assert count == 2
+    assert total >= worst > 0
+    assert metrics.get('template_renders_total{template="contact.html"}') == 2
+    assert 'template_render_microseconds_total{template="contact.html"}' in metrics.snapshot()
+
+
+def test_profiling_off_by_default(tmp_path):
+    templating.reset_profile()
+    create_app({"TESTING": True, "TEMPLATE_CACHE_DIR": str(tmp_path)}).test_client().get("/contact")
+    assert templating.profile() == {}
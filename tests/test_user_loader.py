@@ -0,0 +1,36 @@
+from sqlalchemy import event
+from app import models
+from app.user_loader import user_cache
+
+def _count_user_queries(app):
+    seen = []
+    def before(conn, cursor, statement, params, context, executemany):
+        if "FROM user" in statement:
+            seen.append(statement)
+    engine = models.db.engine
+    event.listen(engine, "before_cursor_execute", before)
+    return seen, lambda: event.remove(engine, "before_cursor_execute", before)
+
+def test_profile_views_hit_user_cache_and_invalidate_on_edit(app, client, ctx):
+    user_cache.clear()
+    u = models.User(email="cache@example.com", password_hash="x", first_name="Amel")
+    models.db.session.add(u)
+    models.db.session.commit()
+    uid = u.id
+    models.db.session.expunge_all()  # forcer une vraie lecture SQL au premier accès
+    with client.session_transaction() as s:
+        s["user_id"] = uid
+
+    seen, stop = _count_user_queries(app)
+    try:
+        assert b"Amel" in client.get("/profile").data
+        first = len(seen)
+        assert first == 1
+        client.get("/profile")
+        client.get("/profile/edit")
+        assert len(seen) == first  # servi par le cache
+
+        client.post("/profile/edit", data={"first_name": "Lina", "last_name": ""})
+        assert b"Lina" in client.get("/profile").data
+    finally:
+        stop()